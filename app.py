@@ -1,30 +1,52 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objs as go
-from data.websocket_client import latest_orderbook, run_in_thread, get_trade_metrics
+import streamlit.components.v1 as components
+from data.websocket_client import feed_manager, run_in_thread, get_trade_metrics
 from streamlit_autorefresh import st_autorefresh
-from utils.almgren_chriss import optimal_execution
+from utils.execution_cache import cached_optimal_execution, start_prewarm
+from utils.execution_monte_carlo import execution_cost_distribution
+from utils.latency_tracker import latency_tracker
+from config.settings import PREWARM_EXECUTION_CACHE, API_URL
+from data.api_client import ApiClient
+from data.cost_surface import surface_to_dict
+from ui.charts import (adaptive_refresh_interval, cost_surface_figure, cost_surface_frame, depth_figure,
+                       update_depth_figure)
 import numpy as np
-
-# Start websocket listener once
-if 'ws_thread_started' not in st.session_state:
+import time
+
+if API_URL:
+    # Thin client: the service (server.py) owns the feed, the books and the solver cache
+    api = ApiClient(API_URL)
+else:
+    api = None
+    # Start the shared feed thread (only the first session of the process starts it)
     run_in_thread()
-    st.session_state.ws_thread_started = True
+
+    # Precompute common slider positions in the shared solver cache
+    if PREWARM_EXECUTION_CACHE:
+        start_prewarm()
 
 st.set_page_config(layout="wide")
 st.title("GoQuant Real-time Trade Simulator")
 
-# Auto-refresh every 1 second to update orderbook and metrics
-st_autorefresh(interval=1000, limit=None, key="refresh")
-
 # Layout: 3 columns with wide spacing
 col1, spacer1, col2, spacer2, col3 = st.columns([1.2, 0.2, 2.4, 0.2, 1.2])
 
 with col1:
     st.header("Input Parameters")
 
-    exchange = st.selectbox("Exchange", ["OKX"], disabled=True)
-    asset = st.selectbox("Spot Asset", ["BTC-USDT-SWAP"], disabled=True)
+    feeds = api or feed_manager
+    exchange = st.selectbox("Exchange", feeds.exchanges(), format_func=str.upper)
+    asset = st.selectbox("Spot Asset", feeds.symbols(exchange))
+
+    # Rerun about as often as the selected book changes instead of every second
+    if api:
+        publish_rate = next((feed["publish_rate"] for feed in api.stats()
+                             if (feed["exchange"], feed["symbol"]) == (exchange, asset)), 0.0)
+    else:
+        publish_rate = feed_manager.stream(exchange, asset).publish_rate
+    st_autorefresh(interval=adaptive_refresh_interval(publish_rate), limit=None, key="refresh")
+
     order_type = st.selectbox("Order Type", ["market"], disabled=True)
 
     quantity = st.number_input("Quantity (USD)", min_value=10.0, max_value=10000.0, value=100.0, step=10.0)
@@ -40,67 +62,74 @@ with col1:
     gamma = st.slider("Permanent Impact Coefficient (γ)", 0.01, 0.2, 0.05)
     eta = st.slider("Temporary Impact Coefficient (η)", 0.01, 0.2, 0.05)
 
+    # Volatility and impact estimated by the feed from the instrument's mids and depth curve
+    use_calibration = st.checkbox("Use live calibration", help="Replaces volatility, exponents and impact "
+                                  "coefficients with the values calibrated from the live book")
+    if use_calibration:
+        if api:
+            calibration = api.calibration(exchange, asset)
+        else:
+            calibration = feed_manager.stream(exchange, asset).calibration.execution_params()
+        if calibration:
+            volatility = calibration.get("volatility", volatility / 100.0) * 100.0
+            alpha, beta = calibration.get("alpha", alpha), calibration.get("beta", beta)
+            gamma, eta = calibration.get("gamma", gamma), calibration.get("eta", eta)
+            st.caption(f"Calibrated: σ {volatility:.2f}% per day, γ {gamma:.3e}, η {eta:.3e}")
+        else:
+            st.caption("Calibration is waiting for book updates")
+
     simulate_btn = st.button("Simulate Trade")
 
 with col2:
     st.header("Processed Output")
 
-    orderbook = latest_orderbook
+    render_start_ns = time.perf_counter_ns()
+    if api:
+        stream = None
+        book_version, orderbook = api.book(exchange, asset)
+    else:
+        stream = feed_manager.stream(exchange, asset)
+        book_version, orderbook = stream.store.get()
 
-    # Initialize figure only once and store in session state
+    # Build the figure only once; later reruns only swap the data of its two traces
     if 'orderbook_fig' not in st.session_state:
-        fig = go.Figure()
-        st.session_state.orderbook_fig = fig
-    else:
-        fig = st.session_state.orderbook_fig
-    fig.data = []  # Clear previous traces on each update
+        st.session_state.orderbook_fig = depth_figure()
+        st.session_state.orderbook_fig_version = None
+    fig = st.session_state.orderbook_fig
+
+    # Update the traces only when the feed published a newer book or the instrument changed
+    book_changed = st.session_state.orderbook_fig_version != (exchange, asset, book_version)
 
     if orderbook:
-        bids = orderbook.get("bids", [])
-        asks = orderbook.get("asks", [])
+        mid_price = orderbook.mid_price if np.isfinite(orderbook.mid_price) else 0
+        st.metric("Mid Price", f"{mid_price:.2f} USD")
 
-        bids_df = pd.DataFrame(bids, columns=["price", "size"]).astype(float).sort_values(by='price', ascending=False).head(20) # Limit to top bids
-        asks_df = pd.DataFrame(asks, columns=["price", "size"]).astype(float).sort_values(by='price', ascending=True).head(20) # Limit to top asks
+    # A newly drawn book counts towards the tick-to-display latency
+    tick_to_display = False
 
-        best_bid = bids_df["price"].max() if not bids_df.empty else 0
-        best_ask = asks_df["price"].min() if not asks_df.empty else 0
-        mid_price = (best_bid + best_ask) / 2 if best_bid and best_ask else 0
-        st.metric("Mid Price", f"{mid_price:.2f} USD")
+    if orderbook and book_changed:
+        st.session_state.orderbook_fig_version = (exchange, asset, book_version)
+        # Top 20 levels; a book whose drawn levels did not move is not counted as displayed
+        tick_to_display = update_depth_figure(fig, orderbook)
 
-        # Add traces for bids (green)
-        fig.add_trace(go.Bar(
-            x=bids_df["price"],
-            y=bids_df["size"],
-            name='Bids',
-            marker_color='green',
-            opacity=0.7
-        ))
-
-        # Add traces for asks (red)
-        fig.add_trace(go.Bar(
-            x=asks_df["price"],
-            y=asks_df["size"],
-            name='Asks',
-            marker_color='red',
-            opacity=0.7
-        ))
-
-        fig.update_layout(
-            title="Orderbook Depth",
-            xaxis_title="Price",
-            yaxis_title="Size",
-            barmode='group', # or 'overlay' for stacked bars
-            xaxis=dict(side="left"),
-            yaxis=dict(side="right"),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
-
-        # Display the figure with interactive features
-        st.plotly_chart(fig, use_container_width=True, clear_figure=False, config={'modeBarButtonsToAdd': ['pan2d', 'zoomIn2d', 'zoomOut2d', 'resetScale2d', 'hoverClosestCartesian', 'toImage', 'autoScale2d', 'select2d', 'lasso2d']})
+    if orderbook:
+        if api:
+            # The service's chart page patches the depth bars in the browser from pushed diffs,
+            # so it is embedded once per instrument instead of being re-sent on every rerun
+            components.iframe(f"{API_URL.rstrip('/')}/chart?exchange={exchange}&symbol={asset}", height=780)
+        else:
+            # Display the figure with interactive features
+            st.plotly_chart(fig, use_container_width=True, clear_figure=False, config={'modeBarButtonsToAdd': ['pan2d', 'zoomIn2d', 'zoomOut2d', 'resetScale2d', 'hoverClosestCartesian', 'toImage', 'autoScale2d', 'select2d', 'lasso2d']})
+
+        latency_tracker.record_since("render", render_start_ns)
+        if stream is not None:
+            published_version, received_ns = stream.last_publish
+            if tick_to_display and published_version == book_version:
+                # From the network frame to the chart showing it
+                latency_tracker.record_since("tick_to_display", received_ns)
 
         if simulate_btn:
-            st.session_state.latest_metrics = get_trade_metrics(orderbook, quantity, volatility, fee_tier)
-            st.session_state.execution_result = optimal_execution(
+            execution_params = dict(
                 time_steps=time_steps,
                 total_shares=int(quantity),
                 risk_aversion=risk_aversion,
@@ -110,9 +139,28 @@ with col2:
                 eta=eta,
                 volatility=volatility / 100.0  # Convert % to decimal
             )
+            if api:
+                st.session_state.latest_metrics = api.trade_metrics(exchange, asset, quantity, fee_tier)
+                st.session_state.execution_result, st.session_state.cost_distribution = api.simulate(
+                    distribution=True, **execution_params)
+            else:
+                st.session_state.latest_metrics = get_trade_metrics(orderbook, quantity, fee_tier,
+                                                                    models=stream.models)
+                st.session_state.execution_result = cached_optimal_execution(**execution_params)
+                # Distribution of the schedule's shortfall under the same model parameters
+                st.session_state.cost_distribution = execution_cost_distribution(
+                    st.session_state.execution_result[3], alpha, beta, gamma, eta, volatility / 100.0, seed=0
+                )
     else:
         st.text("Waiting for orderbook data...")
 
+    # Priced by the feed thread on book changes; the page only reads the latest surface
+    surface = api.costs(exchange, asset) if api else surface_to_dict(*stream.costs_store.get())
+    if "sizes" in surface:
+        st.subheader("Live Cost Surface")
+        st.plotly_chart(cost_surface_figure(surface), use_container_width=True)
+        st.dataframe(cost_surface_frame(surface).style.format("{:.4f}"))
+
 with col3:
     st.header("Trade Simulation Metrics")
 
@@ -126,6 +174,15 @@ with col3:
         st.metric("Maker/Taker Ratio", f"{metrics['maker_taker_ratio'] * 100:.2f}%")
         st.metric("Internal Latency", f"{metrics['latency']:.2f} ms")
 
+    if "cost_distribution" in st.session_state:
+        st.subheader("Execution Cost Distribution")
+        distribution = st.session_state.cost_distribution
+
+        st.metric("Expected Shortfall", f"{distribution['mean']:.4f}")
+        st.metric("Shortfall Std Dev", f"{distribution['std']:.4f}")
+        st.metric("VaR 95% / 99%", f"{distribution['var_95']:.4f} / {distribution['var_99']:.4f}")
+        st.metric("CVaR 95% / 99%", f"{distribution['cvar_95']:.4f} / {distribution['cvar_99']:.4f}")
+
     if "execution_result" in st.session_state:
         st.subheader("Optimal Execution Trajectory")
 
@@ -139,6 +196,12 @@ with col3:
         st.line_chart(execution_df.set_index("Time Step"))
         st.dataframe(execution_df)
 
+with st.expander("Pipeline Latency"):
+    latency_summaries = latency_tracker.summaries()
+    if latency_summaries:
+        st.dataframe(pd.DataFrame.from_dict(latency_summaries, orient="index"))
+    st.download_button("Download Prometheus metrics", latency_tracker.prometheus_text(), file_name="latency.prom")
+
 # Optional: CSS Fade-in animation
 st.markdown("""
     <style>
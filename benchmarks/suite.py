@@ -0,0 +1,327 @@
+# Offline performance benchmarks of the execution solver, the feed's book handling and the trade metrics.
+#
+# Run with:
+#     python -m benchmarks.suite run --output baseline.json
+#     python -m benchmarks.suite run --quick --output current.json
+#     python -m benchmarks.suite compare baseline.json current.json --threshold 0.1
+#
+# Every input comes from the deterministic SyntheticFeed, so two runs with the
+# same seed do exactly the same work and nothing touches the network. compare
+# exits with status 1 when any benchmark got worse by more than the threshold.
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from data.feed_manager import FeedManager
+from data.orderbook import OrderBook
+from data.synthetic_feed import SyntheticFeed
+from models.book_models import BookModels
+from models.trade_metrics import get_trade_metrics
+from utils.almgren_chriss import optimal_execution
+
+# Solver grid: every time_steps x quantity point is solved with linear impact
+# (closed form) and with square-root impact (dynamic programming)
+SOLVER_TIME_STEPS = (10, 50, 100, 200)
+SOLVER_QUANTITIES = (100, 1000, 10000, 100000)
+SOLVER_MODELS = {
+    "closed_form": {"alpha": 1.0, "beta": 1.0},
+    "dp": {"alpha": 0.5, "beta": 0.5},
+}
+SOLVER_DEFAULTS = {"risk_aversion": 0.001, "gamma": 0.05, "eta": 0.05, "volatility": 0.025}
+
+# Book messages replayed through the feed, and get_trade_metrics calls timed
+FEED_MESSAGES = 20000
+METRICS_CALLS = 5000
+
+# Smaller workloads of --quick, for a check before every commit
+QUICK_SOLVER_TIME_STEPS = (10, 50)
+QUICK_SOLVER_QUANTITIES = (100, 1000)
+QUICK_FEED_MESSAGES = 2000
+QUICK_METRICS_CALLS = 1000
+
+# Order sizes in USD cycled through by the metrics benchmarks
+METRICS_QUANTITIES = (100.0, 1000.0, 10000.0, 100000.0)
+
+# Timed repeats per solver point; the fastest counts, and each repeat loops
+# until it has run at least MIN_REPEAT_SECONDS so fast solves are measurable
+SOLVER_REPEATS = 5
+MIN_REPEAT_SECONDS = 0.05
+
+LATENCY_PERCENTILES = (50, 90, 99)
+
+# Rounds of the feed and metrics benchmarks; the best round counts, so a
+# burst of load on the machine during one round does not show as a regression
+ROUNDS = 3
+
+# Relative change beyond which compare flags a benchmark as regressed
+DEFAULT_THRESHOLD = 0.10
+
+def _gc_paused(function):
+    """function wrapped to run with the garbage collector off, like timeit, so collections do not land in timings."""
+    def paused(*args):
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return function(*args)
+        finally:
+            if enabled:
+                gc.enable()
+    return paused
+
+def _result(value, unit, better):
+    return {"value": float(value), "unit": unit, "better": better}
+
+@_gc_paused
+def _fastest_call(function, repeats=SOLVER_REPEATS, min_seconds=MIN_REPEAT_SECONDS):
+    """Seconds per call of the fastest of `repeats` timed loops."""
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    number = max(1, int(min_seconds / elapsed) if elapsed > 0 else 1)
+    best = elapsed
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+def _peak_memory(function):
+    """Peak bytes allocated above the starting level while function runs, as seen by tracemalloc."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def bench_solver(time_steps_grid=SOLVER_TIME_STEPS, quantities=SOLVER_QUANTITIES, repeats=SOLVER_REPEATS):
+    """
+    Seconds per optimal_execution solve over the time_steps x quantity grid of every SOLVER_MODELS entry.
+
+    Returns:
+    - results: {"solver/<model>/T=<time_steps>/Q=<quantity>": result, "solver/peak_memory": result}
+    """
+    results = {}
+    for name, exponents in SOLVER_MODELS.items():
+        method = "dp" if name == "dp" else "closed_form"
+        for time_steps in time_steps_grid:
+            for quantity in quantities:
+                seconds = _fastest_call(lambda: optimal_execution(time_steps, quantity, method=method,
+                                                                  **exponents, **SOLVER_DEFAULTS), repeats)
+                results[f"solver/{name}/T={time_steps}/Q={quantity}"] = _result(seconds, "s", "lower")
+    largest = dict(time_steps=max(time_steps_grid), total_shares=max(quantities), method="dp",
+                   **SOLVER_MODELS["dp"], **SOLVER_DEFAULTS)
+    results["solver/peak_memory"] = _result(_peak_memory(lambda: optimal_execution(**largest)), "bytes", "lower")
+    return results
+
+def _feed_stream(manager, seed):
+    # Registered but never started: frames are handed to it directly
+    return manager.add_feed("okx", f"SYNTHETIC-{seed}", url="synthetic://")
+
+def bench_feed(messages=FEED_MESSAGES, seed=0, rounds=ROUNDS):
+    """
+    Book update throughput of the feed, on the code the feed thread runs.
+
+    "apply" decodes and applies JSON frames to the stream's book;
+    "pipeline" also publishes a snapshot after every frame and runs
+    everything hanging off a publish (candles, online models, calibration
+    and an unthrottled cost surface), which is the worst case of one frame
+    per batch.
+
+    Returns:
+    - results: {"feed/apply_rate", "feed/pipeline_rate" (messages/s), "feed/peak_memory"}
+    """
+    frames = list(SyntheticFeed(seed=seed).frames(messages))
+    results = {}
+
+    @_gc_paused
+    def apply(frames):
+        manager = FeedManager(surface_rate=0)
+        stream = _feed_stream(manager, seed)
+        start = time.perf_counter()
+        for frame in frames:
+            manager._apply_frame(stream, time.time(), time.perf_counter_ns(), frame)
+        return time.perf_counter() - start
+
+    @_gc_paused
+    def pipeline(frames):
+        manager = FeedManager(surface_rate=0)
+        stream = _feed_stream(manager, seed)
+        start = time.perf_counter()
+        for frame in frames:
+            recv_time, recv_ns = time.time(), time.perf_counter_ns()
+            if manager._apply_frame(stream, recv_time, recv_ns, frame) and stream.book.valid:
+                manager._publish_book(stream, recv_time, recv_ns)
+        return time.perf_counter() - start
+
+    results["feed/apply_rate"] = _result(messages / min(apply(frames) for _ in range(rounds)),
+                                         "messages/s", "higher")
+    results["feed/pipeline_rate"] = _result(messages / min(pipeline(frames) for _ in range(rounds)),
+                                            "messages/s", "higher")
+    results["feed/peak_memory"] = _result(_peak_memory(lambda: pipeline(frames[:min(messages, 2000)])),
+                                          "bytes", "lower")
+    return results
+
+def _snapshots(count, seed):
+    feed = SyntheticFeed(seed=seed)
+    book = OrderBook(feed.symbol)
+    snapshots = []
+    for message in feed.messages(count):
+        book.apply_message(message)
+        snapshots.append(book.snapshot())
+    return snapshots
+
+@_gc_paused
+def _latencies(calls):
+    """Nanoseconds of every call() in a list of argument-less calls."""
+    elapsed = np.empty(len(calls))
+    for index, call in enumerate(calls):
+        start = time.perf_counter_ns()
+        call()
+        elapsed[index] = time.perf_counter_ns() - start
+    return elapsed
+
+def bench_metrics(calls=METRICS_CALLS, seed=0, rounds=ROUNDS):
+    """
+    Latency percentiles of get_trade_metrics on distinct books, with the depth-walk
+    models ("metrics") and with trained online models ("metrics_models").
+
+    Every call gets a new snapshot, so no ladder is reused from the previous call.
+
+    Returns:
+    - results: {"<benchmark>/p50_us", ..., "metrics/peak_memory"}
+    """
+    snapshots = _snapshots(calls, seed)
+    models = BookModels()
+    for snapshot in snapshots:
+        models.update(snapshot)
+
+    def calls_of(with_models):
+        return [
+            (lambda snapshot=snapshot, quantity=METRICS_QUANTITIES[index % len(METRICS_QUANTITIES)],
+                    side=("buy", "sell")[index % 2]:
+             get_trade_metrics(snapshot, quantity, "Regular", side, models if with_models else None))
+            for index, snapshot in enumerate(snapshots)
+        ]
+
+    results = {}
+    for name, with_models in (("metrics", False), ("metrics_models", True)):
+        percentiles = np.min([np.percentile(_latencies(calls_of(with_models)) / 1e3, LATENCY_PERCENTILES)
+                              for _ in range(rounds)], axis=0)
+        for percentile, value in zip(LATENCY_PERCENTILES, percentiles):
+            results[f"{name}/p{percentile}_us"] = _result(value, "us", "lower")
+    results["metrics/peak_memory"] = _result(_peak_memory(lambda: _latencies(calls_of(True))), "bytes", "lower")
+    return results
+
+def run_suite(quick=False, seed=0):
+    """
+    Runs every benchmark.
+
+    Returns:
+    - report: dict with the run's "environment" and "config" and
+      "results": {benchmark name: {"value", "unit", "better"}}
+    """
+    config = {
+        "seed": seed,
+        "quick": quick,
+        "solver_time_steps": list(QUICK_SOLVER_TIME_STEPS if quick else SOLVER_TIME_STEPS),
+        "solver_quantities": list(QUICK_SOLVER_QUANTITIES if quick else SOLVER_QUANTITIES),
+        "feed_messages": QUICK_FEED_MESSAGES if quick else FEED_MESSAGES,
+        "metrics_calls": QUICK_METRICS_CALLS if quick else METRICS_CALLS,
+    }
+    results = {}
+    results.update(bench_solver(config["solver_time_steps"], config["solver_quantities"]))
+    results.update(bench_feed(config["feed_messages"], seed))
+    results.update(bench_metrics(config["metrics_calls"], seed))
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "config": config,
+        "results": results,
+    }
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Relative change of every benchmark present in both reports.
+
+    Returns:
+    - rows: List of (name, baseline value, current value, change, regressed), where change is
+      positive when the benchmark got worse, whichever direction is better for it
+    """
+    rows = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None or not previous["value"]:
+            continue
+        change = (result["value"] - previous["value"]) / previous["value"]
+        if result["better"] == "higher":
+            change = -change
+        rows.append((name, previous["value"], result["value"], change, change > threshold))
+    return rows
+
+def _format_value(value, unit):
+    if unit == "s":
+        return f"{value * 1e3:.3f} ms"
+    if unit == "bytes":
+        return f"{value / 2 ** 20:.2f} MiB"
+    return f"{value:,.1f} {unit}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline performance benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Run the benchmarks and save the results as JSON")
+    run.add_argument("--output", default="benchmark_results.json", help="JSON file to write")
+    run.add_argument("--quick", action="store_true", help="Smaller workloads")
+    run.add_argument("--seed", type=int, default=0, help="Seed of the synthetic feed")
+    compare = commands.add_parser("compare", help="Flag regressions of one results file against another")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help="Relative change counted as a regression (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_suite(args.quick, args.seed)
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        for name, result in report["results"].items():
+            print(f"{name:<40} {_format_value(result['value'], result['unit']):>20}")
+        print(f"Saved to {args.output}", file=sys.stderr)
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    if baseline["environment"] != current["environment"]:
+        print("Warning: the results come from different environments", file=sys.stderr)
+    if baseline["config"] != current["config"]:
+        print("Warning: the results come from different workloads; only shared benchmarks are compared",
+              file=sys.stderr)
+    rows = compare_results(baseline, current, args.threshold)
+    for name, previous, value, change, regressed in rows:
+        unit = current["results"][name]["unit"]
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:<40} {_format_value(previous, unit):>20} {_format_value(value, unit):>20} "
+              f"{change:>+8.1%} {flag}")
+    regressions = sum(row[4] for row in rows)
+    print(f"{regressions} of {len(rows)} benchmarks regressed by more than {args.threshold:.0%}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+# Headless batch pricing of an order file, without the Streamlit UI.
+#
+# Run with:
+#     python cli.py orders.csv --capture captures/ > results.jsonl
+#     python cli.py orders.jsonl --live --exchange okx --symbol ETH-USDT-SWAP --output results.parquet
+#     python cli.py orders.csv --shared   # book published by python -m data.shared_book
+#
+# Every order is priced with get_trade_metrics against one book and gets an
+# optimal_execution schedule. Only the standard library is imported up front;
+# numpy, the models and the feed are imported once the arguments say they are
+# needed, so a run starts in well under a second.
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from config.settings import FEEDS, WS_URL_TEMPLATE
+
+STARTED_NS = time.perf_counter_ns()
+
+# Order fields besides "quantity" (USD, required) with their types and UI defaults.
+# Any other column, such as an order id, is passed through to the result.
+ORDER_FIELDS = {
+    "side": (str, "buy"),
+    "volatility": (float, 2.5),  # In percent, like the UI slider
+    "fee_tier": (str, "Regular"),
+    "time_steps": (int, 50),
+    "risk_aversion": (float, 0.001),
+    "alpha": (float, 1.0),
+    "beta": (float, 1.0),
+    "gamma": (float, 0.05),
+    "eta": (float, 0.05),
+}
+
+# Computed result columns besides the order fields, with their Parquet types ("float" or "trajectory")
+RESULT_FIELDS = {
+    "slippage": "float",
+    "fees": "float",
+    "market_impact": "float",
+    "net_cost": "float",
+    "maker_taker_ratio": "float",
+    "latency": "float",
+    "expected_cost": "float",
+    "variance": "float",
+    "objective": "float",
+    "optimal_trajectory": "trajectory",
+}
+
+# Rows buffered per Parquet row group
+PARQUET_BATCH_ROWS = 1024
+
+# Seconds to wait for the first live book
+LIVE_BOOK_TIMEOUT = 30
+
+def parse_order(raw):
+    """
+    Typed order from a CSV row or JSON object; missing or empty fields get ORDER_FIELDS defaults.
+
+    Raises:
+    - ValueError: No quantity, an unparsable field or an unknown side
+    """
+    order = {key: value for key, value in raw.items() if value not in (None, "")}
+    if "quantity" not in order:
+        raise ValueError(f"Order without quantity: {raw}")
+    order["quantity"] = float(order["quantity"])
+    for field, (kind, default) in ORDER_FIELDS.items():
+        order[field] = kind(order.get(field, default))
+    if order["side"] not in ("buy", "sell"):
+        raise ValueError(f"Unknown side {order['side']!r}")
+    return order
+
+def read_orders(path, file_format=None):
+    """
+    Yields the orders of a CSV or JSON lines file ("-" reads stdin).
+
+    Parameters:
+    - file_format: "csv" or "jsonl" (default: from the file extension, jsonl for stdin)
+    """
+    if file_format is None:
+        file_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+    with (open(path, newline="") if path != "-" else sys.stdin) as lines:
+        if file_format == "csv":
+            rows = csv.DictReader(lines)
+        else:
+            rows = (json.loads(line) for line in lines if line.strip())
+        for row in rows:
+            yield parse_order(row)
+
+def recorded_book(source, exchange, symbol, at=None):
+    """
+    Book of an instrument rebuilt from a tick capture.
+
+    Parameters:
+    - at: Epoch seconds; the book as it was received at that time (default: the last one)
+
+    Returns:
+    - snapshot: BookSnapshot, or None when the capture holds no book up to `at`
+    """
+    from data.orderbook import ChecksumError, OrderBook, SequenceGapError
+    from data.tick_capture import load_capture, record_to_message
+
+    records = load_capture(source, exchange, symbol)
+    if at is not None:
+        records = records[records["recv_time"] <= at]
+    book = OrderBook(symbol)
+    for record in records:
+        try:
+            book.apply_message(record_to_message(record))
+        except (SequenceGapError, ChecksumError):
+            pass  # Invalid until the next snapshot record
+    return book.snapshot() if book.version and book.valid else None
+
+def live_book(exchange, symbol, url_template=None, timeout=LIVE_BOOK_TIMEOUT):
+    """
+    First book of an instrument from the exchange feed.
+
+    Only this instrument is subscribed, instead of every configured feed.
+    """
+    from data.feed_manager import FeedManager
+
+    manager = FeedManager(url_template=url_template or WS_URL_TEMPLATE)
+    store = manager.add_feed(exchange, symbol).store
+    manager.start()
+    _, snapshot = store.wait_for_change(0, timeout)
+    return snapshot
+
+def shared_book(exchange, symbol):
+    """
+    Current book of an instrument published to shared memory by another process.
+
+    Returns:
+    - snapshot: BookSnapshot copied out of the segment, or None before its first book
+    """
+    from data.shared_book import SharedBookReader, shared_book_name
+
+    reader = SharedBookReader(shared_book_name(exchange, symbol))
+    try:
+        return reader.get()[1]
+    finally:
+        reader.close()
+
+# Book shared by the workers, set once per worker process by _init_worker
+_shared = {}
+
+def _init_worker(book):
+    _shared["book"] = book
+
+def price_order(order):
+    """Trade metrics and optimal execution schedule of one order against the worker's book."""
+    from models.trade_metrics import get_trade_metrics
+    from utils.almgren_chriss import trajectory_cost, trajectory_objective
+    from utils.execution_cache import cached_optimal_execution
+
+    model = {key: order[key] for key in ("risk_aversion", "alpha", "beta", "gamma", "eta")}
+    volatility = order["volatility"] / 100.0  # Convert % to decimal
+    result = dict(order)
+    result.update(get_trade_metrics(_shared["book"], order["quantity"], order["fee_tier"], order["side"]))
+    _, _, inventory_path, optimal_trajectory = cached_optimal_execution(
+        time_steps=order["time_steps"], total_shares=int(order["quantity"]), volatility=volatility, **model)
+    expected_cost, variance = trajectory_cost(inventory_path, volatility=volatility, **model)
+    result["expected_cost"], result["variance"] = float(expected_cost), float(variance)
+    result["objective"] = trajectory_objective(inventory_path, volatility=volatility, **model)
+    result["optimal_trajectory"] = [int(shares) for shares in optimal_trajectory]
+    return result
+
+def price_orders(orders, book, processes=None, chunksize=16):
+    """
+    Prices orders over a process pool and yields the results in input order as they finish.
+
+    Parameters:
+    - orders: Iterable of parse_order() dicts
+    - book: BookSnapshot every order is priced against (None uses the flat models)
+    - processes: Worker processes (default: CPU count); 1 prices in this process
+    """
+    orders = list(orders)
+    processes = min(processes or os.cpu_count() or 1, max(len(orders), 1))
+    if processes <= 1:
+        _init_worker(book)
+        for order in orders:
+            yield price_order(order)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    from utils.execution_sweep import _pool_context
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=_pool_context(), initializer=_init_worker,
+                             initargs=(book,)) as pool:
+        yield from pool.map(price_order, orders, chunksize=chunksize)
+
+def write_jsonl(results, stream=sys.stdout):
+    """Writes every result as one JSON line as soon as it arrives."""
+    for result in results:
+        stream.write(json.dumps(result) + "\n")
+        stream.flush()
+        yield result
+
+def result_schema(orders):
+    """
+    Parquet schema of the results of pricing `orders`.
+
+    Order and result fields have fixed types. Pass-through columns are typed
+    from their values in all orders, so a column that is missing or holds
+    integers in the first rows still fits the later ones; a column whose
+    values do not share a type is written as strings.
+    """
+    import pyarrow as pa
+
+    types = {str: pa.string(), int: pa.int64(), float: pa.float64(), "float": pa.float64(),
+             "trajectory": pa.list_(pa.int64())}
+    fields = {"quantity": pa.float64()}
+    fields.update((field, types[kind]) for field, (kind, _) in ORDER_FIELDS.items())
+    for column in dict.fromkeys(key for order in orders for key in order if key not in fields):
+        try:
+            kind = pa.array([order.get(column) for order in orders]).type
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            kind = pa.string()
+        fields[column] = pa.string() if pa.types.is_null(kind) else kind
+    fields.update((field, types[kind]) for field, kind in RESULT_FIELDS.items())
+    return pa.schema(list(fields.items()))
+
+def _with_text(result, columns):
+    # A copy, since the result has already been handed on
+    text = {column: str(result[column]) for column in columns
+            if result.get(column) is not None and not isinstance(result[column], str)}
+    return dict(result, **text) if text else result
+
+def write_parquet(results, path, schema, batch_rows=PARQUET_BATCH_ROWS):
+    """
+    Writes results to a Parquet file, one row group per batch_rows results.
+
+    Parameters:
+    - schema: Schema of every row group, see result_schema; values of string
+      columns that are not strings are written as their str()
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = pq.ParquetWriter(path, schema)
+    text_columns = [field.name for field in schema if pa.types.is_string(field.type)]
+    batch = []
+
+    def flush():
+        rows = [_with_text(row, text_columns) for row in batch]
+        writer.write_table(pa.Table.from_pylist(rows, schema))
+        batch.clear()
+
+    try:
+        for result in results:
+            batch.append(result)
+            if len(batch) >= batch_rows:
+                flush()
+            yield result
+        if batch:
+            flush()
+    finally:
+        writer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Price a file of orders against a live or recorded book")
+    parser.add_argument("orders", help="CSV or JSON lines file of orders, - for stdin")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Order file format (default: from extension)")
+    book_source = parser.add_mutually_exclusive_group(required=True)
+    book_source.add_argument("--live", action="store_true", help="Price against the current exchange book")
+    book_source.add_argument("--capture", help="Price against a book from this capture directory or file")
+    book_source.add_argument("--shared", action="store_true", help="Price against the book another process "
+                             "publishes to shared memory")
+    parser.add_argument("--at", type=float, help="Epoch seconds of the recorded book (default: last)")
+    parser.add_argument("--exchange", default=FEEDS[0]["exchange"])
+    parser.add_argument("--symbol", default=FEEDS[0]["symbol"])
+    parser.add_argument("--output", help="Parquet file to write (default: JSON lines on stdout)")
+    parser.add_argument("--processes", type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    orders = list(read_orders(args.orders, args.format))
+    if args.live:
+        book = live_book(args.exchange, args.symbol)
+    elif args.shared:
+        book = shared_book(args.exchange, args.symbol)
+    else:
+        book = recorded_book(args.capture, args.exchange, args.symbol, args.at)
+    if book is None:
+        parser.exit(1, f"No {args.exchange}/{args.symbol} book available\n")
+
+    results = price_orders(orders, book, args.processes)
+    if args.output:
+        results = write_parquet(results, args.output, result_schema(orders))
+    else:
+        results = write_jsonl(results)
+
+    first_result_ns = None
+    count = 0
+    for _ in results:
+        if first_result_ns is None:
+            first_result_ns = time.perf_counter_ns()
+        count += 1
+
+    elapsed = (time.perf_counter_ns() - STARTED_NS) / 1e9
+    report = f"Priced {count} orders in {elapsed:.3f} s ({count / elapsed:.1f} orders/s)"
+    if first_result_ns is not None:
+        report += f", first result after {(first_result_ns - STARTED_NS) / 1e6:.1f} ms"
+    print(report, file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
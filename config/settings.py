@@ -1 +1,39 @@
-WS_URL = "wss://ws.gomarket-cpp.goquant.io/ws/l2-orderbook/okx/BTC-USDT-SWAP"
+# Order book stream of one instrument; {exchange} and {symbol} are filled in per feed
+WS_URL_TEMPLATE = "wss://ws.gomarket-cpp.goquant.io/ws/l2-orderbook/{exchange}/{symbol}"
+WS_URL = WS_URL_TEMPLATE.format(exchange="okx", symbol="BTC-USDT-SWAP")
+
+# Instruments subscribed at startup, all multiplexed on one event loop.
+# The first entry is the default book of the UI.
+FEEDS = [
+    {"exchange": "okx", "symbol": "BTC-USDT-SWAP"},
+    {"exchange": "okx", "symbol": "ETH-USDT-SWAP"},
+    {"exchange": "okx", "symbol": "SOL-USDT-SWAP"},
+]
+
+# Raw frames buffered per feed before the oldest are dropped
+FEED_QUEUE_SIZE = 64
+
+# Directory to capture every applied book message to (None disables capture)
+CAPTURE_DIR = None
+CAPTURE_RECORDS_PER_FILE = 65536
+
+# Directory of a capture to replay instead of connecting to the exchange
+# (None uses the live feed); REPLAY_SPEED 0 replays as fast as possible
+REPLAY_DIR = None
+REPLAY_SPEED = 1.0
+
+# Base URL of a running headless service (uvicorn server:app); when set the
+# Streamlit UI is a thin client of it instead of running its own feed
+API_URL = None
+
+# Solve common "Simulate Trade" slider positions in the background at startup
+PREWARM_EXECUTION_CACHE = False
+
+# Order sizes in USD of the live cost surface, priced on both sides of every
+# book, and the most surfaces computed per second per instrument
+COST_SURFACE_SIZES = (100.0, 500.0, 1000.0, 5000.0, 10000.0, 50000.0, 100000.0)
+COST_SURFACE_MAX_RATE = 4.0
+
+# Publish every feed's book to shared memory (data.shared_book), so other
+# processes on this host can read it without their own websocket
+SHARED_BOOKS = False
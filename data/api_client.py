@@ -0,0 +1,96 @@
+import numpy as np
+import requests
+
+from data.orderbook import BookSnapshot
+
+def _levels(levels):
+    array = np.asarray(levels, dtype="float64").reshape(-1, 2)
+    prices, sizes = array[:, 0].copy(), array[:, 1].copy()
+    prices.flags.writeable = False
+    sizes.flags.writeable = False
+    return prices, sizes
+
+def _number(value):
+    return np.nan if value is None else value
+
+class ApiClient:
+    """
+    Thin client of the headless service (server.py).
+
+    Mirrors the calls the UI makes against the in-process feed and solver,
+    so a dashboard can render books and simulations computed once by the
+    service for every client.
+    """
+
+    def __init__(self, url, timeout=5):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def _get(self, path, **params):
+        response = self._session.get(self.url + path, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self):
+        """FeedManager.stats() of the service."""
+        return self._get("/feeds")
+
+    def feeds(self):
+        """Subscribed (exchange, symbol) pairs."""
+        return [(feed["exchange"], feed["symbol"]) for feed in self.stats()]
+
+    def exchanges(self):
+        return list(dict.fromkeys(exchange for exchange, _ in self.feeds()))
+
+    def symbols(self, exchange):
+        return [symbol for venue, symbol in self.feeds() if venue == exchange]
+
+    def book(self, exchange, symbol, depth=20):
+        """
+        Returns:
+        - (version, snapshot): As SnapshotStore.get(); snapshot is None before the first book
+        """
+        book = self._get("/book", exchange=exchange, symbol=symbol, depth=depth)
+        if "bids" not in book:
+            return book["version"], None
+        bid_prices, bid_sizes = _levels(book["bids"])
+        ask_prices, ask_sizes = _levels(book["asks"])
+        snapshot = BookSnapshot(
+            symbol=book["symbol"], timestamp=book["timestamp"], seq=book["seq"], version=book["version"],
+            valid=book["valid"], bid_prices=bid_prices, bid_sizes=bid_sizes, ask_prices=ask_prices,
+            ask_sizes=ask_sizes, best_bid=_number(book["best_bid"]), best_ask=_number(book["best_ask"]),
+            mid_price=_number(book["mid_price"]), spread=_number(book["spread"]),
+        )
+        return book["version"], snapshot
+
+    def trade_metrics(self, exchange, symbol, quantity, fee_tier, side="buy"):
+        """get_trade_metrics computed by the service against its latest book."""
+        return self._get("/metrics", exchange=exchange, symbol=symbol, quantity=quantity, fee_tier=fee_tier,
+                         side=side)
+
+    def costs(self, exchange, symbol):
+        """Latest cost surface of an instrument, as data.cost_surface.surface_to_dict()."""
+        return self._get("/costs", exchange=exchange, symbol=symbol)
+
+    def calibration(self, exchange, symbol):
+        """MarketCalibration.execution_params() of an instrument on the service."""
+        stats = self._get("/calibration", exchange=exchange, symbol=symbol)
+        return {key: stats[key] for key in ("volatility", "alpha", "beta", "gamma", "eta") if key in stats}
+
+    def simulate(self, distribution=False, **params):
+        """
+        optimal_execution through the service's shared solver cache.
+
+        Returns:
+        - result: (None, None, inventory_path, optimal_trajectory) like optimal_execution;
+          the value function and moves stay on the server
+        - cost_distribution: execution_cost_distribution() stats, or None
+        """
+        response = self._session.post(self.url + "/simulate", json=dict(params, distribution=distribution),
+                                      timeout=self.timeout)
+        response.raise_for_status()
+        body = response.json()
+        inventory_path = np.asarray(body["inventory_path"])[:, None]
+        result = (None, None, inventory_path, np.asarray(body["optimal_trajectory"]))
+        return result, body.get("cost_distribution")
@@ -0,0 +1,112 @@
+import asyncio
+import math
+
+# Levels per side sent to API and push clients
+DEFAULT_PUSH_DEPTH = 20
+
+SCALAR_FIELDS = ("symbol", "timestamp", "seq", "valid", "best_bid", "best_ask", "mid_price", "spread")
+
+def _json_value(value):
+    """Plain Python value with nan/inf as None, since JSON has no representation for them."""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+def snapshot_to_dict(version, snapshot, depth=DEFAULT_PUSH_DEPTH):
+    """
+    JSON-ready view of a BookSnapshot.
+
+    Returns:
+    - book: dict with "version", the scalar fields and best-first "bids" / "asks" as [[price, size], ...]
+    """
+    book = {"version": version}
+    if snapshot is None:
+        return book
+    for field in SCALAR_FIELDS:
+        book[field] = _json_value(getattr(snapshot, field))
+    book["bids"] = [list(level) for level in zip(snapshot.bid_prices[:depth].tolist(),
+                                                 snapshot.bid_sizes[:depth].tolist())]
+    book["asks"] = [list(level) for level in zip(snapshot.ask_prices[:depth].tolist(),
+                                                 snapshot.ask_sizes[:depth].tolist())]
+    return book
+
+def _level_changes(previous, current):
+    """[[price, size], ...] of levels added or resized, plus [price, 0] for removed ones."""
+    before = dict(map(tuple, previous))
+    after = dict(map(tuple, current))
+    changes = [[price, size] for price, size in current if before.get(price) != size]
+    changes += [[price, 0.0] for price in before if price not in after]
+    return changes
+
+def diff_books(previous, current):
+    """
+    Only what changed between two snapshot_to_dict() results.
+
+    Returns:
+    - diff: dict with "version", every scalar field whose value changed and,
+      when levels changed, "bids" / "asks" lists of [price, size] updates
+      where size 0 removes the level (the same convention as exchange deltas)
+    """
+    diff = {"version": current["version"]}
+    for field in SCALAR_FIELDS:
+        if field in current and previous.get(field) != current[field]:
+            diff[field] = current[field]
+    for side in ("bids", "asks"):
+        changes = _level_changes(previous.get(side, []), current.get(side, []))
+        if changes:
+            diff[side] = changes
+    return diff
+
+class BookBroadcaster:
+    """
+    Fans the snapshots of one SnapshotStore out to any number of asyncio clients.
+
+    The feed thread only wakes the broadcaster's event loop. The JSON view of
+    a version, and the diff between two versions, are built once and shared
+    by every client, so the cost per publish does not grow with clients.
+    """
+
+    def __init__(self, store, loop, depth=DEFAULT_PUSH_DEPTH):
+        self.store = store
+        self.depth = depth
+        self._loop = loop
+        self._changed = asyncio.Event()
+        self._state = (None, None)
+        self._diff = (None, None, None)
+        self._unsubscribe = store.subscribe(self._on_publish)
+
+    def _on_publish(self, version, snapshot):
+        # Called on the feed thread
+        self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def close(self):
+        self._unsubscribe()
+
+    def state(self):
+        """snapshot_to_dict() of the current version, built once per version."""
+        version, snapshot = self.store.get()
+        cached_version, state = self._state
+        if cached_version != version:
+            state = snapshot_to_dict(version, snapshot, self.depth)
+            self._state = (version, state)
+        return state
+
+    def diff_since(self, previous):
+        """diff_books(previous, state()), shared by every client coming from the same version."""
+        current = self.state()
+        from_version, to_version, diff = self._diff
+        if (from_version, to_version) != (previous["version"], current["version"]):
+            diff = diff_books(previous, current)
+            self._diff = (previous["version"], current["version"], diff)
+        return current, diff
+
+    async def wait_for_change(self, version):
+        """Returns once the store holds a version other than `version`."""
+        while self.store.version == version:
+            await self._changed.wait()
@@ -0,0 +1,134 @@
+import time
+
+import numpy as np
+
+# Candle resolutions in seconds and how many candles of each are kept
+# (one hour of 1s, one day of 1m, one week of 5m, thirty days of 1h)
+RESOLUTIONS = (1, 60, 300, 3600)
+CAPACITIES = (3600, 1440, 2016, 720)
+
+RESOLUTION_LABELS = {1: "1s", 60: "1m", 300: "5m", 3600: "1h"}
+
+FIELDS = ("time", "open", "high", "low", "close")
+
+class CandleSeries:
+    """
+    Preallocated ring buffer of OHLC candles at one resolution.
+
+    Every candle is written twice, at slot and slot + capacity, so the
+    newest n candles are always one contiguous slice and view() can hand
+    out arrays without copying.
+    """
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.data = np.full((len(FIELDS), 2 * capacity), np.nan)
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def _write(self, index, values):
+        slot = index % self.capacity
+        self.data[:, slot] = values
+        self.data[:, slot + self.capacity] = values
+
+    def last(self):
+        """Newest candle as (time, open, high, low, close), or None when empty."""
+        if not self.count:
+            return None
+        return tuple(self.data[:, (self.count - 1) % self.capacity])
+
+    def fold(self, start, open_, high, low, close):
+        """
+        Merges a candle (or a single price) starting at `start` into this series.
+
+        A candle inside the newest bucket extends it; a later one opens a new
+        bucket. Folding the same candle again leaves the series unchanged, so
+        a coarser series can be refreshed from a finer one's live candle.
+        """
+        bucket = start - start % self.resolution
+        last = self.last()
+        if last is not None and bucket <= last[0]:
+            if bucket == last[0]:
+                self._write(self.count - 1, (bucket, last[1], max(last[2], high), min(last[3], low), close))
+            return
+        self._write(self.count, (bucket, open_, high, low, close))
+        self.count += 1
+
+    def view(self, count=None):
+        """
+        Read-only views of the newest `count` candles (default: all kept), oldest first.
+
+        Returns:
+        - candles: dict of "time" (bucket start, epoch seconds), "open", "high", "low", "close"
+        """
+        size = len(self) if count is None else min(count, len(self))
+        start = (self.count - size) % self.capacity if size else 0
+        window = self.data[:, start:start + size]
+        window.flags.writeable = False
+        return dict(zip(FIELDS, window))
+
+def downsample(candles, max_points):
+    """
+    Merges runs of consecutive candles so at most max_points remain.
+
+    Groups are aligned to the newest candle, so only the oldest group may
+    be partial. A chart gains nothing from more candles than it has pixels
+    for them.
+
+    Returns:
+    - candles: The input views when already small enough, otherwise new arrays
+    """
+    size = len(candles["time"])
+    if size <= max_points:
+        return candles
+    group = -(-size // max_points)
+    starts = np.arange(size % group or group, size, group)
+    starts = np.concatenate(([0], starts)) if starts[0] else starts
+    ends = np.append(starts[1:], size) - 1
+    return {
+        "time": candles["time"][starts],
+        "open": candles["open"][starts],
+        "high": np.maximum.reduceat(candles["high"], starts),
+        "low": np.minimum.reduceat(candles["low"], starts),
+        "close": candles["close"][ends],
+    }
+
+class CandleAggregator:
+    """
+    Streaming OHLC candles of a price at several resolutions.
+
+    Each price updates the finest series; every coarser series is then
+    rolled up from the live candle of the next finer one, so the work per
+    price is constant and nothing is ever recomputed from history.
+    """
+
+    def __init__(self, resolutions=RESOLUTIONS, capacities=CAPACITIES):
+        self.series = {resolution: CandleSeries(resolution, capacity)
+                       for resolution, capacity in zip(resolutions, capacities)}
+        self._chain = [self.series[resolution] for resolution in sorted(self.series)]
+
+    def update(self, price, timestamp=None):
+        """Adds a price observed at `timestamp` (epoch seconds, default now); nan prices are ignored."""
+        if not np.isfinite(price):
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        self._chain[0].fold(timestamp, price, price, price, price)
+        for finer, coarser in zip(self._chain, self._chain[1:]):
+            coarser.fold(*finer.last())
+
+    def on_snapshot(self, version, snapshot):
+        """SnapshotStore subscriber: adds the mid price of every published book."""
+        self.update(snapshot.mid_price)
+
+    def candles(self, resolution, count=None):
+        """Zero-copy views of the newest candles at one resolution, see CandleSeries.view."""
+        return self.series[resolution].view(count)
+
+    def candles_since(self, resolution, start):
+        """Views of the candles whose bucket starts at or after `start`, including the live one."""
+        candles = self.series[resolution].view()
+        first = int(np.searchsorted(candles["time"], start))
+        return {field: values[first:] for field, values in candles.items()}
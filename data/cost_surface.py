@@ -0,0 +1,140 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from models.depth_walk import DepthLadder
+from models.fee_model import estimate_fees
+from models.impact_model import estimate_market_impact
+from models.slippage_model import estimate_slippage
+
+# Order sizes in USD priced on both sides of every book
+DEFAULT_SURFACE_SIZES = (100.0, 500.0, 1000.0, 5000.0, 10000.0, 50000.0, 100000.0)
+
+# Most surfaces computed per second; books in between are folded into the next one
+DEFAULT_SURFACE_RATE = 4.0
+
+SIDES = ("buy", "sell")
+
+# Immutable cost surface of one book. Cost arrays are in USD, read-only and
+# indexed like `sizes`; the dicts are keyed by side. `recomputed` counts the
+# (side, size) cells that were actually repriced for this book.
+CostSurfaceSnapshot = namedtuple("CostSurfaceSnapshot", [
+    "book_version", "timestamp", "computed_at", "fee_tier", "sizes",
+    "slippage", "market_impact", "fees", "net_cost", "recomputed",
+])
+
+def _frozen(array):
+    array = np.array(array, dtype="float64")
+    array.flags.writeable = False
+    return array
+
+class CostSurface:
+    """
+    Expected slippage, fees and market impact of a fixed ladder of order sizes on both sides.
+
+    Recomputed from every published book, at most `max_rate` times per
+    second, and published to its own SnapshotStore so readers only look
+    the latest surface up. Between two books only the levels from the
+    first changed one down are re-summed, and only sizes that reach those
+    levels are repriced, unless the touch moved, which shifts every cost.
+    """
+
+    def __init__(self, store, sizes=DEFAULT_SURFACE_SIZES, max_rate=DEFAULT_SURFACE_RATE, fee_tier="Regular"):
+        self.store = store
+        self.sizes = _frozen(sizes)
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.fee_tier = fee_tier
+        self.fees = _frozen(estimate_fees(self.sizes, fee_tier))
+        self._ladders = {side: DepthLadder([], []) for side in SIDES}
+        self._costs = {side: (np.full(len(self.sizes), np.nan), np.full(len(self.sizes), np.nan)) for side in SIDES}
+        self._touch = (np.nan, np.nan)
+        self._computed_at = None
+        self._pending = None
+
+    def update(self, version, snapshot):
+        """
+        Reprices the surface for a new book, or holds the book back when the last surface is too recent.
+
+        Returns:
+        - delay: Seconds until flush() should compute a held-back book, when this call started holding one
+        """
+        now = time.monotonic()
+        if self._computed_at is not None and now - self._computed_at < self.min_interval:
+            newly_pending = self._pending is None
+            self._pending = (version, snapshot)
+            return self._computed_at + self.min_interval - now if newly_pending else None
+        self._pending = None
+        self._compute(version, snapshot, now)
+        return None
+
+    def flush(self):
+        """Computes the book held back by update(), if any."""
+        if self._pending is not None:
+            version, snapshot = self._pending
+            self._pending = None
+            self._compute(version, snapshot, time.monotonic())
+
+    def _compute(self, version, snapshot, now):
+        self._computed_at = now
+        if not (len(snapshot.bid_prices) and len(snapshot.ask_prices)):
+            return
+        touch = (snapshot.best_bid, snapshot.best_ask)
+        touch_moved = touch != self._touch
+        self._touch = touch
+        mid_price = snapshot.mid_price
+
+        levels = {"buy": (snapshot.ask_prices, snapshot.ask_sizes), "sell": (snapshot.bid_prices, snapshot.bid_sizes)}
+        recomputed = 0
+        for side in SIDES:
+            previous = self._ladders[side]
+            ladder, first_changed = previous.updated(*levels[side])
+            self._ladders[side] = ladder
+            slippage, impact = (values.copy() for values in self._costs[side])
+            if touch_moved:
+                stale = np.ones(len(self.sizes), dtype=bool)
+            else:
+                # A size is unaffected when its walk ends above the first changed level. One that ran
+                # out of depth also priced its rest at the worst level, which levels added behind it change.
+                if len(previous):
+                    stale = previous.deepest_level(self.sizes) >= first_changed
+                    if first_changed < len(ladder):
+                        stale |= self.sizes > previous.total_notional
+                else:
+                    stale = np.ones(len(self.sizes), dtype=bool)
+            if stale.any():
+                opposite_best = touch[0] if side == "buy" else touch[1]
+                quantities = self.sizes[stale]
+                slippage[stale] = estimate_slippage(quantities, ladder, mid_price, side)
+                impact[stale] = estimate_market_impact(quantities, ladder, mid_price, opposite_best)
+                recomputed += int(stale.sum())
+            slippage.flags.writeable = impact.flags.writeable = False
+            self._costs[side] = (slippage, impact)
+
+        slippage = {side: self._costs[side][0] for side in SIDES}
+        impact = {side: self._costs[side][1] for side in SIDES}
+        self.store.publish(CostSurfaceSnapshot(
+            book_version=version, timestamp=snapshot.timestamp, computed_at=time.time(), fee_tier=self.fee_tier,
+            sizes=self.sizes, slippage=slippage, market_impact=impact,
+            fees={side: self.fees for side in SIDES},
+            net_cost={side: _frozen(slippage[side] + self.fees + impact[side]) for side in SIDES},
+            recomputed=recomputed,
+        ))
+
+def surface_to_dict(version, surface):
+    """
+    JSON-ready view of a CostSurfaceSnapshot.
+
+    Returns:
+    - surface: dict with "version" and, once computed, the scalar fields, "sizes" and
+      per side {"slippage", "market_impact", "fees", "net_cost"} lists
+    """
+    result = {"version": version}
+    if surface is None:
+        return result
+    result.update(book_version=surface.book_version, timestamp=surface.timestamp, computed_at=surface.computed_at,
+                  fee_tier=surface.fee_tier, sizes=surface.sizes.tolist(), recomputed=surface.recomputed)
+    for side in SIDES:
+        result[side] = {field: getattr(surface, field)[side].tolist()
+                        for field in ("slippage", "market_impact", "fees", "net_cost")}
+    return result
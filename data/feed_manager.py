@@ -0,0 +1,509 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+import websockets
+
+from data.candles import CandleAggregator
+from data.cost_surface import DEFAULT_SURFACE_RATE, DEFAULT_SURFACE_SIZES, CostSurface
+from data.orderbook import OrderBook, SequenceGapError, ChecksumError
+from models.book_models import BookModels
+from models.calibration import MarketCalibration
+from utils.latency_tracker import latency_tracker
+from utils.logger import log_event, logger
+
+# orjson decodes feed frames several times faster than the standard library
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Frames buffered per stream; when the consumer falls behind, queued deltas are merged (see FeedStream.push)
+DEFAULT_QUEUE_SIZE = 64
+
+# Reconnect backoff per stream in seconds, doubled after every failed attempt
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 30
+
+# Weight of the newest interval in the moving average behind FeedStream.publish_rate
+PUBLISH_RATE_SMOOTHING = 0.1
+
+REQUIRED_FIELDS = ("timestamp", "exchange", "symbol", "asks", "bids")
+
+class SnapshotStore:
+    """
+    Holds the latest immutable snapshot together with a monotonically increasing version.
+
+    The writer swaps a single (version, snapshot) tuple reference, which is
+    atomic, so readers never take a lock and never see a version paired with
+    the wrong snapshot. Only waiters use the condition variable.
+    """
+
+    def __init__(self):
+        self._current = (0, None)
+        self._changed = threading.Condition()
+        self._subscribers = []
+
+    def publish(self, snapshot):
+        """Makes snapshot current under the next version and notifies waiters and subscribers."""
+        version = self._current[0] + 1
+        self._current = (version, snapshot)
+        with self._changed:
+            self._changed.notify_all()
+        for callback in list(self._subscribers):
+            # One failing subscriber must neither stop the others nor the feed that publishes
+            try:
+                callback(version, snapshot)
+            except Exception as e:
+                log_event(logger, logging.ERROR, "Snapshot subscriber failed",
+                          subscriber=getattr(callback, "__qualname__", repr(callback)), error=repr(e))
+        return version
+
+    def get(self):
+        """Current (version, snapshot); version 0 means nothing was published yet."""
+        return self._current
+
+    def latest(self):
+        return self._current[1]
+
+    @property
+    def version(self):
+        return self._current[0]
+
+    def changed_since(self, version):
+        """Cheap check whether a newer snapshot than `version` was published."""
+        return self._current[0] != version
+
+    def wait_for_change(self, version, timeout=None):
+        """
+        Blocks until a snapshot newer than `version` is published or timeout expires.
+
+        Returns:
+        - (version, snapshot): The current pair, unchanged on timeout
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._current[0] != version, timeout)
+        return self._current
+
+    def subscribe(self, callback):
+        """
+        Calls callback(version, snapshot) from the feed thread on every publish.
+
+        Returns:
+        - unsubscribe: Function removing the callback again
+        """
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+def _decode_frame(frame):
+    # Replay sources hand over messages already decoded
+    return frame if isinstance(frame, dict) else _loads(frame)
+
+def _merge_deltas(messages):
+    """
+    Combines chained delta messages into one delta leaving the book in the same state.
+
+    The newest level of every price wins, and its price and size strings
+    are kept, so the checksum of the last message still applies.
+    """
+    merged = dict(messages[-1])
+    if "prevSeqId" in messages[0]:
+        merged["prevSeqId"] = messages[0]["prevSeqId"]
+    for side in ("bids", "asks"):
+        levels = {}
+        for message in messages:
+            for level in message.get(side, []):
+                levels[float(level[0])] = level
+        merged[side] = list(levels.values())
+    return merged
+
+def _follows(previous, message):
+    prev_seq, seq = message.get("prevSeqId"), previous.get("seqId")
+    return prev_seq is None or seq is None or prev_seq == seq
+
+def _compact_frames(frames):
+    """
+    Shortens a full frame queue without losing book state.
+
+    Frames before the last snapshot are superseded by it and dropped, and
+    each run of deltas chained by seqId/prevSeqId is merged into one; a
+    delta that does not follow its predecessor is kept apart, so the gap is
+    still detected. Frames that are not book messages are dropped too.
+
+    Parameters:
+    - frames: Queued (recv_time, recv_ns, frame) tuples, oldest first
+
+    Returns:
+    - frames: The compacted tuples; a merged delta keeps the receive times of its oldest frame
+    - dropped: Number of frames dropped
+    """
+    decoded = []
+    for recv_time, recv_ns, frame in frames:
+        try:
+            message = _decode_frame(frame)
+        except Exception:
+            continue
+        if isinstance(message, dict) and all(k in message for k in REQUIRED_FIELDS):
+            decoded.append((recv_time, recv_ns, message))
+    start = max((index for index, (_, _, message) in enumerate(decoded) if message.get("action") != "update"),
+                default=0)
+    dropped = len(frames) - len(decoded) + start
+
+    compacted, run = [], []
+    for entry in decoded[start:]:
+        message = entry[2]
+        is_delta = message.get("action") == "update"
+        if run and not (is_delta and _follows(run[-1][2], message)):
+            compacted.append(run[0][:2] + (_merge_deltas([frame for _, _, frame in run]),))
+            run = []
+        if is_delta:
+            run.append(entry)
+        else:
+            compacted.append(entry)
+    if run:
+        compacted.append(run[0][:2] + (_merge_deltas([frame for _, _, frame in run]),))
+    return compacted, dropped
+
+class FeedStream:
+    """
+    One websocket subscription with its own book, snapshot store and frame queue.
+
+    Frames are queued raw by the receiver and decoded by the consumer. A
+    stream reads either its websocket url or, when given, `source`: a
+    function returning an async iterator of frames, such as a tick replay.
+    The queue is bounded: when it fills up, frames superseded by a later
+    snapshot are dropped and pending deltas are merged, and whatever is queued when the consumer wakes up is applied in one batch and
+    published as a single snapshot, whose mid price also feeds the stream's
+    candles, trains the stream's online cost models, updates its
+    calibration of the execution model and reprices its cost surface.
+    """
+
+    def __init__(self, exchange, symbol, url, queue_size=DEFAULT_QUEUE_SIZE, source=None,
+                 surface_sizes=DEFAULT_SURFACE_SIZES, surface_rate=DEFAULT_SURFACE_RATE):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.url = url
+        self.source = source
+        self.book = OrderBook(symbol)
+        self.store = SnapshotStore()
+        self.candles = CandleAggregator()
+        self.models = BookModels()
+        self.calibration = MarketCalibration()
+        self.costs_store = SnapshotStore()
+        self.costs = CostSurface(self.costs_store, surface_sizes, surface_rate)
+        self.frames = deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.latest_message = None
+        # (version, perf_counter_ns receive time of its newest frame) of the last publish
+        self.last_publish = (0, None)
+        self._last_publish_time = None
+        self._publish_interval = None
+        self.connected = False
+        self.received = 0
+        self.applied = 0
+        self.dropped = 0
+        self.reconnects = 0
+        # Set when the book falls out of sync; the receiver then subscribes again for a new snapshot
+        self.resync = False
+        self.resubscribes = 0
+        self.tasks = []
+
+    @property
+    def name(self):
+        return f"{self.exchange}/{self.symbol}"
+
+    def push(self, frame):
+        """
+        Queues a raw frame with its receive times.
+
+        A full queue is compacted first (see _compact_frames), so a delta is
+        never lost to backpressure, which would break the sequence and force
+        a resubscribe. Only if it is still full is the oldest frame dropped.
+        """
+        if len(self.frames) == self.frames.maxlen:
+            frames, dropped = _compact_frames(self.frames)
+            self.frames.clear()
+            self.frames.extend(frames)
+            self.dropped += dropped
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+        self.frames.append((time.time(), time.perf_counter_ns(), frame))
+        self.received += 1
+        self.ready.set()
+
+    def record_publish(self):
+        """Updates the moving average of the time between publishes."""
+        now = time.monotonic()
+        if self._last_publish_time is not None:
+            interval = now - self._last_publish_time
+            average = self._publish_interval
+            if average is None:
+                self._publish_interval = interval
+            else:
+                self._publish_interval = average + PUBLISH_RATE_SMOOTHING * (interval - average)
+        self._last_publish_time = now
+
+    @property
+    def publish_rate(self):
+        """
+        Recent snapshots published per second; decays towards 0 while the stream is silent.
+        """
+        if self._publish_interval is None:
+            return 0.0
+        silent = time.monotonic() - self._last_publish_time
+        return 1.0 / max(self._publish_interval, silent, 1e-6)
+
+    def stats(self):
+        return {
+            "exchange": self.exchange,
+            "symbol": self.symbol,
+            "connected": self.connected,
+            "received": self.received,
+            "applied": self.applied,
+            "dropped": self.dropped,
+            "queued": len(self.frames),
+            "reconnects": self.reconnects,
+            "resubscribes": self.resubscribes,
+            "version": self.store.version,
+            "publish_rate": self.publish_rate,
+        }
+
+class FeedManager:
+    """
+    Runs every configured order book subscription on one asyncio loop in one daemon thread.
+
+    Streams are registered per (exchange, symbol) and may be added or removed
+    while the loop runs. Each stream reconnects on its own with exponential
+    backoff, so one failing instrument never stalls the others. A book that
+    falls out of sync (sequence gap or checksum mismatch) makes its websocket
+    subscribe again for a fresh snapshot. With a recorder (see
+    data.tick_capture.TickRecorder) every applied message is also captured.
+    """
+
+    def __init__(self, feeds=(), url_template=None, queue_size=DEFAULT_QUEUE_SIZE, recorder=None,
+                 surface_sizes=DEFAULT_SURFACE_SIZES, surface_rate=DEFAULT_SURFACE_RATE):
+        self.url_template = url_template
+        self.queue_size = queue_size
+        self.surface_sizes = surface_sizes
+        self.surface_rate = surface_rate
+        self.recorder = recorder
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        for feed in feeds:
+            self.add_feed(**feed)
+
+    def add_feed(self, exchange, symbol, url=None, source=None):
+        """
+        Registers a subscription; it starts right away if the loop is running.
+
+        Parameters:
+        - url: Websocket to read (default: url_template for this instrument)
+        - source: Function returning an async iterator of frames, read instead of a websocket
+
+        Returns:
+        - stream: The new or already registered FeedStream
+        """
+        key = (exchange, symbol)
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                url = url or self.url_template.format(exchange=exchange, symbol=symbol)
+                stream = self._streams[key] = FeedStream(exchange, symbol, url, self.queue_size, source,
+                                                         self.surface_sizes, self.surface_rate)
+                if self._loop is not None:
+                    self._loop.call_soon_threadsafe(self._start_stream, stream)
+        return stream
+
+    def remove_feed(self, exchange, symbol):
+        with self._lock:
+            stream = self._streams.pop((exchange, symbol), None)
+            if stream is not None and self._loop is not None:
+                self._loop.call_soon_threadsafe(self._stop_stream, stream)
+
+    def stream(self, exchange, symbol):
+        return self._streams[(exchange, symbol)]
+
+    def store(self, exchange, symbol):
+        """SnapshotStore of one instrument."""
+        return self._streams[(exchange, symbol)].store
+
+    def feeds(self):
+        """Registered (exchange, symbol) pairs in registration order."""
+        return list(self._streams)
+
+    def exchanges(self):
+        return list(dict.fromkeys(exchange for exchange, _ in self._streams))
+
+    def symbols(self, exchange):
+        return [symbol for venue, symbol in self._streams if venue == exchange]
+
+    def stats(self):
+        return [stream.stats() for stream in list(self._streams.values())]
+
+    def start(self):
+        """Starts the feed thread once per process; later calls return the running thread."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        with self._lock:
+            self._loop = loop
+            for stream in self._streams.values():
+                self._start_stream(stream)
+        loop.run_forever()
+
+    def _start_stream(self, stream):
+        stream.tasks = [self._loop.create_task(self._receive(stream)),
+                        self._loop.create_task(self._consume(stream))]
+
+    def _stop_stream(self, stream):
+        for task in stream.tasks:
+            task.cancel()
+        stream.tasks = []
+
+    async def _receive(self, stream):
+        if stream.source is not None:
+            await self._receive_source(stream)
+            return
+
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                async with websockets.connect(
+                    stream.url,
+                    ping_interval=20,
+                    ping_timeout=10
+                ) as ws:
+                    log_event(logger, logging.INFO, "Connected", feed=stream.name)
+                    stream.connected = True
+                    delay = RECONNECT_DELAY
+                    async for message in ws:
+                        stream.push(message)
+                        if stream.resync:
+                            break
+            except websockets.exceptions.ConnectionClosedError as e:
+                log_event(logger, logging.WARNING, "Connection lost, reconnecting", feed=stream.name, error=e,
+                          delay=delay)
+            except Exception as e:
+                log_event(logger, logging.ERROR, "Unexpected connection error, reconnecting", feed=stream.name,
+                          error=repr(e), delay=delay)
+            else:
+                if not stream.resync:
+                    log_event(logger, logging.INFO, "Connection closed, reconnecting", feed=stream.name,
+                              delay=delay)
+            finally:
+                stream.connected = False
+            # Updates cannot be chained across connections; wait for a fresh snapshot
+            stream.book.valid = False
+            if stream.resync:
+                # The exchange only sends a snapshot on subscribing, so a book out of sync reconnects at once
+                stream.resync = False
+                stream.resubscribes += 1
+                log_event(logger, logging.INFO, "Resubscribing for a new snapshot", feed=stream.name)
+                continue
+            stream.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _receive_source(self, stream):
+        """Reads a stream's source; an iterator that fails is started again after a backoff."""
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                stream.connected = True
+                async for frame in stream.source():
+                    stream.push(frame)
+                    delay = RECONNECT_DELAY
+            except Exception as e:
+                log_event(logger, logging.ERROR, "Source failed, restarting", feed=stream.name, error=repr(e),
+                          delay=delay)
+            else:
+                log_event(logger, logging.INFO, "Source finished", feed=stream.name)
+                return
+            finally:
+                stream.connected = False
+            stream.book.valid = False
+            stream.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _consume(self, stream):
+        while True:
+            await stream.ready.wait()
+            stream.ready.clear()
+            newest_time = newest_ns = None
+            while stream.frames:
+                recv_time, recv_ns, frame = stream.frames.popleft()
+                if self._apply_frame(stream, recv_time, recv_ns, frame):
+                    newest_time, newest_ns = recv_time, recv_ns
+            # One snapshot per batch, so a burst of frames costs a single copy of the book
+            if newest_ns is not None and stream.book.valid:
+                self._publish_book(stream, newest_time, newest_ns)
+
+    def _run_stage(self, stream, stage, function, *args):
+        """
+        Runs one per-publish update of a stream's derived state.
+
+        A failure is logged and skipped, so a bad candle, model, calibration
+        or cost surface update never ends the consume task.
+        """
+        try:
+            return function(*args)
+        except Exception as e:
+            log_event(logger, logging.ERROR, "Publish stage failed", feed=stream.name, stage=stage, error=repr(e))
+            return None
+
+    def _publish_book(self, stream, newest_time, newest_ns):
+        with latency_tracker.measure("publish"):
+            snapshot = stream.book.snapshot()
+            version = stream.store.publish(snapshot)
+        stream.last_publish = (version, newest_ns)
+        stream.record_publish()
+        self._run_stage(stream, "candles", stream.candles.update, snapshot.mid_price, newest_time)
+        self._run_stage(stream, "models", stream.models.update, snapshot)
+        self._run_stage(stream, "calibration", stream.calibration.update, snapshot, newest_time)
+        delay = self._run_stage(stream, "costs", stream.costs.update, version, snapshot)
+        if delay is not None:
+            # Throttled: the held-back book is priced once the interval has passed
+            asyncio.get_running_loop().call_later(delay, self._run_stage, stream, "costs", stream.costs.flush)
+
+    def _apply_frame(self, stream, recv_time, recv_ns, frame):
+        start_ns = time.perf_counter_ns()
+        latency_tracker.record("receive", start_ns - recv_ns)
+        try:
+            data = _decode_frame(frame)
+            decoded_ns = time.perf_counter_ns()
+            latency_tracker.record("decode", decoded_ns - start_ns)
+            # Basic validation of message
+            if all(k in data for k in REQUIRED_FIELDS):
+                stream.latest_message = data
+                if self.recorder is not None:
+                    self.recorder.record(data, recv_time)
+                was_valid = stream.book.valid
+                stream.book.apply_message(data)
+                latency_tracker.record_since("apply", decoded_ns)
+                stream.applied += 1
+                return True
+            # Logged through the rate-limited queue: a burst of bad frames must not stall the consumer
+            log_event(logger, logging.WARNING, "Unexpected message format", feed=stream.name,
+                      missing=next((k for k in REQUIRED_FIELDS if k not in data), None))
+        except (SequenceGapError, ChecksumError) as e:
+            # Updates still queued from before the resubscribe fail too, but must not request another one
+            if was_valid and stream.source is None:
+                stream.resync = True
+            log_event(logger, logging.WARNING, "Order book out of sync, waiting for next snapshot", feed=stream.name,
+                      error=e)
+        except Exception as e:
+            log_event(logger, logging.ERROR, "Parsing error", feed=stream.name, error=repr(e))
+        return False
@@ -0,0 +1,298 @@
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+# Price levels kept per side; updates beyond the worst kept level are dropped
+DEFAULT_CAPACITY = 400
+
+# Levels per side covered by the OKX-style CRC32 checksum
+CHECKSUM_DEPTH = 25
+
+class SequenceGapError(ValueError):
+    """An incremental update does not follow the last applied sequence number."""
+
+class ChecksumError(ValueError):
+    """The book no longer matches the checksum sent by the exchange."""
+
+# Immutable, ready-to-plot copy of the book. Price and size arrays are
+# read-only and ordered best first; mid_price and spread are nan when a side
+# is empty.
+BookSnapshot = namedtuple("BookSnapshot", [
+    "symbol", "timestamp", "seq", "version", "valid",
+    "bid_prices", "bid_sizes", "ask_prices", "ask_sizes",
+    "best_bid", "best_ask", "mid_price", "spread",
+])
+
+def parse_levels(levels):
+    """
+    Converts [[price, size, ...], ...] (strings or numbers) to two float arrays.
+    """
+    if len(levels) == 0:
+        empty = np.empty(0, dtype="float64")
+        return empty, empty
+    try:
+        array = np.asarray(levels, dtype="float64")[:, :2]
+    except ValueError:
+        # Rows of different lengths
+        array = np.asarray([level[:2] for level in levels], dtype="float64")
+    return array[:, 0], array[:, 1]
+
+def level_text(levels):
+    """
+    Price and size of [[price, size, ...], ...] as the exchange wrote them.
+
+    The checksum is computed over these strings, so "0.10" has to stay
+    "0.10"; numeric levels are formatted with _format_number.
+    """
+    return [[level[0] if isinstance(level[0], str) else _format_number(level[0]),
+             level[1] if isinstance(level[1], str) else _format_number(level[1])] for level in levels]
+
+def _frozen_copy(array):
+    array = array.copy()
+    array.flags.writeable = False
+    return array
+
+def _format_number(value):
+    """Shortest decimal form of a price or size, as exchanges send them."""
+    return np.format_float_positional(value, trim="-")
+
+class BookSide:
+    """
+    One side of an L2 book in preallocated arrays sorted by ascending price.
+
+    Asks keep their best level at index 0 and bids at index count - 1, so the
+    best price is an O(1) read and top-of-book views are plain slices. The
+    text array keeps every level's price and size strings for the checksum.
+    """
+
+    def __init__(self, is_bid, capacity=DEFAULT_CAPACITY):
+        self.is_bid = is_bid
+        self.capacity = capacity
+        self.prices = np.zeros(capacity, dtype="float64")
+        self.sizes = np.zeros(capacity, dtype="float64")
+        self.text = np.empty((capacity, 2), dtype=object)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def best(self):
+        """Best price and size, or (nan, nan) when the side is empty."""
+        if not self.count:
+            return np.nan, np.nan
+        index = self.count - 1 if self.is_bid else 0
+        return self.prices[index], self.sizes[index]
+
+    def _window(self, depth):
+        depth = min(depth, self.count)
+        if not depth:
+            return slice(0, 0)
+        if self.is_bid:
+            stop = self.count - 1 - depth
+            return slice(self.count - 1, stop if stop >= 0 else None, -1)
+        return slice(0, depth)
+
+    def top(self, depth):
+        """Read-only views of the best `depth` prices and sizes, best first."""
+        window = self._window(depth)
+        prices, sizes = self.prices[window], self.sizes[window]
+        prices.flags.writeable = False
+        sizes.flags.writeable = False
+        return prices, sizes
+
+    def top_text(self, depth):
+        """Price and size strings of the best `depth` levels, best first."""
+        return self.text[self._window(depth)]
+
+    def load(self, prices, sizes, text=None):
+        """
+        Replaces the side with the given levels; zero sizes are skipped.
+
+        text holds the levels' [price, size] strings (see level_text); without
+        it they are formatted from the numbers.
+        """
+        keep = sizes > 0
+        if text is None:
+            text = [[_format_number(price), _format_number(size)] for price, size in zip(prices, sizes)]
+        text = np.asarray(text, dtype=object).reshape(-1, 2)[keep]
+        prices, sizes = prices[keep], sizes[keep]
+        order = np.argsort(prices, kind="stable")
+        if len(order) > self.capacity:
+            order = order[-self.capacity:] if self.is_bid else order[:self.capacity]
+        self.count = len(order)
+        self.prices[:self.count] = prices[order]
+        self.sizes[:self.count] = sizes[order]
+        self.text[:self.count] = text[order]
+
+    def update(self, price, size, text=None):
+        """
+        Sets one level in place: size 0 deletes it, otherwise it is inserted or resized.
+
+        text is the level's (price, size) strings, formatted from the numbers when not given.
+
+        Returns:
+        - changed: Whether the side was modified
+        """
+        count = self.count
+        index = int(np.searchsorted(self.prices[:count], price))
+        found = index < count and self.prices[index] == price
+
+        if found:
+            if size > 0:
+                self.sizes[index] = size
+                self.text[index] = text or (_format_number(price), _format_number(size))
+            else:
+                self.prices[index:count - 1] = self.prices[index + 1:count]
+                self.sizes[index:count - 1] = self.sizes[index + 1:count]
+                self.text[index:count - 1] = self.text[index + 1:count]
+                self.count -= 1
+            return True
+        if size <= 0:
+            return False
+        text = text or (_format_number(price), _format_number(size))
+
+        if count == self.capacity:
+            # Full: the new level must beat the worst one, which is dropped
+            if self.is_bid:
+                if index == 0:
+                    return False
+                self.prices[:index - 1] = self.prices[1:index]
+                self.sizes[:index - 1] = self.sizes[1:index]
+                self.text[:index - 1] = self.text[1:index]
+                self.prices[index - 1] = price
+                self.sizes[index - 1] = size
+                self.text[index - 1] = text
+                return True
+            if index == count:
+                return False
+            count -= 1
+
+        self.prices[index + 1:count + 1] = self.prices[index:count]
+        self.sizes[index + 1:count + 1] = self.sizes[index:count]
+        self.text[index + 1:count + 1] = self.text[index:count]
+        self.prices[index] = price
+        self.sizes[index] = size
+        self.text[index] = text
+        self.count = count + 1
+        return True
+
+class OrderBook:
+    """
+    Incrementally maintained L2 order book.
+
+    Snapshots replace both sides in place; deltas update individual levels.
+    A delta whose prev_seq does not match the last applied seq raises
+    SequenceGapError, and a checksum mismatch raises ChecksumError. Either
+    leaves the book invalid until the next snapshot.
+    """
+
+    def __init__(self, symbol=None, capacity=DEFAULT_CAPACITY):
+        self.symbol = symbol
+        self.bids = BookSide(True, capacity)
+        self.asks = BookSide(False, capacity)
+        self.seq = None
+        self.timestamp = None
+        self.valid = False
+        self.version = 0
+
+    def apply_snapshot(self, bids, asks, seq=None, checksum=None, timestamp=None):
+        """Replaces the whole book with raw [[price, size], ...] levels."""
+        self.bids.load(*parse_levels(bids), level_text(bids))
+        self.asks.load(*parse_levels(asks), level_text(asks))
+        self._applied(seq, checksum, timestamp)
+
+    def apply_delta(self, bids, asks, seq=None, prev_seq=None, checksum=None, timestamp=None):
+        """
+        Applies changed levels in place; a size of 0 removes the level.
+
+        Raises:
+        - SequenceGapError: prev_seq does not follow the last applied update
+        - ChecksumError: The updated book does not match checksum
+        """
+        if not self.valid:
+            raise SequenceGapError("Book is awaiting a snapshot")
+        if prev_seq is not None and self.seq is not None and prev_seq != self.seq:
+            self.valid = False
+            raise SequenceGapError(f"Expected prev_seq {self.seq}, got {prev_seq}")
+
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            prices, sizes = parse_levels(levels)
+            for price, size, text in zip(prices.tolist(), sizes.tolist(), level_text(levels)):
+                side.update(price, size, tuple(text))
+        self._applied(seq, checksum, timestamp)
+
+    def _applied(self, seq, checksum, timestamp):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.version += 1
+        self.valid = True
+        if checksum is not None and checksum != self.checksum():
+            self.valid = False
+            raise ChecksumError(f"Checksum mismatch at seq {seq}")
+
+    def apply_message(self, message):
+        """
+        Applies a decoded feed message. Messages with action "update" are
+        deltas, anything else (including plain GoQuant frames) a snapshot.
+        """
+        fields = dict(seq=message.get("seqId"), checksum=message.get("checksum"),
+                      timestamp=message.get("timestamp"))
+        if message.get("action") == "update":
+            self.apply_delta(message.get("bids", []), message.get("asks", []),
+                             prev_seq=message.get("prevSeqId"), **fields)
+        else:
+            self.apply_snapshot(message.get("bids", []), message.get("asks", []), **fields)
+
+    def checksum(self, depth=CHECKSUM_DEPTH):
+        """
+        OKX-style signed CRC32 over "bidPx:bidSz:askPx:askSz:..." of the top levels,
+        using the price and size strings as received.
+        """
+        bid_text = self.bids.top_text(depth)
+        ask_text = self.asks.top_text(depth)
+        parts = []
+        for i in range(max(len(bid_text), len(ask_text))):
+            if i < len(bid_text):
+                parts += bid_text[i].tolist()
+            if i < len(ask_text):
+                parts += ask_text[i].tolist()
+        value = zlib.crc32(":".join(parts).encode())
+        return value - (1 << 32) if value >= (1 << 31) else value
+
+    def best_bid(self):
+        return self.bids.best()[0]
+
+    def best_ask(self):
+        return self.asks.best()[0]
+
+    def mid_price(self):
+        return (self.best_bid() + self.best_ask()) / 2
+
+    def spread(self):
+        return self.best_ask() - self.best_bid()
+
+    def top_bids(self, depth=20):
+        """Views of the best bid prices and sizes, highest price first."""
+        return self.bids.top(depth)
+
+    def top_asks(self, depth=20):
+        """Views of the best ask prices and sizes, lowest price first."""
+        return self.asks.top(depth)
+
+    def snapshot(self, depth=DEFAULT_CAPACITY):
+        """
+        Immutable BookSnapshot of the best `depth` levels per side.
+
+        The arrays are copies, so later in-place updates of the book never
+        show through to readers holding a snapshot.
+        """
+        bid_prices, bid_sizes = (_frozen_copy(a) for a in self.bids.top(depth))
+        ask_prices, ask_sizes = (_frozen_copy(a) for a in self.asks.top(depth))
+        best_bid = bid_prices[0] if len(bid_prices) else np.nan
+        best_ask = ask_prices[0] if len(ask_prices) else np.nan
+        return BookSnapshot(
+            symbol=self.symbol, timestamp=self.timestamp, seq=self.seq, version=self.version, valid=self.valid,
+            bid_prices=bid_prices, bid_sizes=bid_sizes, ask_prices=ask_prices, ask_sizes=ask_sizes,
+            best_bid=best_bid, best_ask=best_ask, mid_price=(best_bid + best_ask) / 2, spread=best_ask - best_bid,
+        )
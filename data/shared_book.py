@@ -0,0 +1,238 @@
+import atexit
+import re
+import time
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from data.orderbook import BookSnapshot
+
+# Levels per side published to shared memory
+DEFAULT_SHARED_DEPTH = 400
+
+# Segment names are "<prefix>_<exchange>_<symbol>"
+DEFAULT_SHARED_PREFIX = "goquant_book"
+
+# Read attempts before read() gives up on a writer that keeps overtaking it
+MAX_READ_ATTEMPTS = 1000
+
+# A BookSnapshot whose arrays are views into shared memory, plus the cumulative
+# depth of both sides (see models.depth_walk.DepthLadder), computed once by the writer.
+SharedBookView = namedtuple("SharedBookView", BookSnapshot._fields + (
+    "bid_cum_size", "bid_cum_notional", "ask_cum_size", "ask_cum_notional",
+))
+
+SCALAR_FIELDS = ("best_bid", "best_ask", "mid_price", "spread")
+ARRAY_FIELDS = ("bid_prices", "bid_sizes", "bid_cum_size", "bid_cum_notional",
+                "ask_prices", "ask_sizes", "ask_cum_size", "ask_cum_notional")
+
+class TornReadError(RuntimeError):
+    """The writer updated the book during every read attempt."""
+
+def shared_book_dtype(depth=DEFAULT_SHARED_DEPTH):
+    """Layout of one segment: the seqlock sequence first, then the book."""
+    return np.dtype([
+        ("sequence", "<i8"),
+        ("depth", "<i8"),
+        ("version", "<i8"),
+        ("seq", "<i8"),
+        ("valid", "?"),
+        ("bid_count", "<i8"),
+        ("ask_count", "<i8"),
+        ("symbol", "S32"),
+        ("timestamp", "S32"),
+    ] + [(field, "<f8") for field in SCALAR_FIELDS] + [(field, "<f8", (depth,)) for field in ARRAY_FIELDS],
+        align=True)
+
+def shared_book_name(exchange, symbol, prefix=DEFAULT_SHARED_PREFIX):
+    """Segment name of an instrument, restricted to characters every platform accepts."""
+    return re.sub(r"[^A-Za-z0-9_]", "_", f"{prefix}_{exchange}_{symbol}")
+
+def _encode(value):
+    return b"" if value is None else str(value).encode()[:32]
+
+class SharedBookWriter:
+    """
+    Publishes an instrument's latest book into a shared memory segment.
+
+    Writes follow a seqlock: the sequence is odd while a book is being
+    written and even once it is complete, so readers never lock and the
+    writer never waits for them. Subscribe write() to a SnapshotStore to
+    publish every snapshot of a feed.
+    """
+
+    def __init__(self, name, depth=DEFAULT_SHARED_DEPTH):
+        dtype = shared_book_dtype(depth)
+        try:
+            self.memory = shared_memory.SharedMemory(name=name, create=True, size=dtype.itemsize)
+        except FileExistsError:
+            # Left behind by a writer that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.memory = shared_memory.SharedMemory(name=name, create=True, size=dtype.itemsize)
+        self.name = name
+        self.depth = depth
+        self.record = np.ndarray((), dtype=dtype, buffer=self.memory.buf)
+        self.record["depth"] = depth
+        self._sequence = self.record["sequence"]
+
+    def write(self, version, snapshot):
+        """Copies a BookSnapshot and its cumulative depth into the segment."""
+        record = self.record
+        bid_count = min(len(snapshot.bid_prices), self.depth)
+        ask_count = min(len(snapshot.ask_prices), self.depth)
+
+        self._sequence[...] += 1  # Odd: readers retry
+        record["version"] = version
+        record["seq"] = -1 if snapshot.seq is None else snapshot.seq
+        record["valid"] = snapshot.valid
+        record["symbol"] = _encode(snapshot.symbol)
+        record["timestamp"] = _encode(snapshot.timestamp)
+        for field in SCALAR_FIELDS:
+            record[field] = getattr(snapshot, field)
+        for side, count in (("bid", bid_count), ("ask", ask_count)):
+            prices = getattr(snapshot, side + "_prices")[:count]
+            sizes = getattr(snapshot, side + "_sizes")[:count]
+            record[side + "_prices"][:count] = prices
+            record[side + "_sizes"][:count] = sizes
+            np.cumsum(sizes, out=record[side + "_cum_size"][:count])
+            np.cumsum(prices * sizes, out=record[side + "_cum_notional"][:count])
+        record["bid_count"] = bid_count
+        record["ask_count"] = ask_count
+        self._sequence[...] += 1  # Even: consistent again
+
+    def on_snapshot(self, version, snapshot):
+        """SnapshotStore subscriber."""
+        self.write(version, snapshot)
+
+    def close(self):
+        """Removes the segment; attached readers keep their mapping until they close."""
+        if self.record is None:
+            return
+        self._sequence = self.record = None
+        self.memory.close()
+        self.memory.unlink()
+
+class SharedBookReader:
+    """
+    Reads the book a SharedBookWriter publishes, from any process.
+
+    read() hands a function zero-copy views of the book and only returns
+    its result once the sequence shows the writer did not touch the book
+    meanwhile; otherwise the function runs again on the newer book.
+    """
+
+    def __init__(self, name):
+        # Only the writer owns the segment: keep this process's resource
+        # tracker from unlinking it when the reader exits
+        try:
+            self.memory = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Before Python 3.13
+            self.memory = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(self.memory._name, "shared_memory")
+        self.name = name
+        depth = int(np.ndarray((), dtype=shared_book_dtype(1), buffer=self.memory.buf)["depth"])
+        self.record = np.ndarray((), dtype=shared_book_dtype(depth), buffer=self.memory.buf)
+        self._sequence = self.record["sequence"]
+        self._arrays = {field: self.record[field] for field in ARRAY_FIELDS}
+        for array in self._arrays.values():
+            array.flags.writeable = False
+
+    def _view(self):
+        record = self.record
+        counts = {"bid": int(record["bid_count"]), "ask": int(record["ask_count"])}
+        arrays = {field: array[:counts[field[:3]]] for field, array in self._arrays.items()}
+        seq = int(record["seq"])
+        return SharedBookView(
+            symbol=record["symbol"].item().decode(), timestamp=record["timestamp"].item().decode() or None,
+            seq=None if seq < 0 else seq, version=int(record["version"]), valid=bool(record["valid"]),
+            **{field: float(record[field]) for field in SCALAR_FIELDS}, **arrays,
+        )
+
+    def read(self, function=None, max_attempts=MAX_READ_ATTEMPTS):
+        """
+        Runs function(view) on a consistent SharedBookView.
+
+        The views stay valid only while the writer leaves the book alone, so
+        anything kept past the call must be copied inside function.
+
+        Returns:
+        - (version, result): version 0 and None before the first book
+
+        Raises:
+        - TornReadError: The writer overtook every one of max_attempts reads
+        """
+        function = function or (lambda view: view)
+        for _ in range(max_attempts):
+            start = int(self._sequence)
+            if start & 1:
+                time.sleep(0)  # Let the writer finish
+                continue
+            if not int(self.record["version"]):
+                return 0, None
+            try:
+                result = function(self._view())
+            except Exception:
+                # A torn book can make function fail; only a consistent one may raise
+                if int(self._sequence) == start:
+                    raise
+                continue
+            if int(self._sequence) == start:
+                return int(self.record["version"]), result
+        raise TornReadError(f"{self.name} changed during {max_attempts} reads")
+
+    def get(self):
+        """(version, BookSnapshot) with private copies of the arrays, like SnapshotStore.get()."""
+        return self.read(_copy_snapshot)
+
+    @property
+    def version(self):
+        return int(self.record["version"])
+
+    def close(self):
+        del self._sequence, self._arrays, self.record
+        self.memory.close()
+
+def _frozen_copy(array):
+    array = array.copy()
+    array.flags.writeable = False
+    return array
+
+def _copy_snapshot(view):
+    return BookSnapshot(*(_frozen_copy(value) if isinstance(value, np.ndarray) else value
+                          for value in view[:len(BookSnapshot._fields)]))
+
+def publish_books(feed_manager, prefix=DEFAULT_SHARED_PREFIX, depth=DEFAULT_SHARED_DEPTH):
+    """
+    Publishes every feed of a FeedManager to its own segment.
+
+    The segments are removed when the process exits.
+
+    Returns:
+    - writers: {(exchange, symbol): SharedBookWriter}
+    """
+    writers = {}
+    for exchange, symbol in feed_manager.feeds():
+        writer = SharedBookWriter(shared_book_name(exchange, symbol, prefix), depth)
+        feed_manager.store(exchange, symbol).subscribe(writer.on_snapshot)
+        atexit.register(writer.close)
+        writers[(exchange, symbol)] = writer
+    return writers
+
+def main():
+    # Runs the configured feeds and keeps their books in shared memory for other processes
+    from data import websocket_client
+
+    writers = websocket_client.shared_book_writers or publish_books(websocket_client.feed_manager)
+    websocket_client.run_in_thread()
+    print("Publishing", ", ".join(writer.name for writer in writers.values()))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from data.orderbook import OrderBook, _format_number
+
+# Levels per side of the generated book
+DEFAULT_SYNTHETIC_DEPTH = 200
+
+# Price grid, starting mid and spread of the generated book
+DEFAULT_TICK_SIZE = 0.1
+DEFAULT_START_PRICE = 60000.0
+DEFAULT_SPREAD_TICKS = 1
+
+# Per update: levels whose size changes, and the probability that the touch moves one tick
+DEFAULT_CHANGED_LEVELS = 8
+DEFAULT_MOVE_PROBABILITY = 0.2
+
+# Simulated time between two messages, in milliseconds
+DEFAULT_MESSAGE_INTERVAL_MS = 100
+
+def _random_sizes(rng, count):
+    # Lognormal sizes rounded to the 0.001 contract step, never zero
+    return np.maximum(np.round(rng.lognormal(0.0, 1.0, count), 3), 0.001)
+
+class SyntheticFeed:
+    """
+    Deterministic L2 feed of one instrument in the OKX-style message format the feed manager reads.
+
+    The first message is a snapshot and every later one a delta chained
+    by seqId/prevSeqId: sizes of random levels change, and with
+    `move_probability` the touch moves one tick up or down, removing the
+    crossed level and refilling the far end so the book keeps `depth`
+    levels per side. The same seed always yields the same messages, so
+    the feed can stand in for an exchange in benchmarks and offline runs.
+    """
+
+    def __init__(self, symbol="BTC-USDT-SWAP", exchange="okx", seed=0, depth=DEFAULT_SYNTHETIC_DEPTH,
+                 tick_size=DEFAULT_TICK_SIZE, start_price=DEFAULT_START_PRICE, spread_ticks=DEFAULT_SPREAD_TICKS,
+                 changed_levels=DEFAULT_CHANGED_LEVELS, move_probability=DEFAULT_MOVE_PROBABILITY,
+                 interval_ms=DEFAULT_MESSAGE_INTERVAL_MS, checksum=False):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.depth = depth
+        self.tick_size = tick_size
+        self.changed_levels = changed_levels
+        self.move_probability = move_probability
+        self.interval = timedelta(milliseconds=interval_ms)
+        self.checksum = checksum
+        self._rng = np.random.default_rng(seed)
+        self._time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self._seq = 0
+        # Sizes by price in ticks; the best bid and ask are tracked as tick indices
+        self._best_bid = int(round(start_price / tick_size)) - (spread_ticks + 1) // 2
+        self._best_ask = self._best_bid + spread_ticks
+        self._bids = dict(zip(range(self._best_bid, self._best_bid - depth, -1), _random_sizes(self._rng, depth)))
+        self._asks = dict(zip(range(self._best_ask, self._best_ask + depth), _random_sizes(self._rng, depth)))
+        # Mirror of the receiving book, only kept to compute checksums
+        self._book = OrderBook(symbol) if checksum else None
+
+    def _levels(self, changes):
+        # Rounded so prices print like the exchange sends them, not as 60000.100000000006
+        return [[_format_number(round(tick * self.tick_size, 10)), _format_number(size)] for tick, size in changes]
+
+    def _message(self, action, bids, asks):
+        self._time += self.interval
+        self._seq += 1
+        message = {
+            "timestamp": self._time.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "exchange": self.exchange,
+            "symbol": self.symbol,
+            "action": action,
+            "bids": self._levels(bids),
+            "asks": self._levels(asks),
+            "seqId": self._seq,
+            "prevSeqId": self._seq - 1 if action == "update" else -1,
+        }
+        if self._book is not None:
+            self._book.apply_message(message)
+            message["checksum"] = self._book.checksum()
+        return message
+
+    def snapshot(self):
+        """Snapshot message of the whole current book."""
+        return self._message("snapshot", sorted(self._bids.items(), reverse=True), sorted(self._asks.items()))
+
+    def update(self):
+        """Next delta message; the book it leaves is consistent with every earlier message."""
+        bids, asks = {}, {}
+        if self._rng.random() < self.move_probability:
+            if self._rng.random() < 0.5:
+                # Up: the best ask is taken and a new bid joins one tick higher
+                asks[self._best_ask] = 0.0
+                self._best_ask += 1
+                self._best_bid += 1
+                bids[self._best_bid] = _random_sizes(self._rng, 1)[0]
+                asks[self._best_ask + self.depth - 1] = _random_sizes(self._rng, 1)[0]
+                bids[self._best_bid - self.depth] = 0.0
+            else:
+                bids[self._best_bid] = 0.0
+                self._best_bid -= 1
+                self._best_ask -= 1
+                asks[self._best_ask] = _random_sizes(self._rng, 1)[0]
+                bids[self._best_bid - self.depth + 1] = _random_sizes(self._rng, 1)[0]
+                asks[self._best_ask + self.depth] = 0.0
+        # Size changes, concentrated near the touch
+        offsets = np.minimum(self._rng.geometric(0.1, self.changed_levels) - 1, self.depth - 1)
+        on_bid = self._rng.random(self.changed_levels) < 0.5
+        sizes = _random_sizes(self._rng, self.changed_levels)
+        for offset, is_bid, size in zip(offsets.tolist(), on_bid.tolist(), sizes.tolist()):
+            if is_bid:
+                bids[self._best_bid - offset] = size
+            else:
+                asks[self._best_ask + offset] = size
+
+        for side, changes in ((self._bids, bids), (self._asks, asks)):
+            for tick, size in changes.items():
+                if size:
+                    side[tick] = size
+                else:
+                    side.pop(tick, None)
+        return self._message("update", sorted(bids.items(), reverse=True), sorted(asks.items()))
+
+    def messages(self, count):
+        """
+        Yields a snapshot followed by count - 1 updates, as decoded dicts.
+        """
+        if count > 0:
+            yield self.snapshot()
+        for _ in range(count - 1):
+            yield self.update()
+
+    def frames(self, count):
+        """Like messages(), as the JSON text frames a websocket delivers."""
+        for message in self.messages(count):
+            yield json.dumps(message)
+
+def synthetic_source(count=None, rate=None, **options):
+    """
+    Feed source (see FeedManager.add_feed) streaming a SyntheticFeed.
+
+    Parameters:
+    - count: Messages to send (default: endless)
+    - rate: Messages per second (default: as fast as the consumer reads them)
+    - options: SyntheticFeed arguments
+
+    Returns:
+    - source: Function returning an async iterator of JSON frames
+    """
+    async def source():
+        feed = SyntheticFeed(**options)
+        sent = 0
+        while count is None or sent < count:
+            message = feed.snapshot() if not sent else feed.update()
+            yield json.dumps(message)
+            sent += 1
+            await asyncio.sleep(1.0 / rate if rate else 0)
+    return source
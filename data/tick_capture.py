@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from data.orderbook import _format_number, parse_levels
+
+# Price levels kept per side in a record; deeper levels of a message are cut off
+DEFAULT_CAPTURE_DEPTH = 50
+
+# Records per file before the recorder rotates to the next one
+DEFAULT_RECORDS_PER_FILE = 65536
+
+# Record flags
+FLAG_UPDATE = 1       # action "update" (a delta), otherwise a snapshot
+FLAG_SEQ = 2          # seqId is set
+FLAG_PREV_SEQ = 4     # prevSeqId is set
+FLAG_CHECKSUM = 8     # checksum is set
+FLAG_TRUNCATED = 16   # a side had more levels than the record holds
+
+def capture_dtype(depth=DEFAULT_CAPTURE_DEPTH):
+    """Fixed-size record of one book message with `depth` levels per side."""
+    return np.dtype([
+        ("recv_time", "f8"),
+        ("timestamp", "S32"),
+        ("exchange", "S16"),
+        ("symbol", "S32"),
+        ("flags", "u1"),
+        ("seq", "i8"),
+        ("prev_seq", "i8"),
+        ("checksum", "i8"),
+        ("bid_count", "u2"),
+        ("ask_count", "u2"),
+        ("bid_prices", "f8", (depth,)),
+        ("bid_sizes", "f8", (depth,)),
+        ("ask_prices", "f8", (depth,)),
+        ("ask_sizes", "f8", (depth,)),
+    ])
+
+def capture_files(source, prefix="ticks"):
+    """Capture files of a directory in recording order, or the given file list unchanged."""
+    if isinstance(source, str) and os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, f"{prefix}-*.npy")))
+    if isinstance(source, str):
+        return [source]
+    return list(source)
+
+class TickRecorder:
+    """
+    Appends book messages as fixed-size records to memory-mapped .npy files.
+
+    Each file holds records_per_file records and is preallocated when opened,
+    so recording a message is a copy into the mapping with no syscall. Full
+    files are flushed and the recorder rotates to the next file. Unused
+    trailing records stay zeroed and are skipped by the readers.
+    """
+
+    def __init__(self, directory, prefix="ticks", records_per_file=DEFAULT_RECORDS_PER_FILE,
+                 depth=DEFAULT_CAPTURE_DEPTH):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.records_per_file = records_per_file
+        self.depth = depth
+        self.dtype = capture_dtype(depth)
+        self.recorded = 0
+        self._file_index = len(capture_files(directory, prefix))
+        self._records = None
+        self._position = 0
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        """File currently written to, or None before the first record."""
+        return self._records.filename if self._records is not None else None
+
+    def _rotate(self):
+        if self._records is not None:
+            self._records.flush()
+        path = os.path.join(self.directory, f"{self.prefix}-{self._file_index:06d}.npy")
+        self._file_index += 1
+        self._records = np.lib.format.open_memmap(path, mode="w+", dtype=self.dtype,
+                                                  shape=(self.records_per_file,))
+        self._position = 0
+
+    def record(self, message, recv_time=None):
+        """Appends one decoded book message; recv_time defaults to now."""
+        with self._lock:
+            if self._records is None or self._position == self.records_per_file:
+                self._rotate()
+            row = self._records[self._position]
+            self._position += 1
+
+            flags = 0
+            if message.get("action") == "update":
+                flags |= FLAG_UPDATE
+            for flag, field, key in ((FLAG_SEQ, "seq", "seqId"), (FLAG_PREV_SEQ, "prev_seq", "prevSeqId"),
+                                     (FLAG_CHECKSUM, "checksum", "checksum")):
+                if message.get(key) is not None:
+                    flags |= flag
+                    row[field] = message[key]
+            for side in ("bid", "ask"):
+                prices, sizes = parse_levels(message.get(side + "s", []))
+                count = min(len(prices), self.depth)
+                if count < len(prices):
+                    flags |= FLAG_TRUNCATED
+                row[side + "_prices"][:count] = prices[:count]
+                row[side + "_sizes"][:count] = sizes[:count]
+                row[side + "_count"] = count
+
+            row["timestamp"] = str(message.get("timestamp", "")).encode()
+            row["exchange"] = str(message.get("exchange", "")).encode()
+            row["symbol"] = str(message.get("symbol", "")).encode()
+            row["flags"] = flags
+            # Written last: a nonzero recv_time marks the record as complete
+            row["recv_time"] = recv_time or time.time()
+            self.recorded += 1
+
+    def flush(self):
+        with self._lock:
+            if self._records is not None:
+                self._records.flush()
+
+    def close(self):
+        with self._lock:
+            if self._records is not None:
+                self._records.flush()
+                self._records = None
+
+def read_capture(source, prefix="ticks"):
+    """
+    Yields the recorded part of every capture file as a read-only memory-mapped array.
+    """
+    for path in capture_files(source, prefix):
+        records = np.load(path, mmap_mode="r")
+        yield records[:int(np.count_nonzero(records["recv_time"] > 0))]
+
+def load_capture(source, exchange=None, symbol=None, prefix="ticks"):
+    """
+    All records of a capture in one array, optionally limited to one instrument.
+    """
+    parts = []
+    for records in read_capture(source, prefix):
+        keep = np.ones(len(records), dtype=bool)
+        if exchange is not None:
+            keep &= records["exchange"] == exchange.encode()
+        if symbol is not None:
+            keep &= records["symbol"] == symbol.encode()
+        parts.append(records[keep])
+    if not parts:
+        return np.empty(0, dtype=capture_dtype())
+    return np.concatenate(parts)
+
+def _side_levels(prices, sizes, count):
+    return [[_format_number(price), _format_number(size)]
+            for price, size in zip(prices[:count].tolist(), sizes[:count].tolist())]
+
+def record_to_message(record):
+    """Rebuilds the feed message of a record in the GoQuant endpoint's format."""
+    flags = int(record["flags"])
+    message = {
+        "timestamp": record["timestamp"].decode(),
+        "exchange": record["exchange"].decode(),
+        "symbol": record["symbol"].decode(),
+        "asks": _side_levels(record["ask_prices"], record["ask_sizes"], int(record["ask_count"])),
+        "bids": _side_levels(record["bid_prices"], record["bid_sizes"], int(record["bid_count"])),
+    }
+    if flags & FLAG_UPDATE:
+        message["action"] = "update"
+    if flags & FLAG_SEQ:
+        message["seqId"] = int(record["seq"])
+    if flags & FLAG_PREV_SEQ:
+        message["prevSeqId"] = int(record["prev_seq"])
+    # The checksum is not sent: it covers the exchange's level strings ("0.10"), which the
+    # recorded floats cannot reproduce, and a truncated book could not match it anyway
+    return message
+
+def _schedule(source, speed, exchange, symbol, prefix):
+    """(delay from replay start, record) pairs; delays are 0 when replaying at max speed."""
+    start = None
+    for records in read_capture(source, prefix):
+        if exchange is not None:
+            records = records[records["exchange"] == exchange.encode()]
+        if symbol is not None:
+            records = records[records["symbol"] == symbol.encode()]
+        for record in records:
+            if start is None:
+                start = record["recv_time"]
+            yield ((record["recv_time"] - start) / speed if speed else 0.0), record
+
+def replay(source, speed=1.0, exchange=None, symbol=None, prefix="ticks"):
+    """
+    Yields the recorded messages paced like the original feed.
+
+    Parameters:
+    - source: Capture directory or list of capture files
+    - speed: 1 for real time, N for N times faster, None or 0 for as fast as possible
+    - exchange, symbol: Only replay this instrument
+    """
+    started = time.perf_counter()
+    for delay, record in _schedule(source, speed, exchange, symbol, prefix):
+        # Sleep until the absolute target so pacing errors do not accumulate
+        wait = started + delay - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        yield record_to_message(record)
+
+async def areplay(source, speed=1.0, exchange=None, symbol=None, prefix="ticks"):
+    """Asynchronous replay(), for feeding a FeedManager stream or the replay server."""
+    started = time.perf_counter()
+    for count, (delay, record) in enumerate(_schedule(source, speed, exchange, symbol, prefix)):
+        wait = started + delay - time.perf_counter()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        elif count % 32 == 0:
+            # Let other tasks run during max-speed replays
+            await asyncio.sleep(0)
+        yield record_to_message(record)
+
+async def serve_replay(source, host="127.0.0.1", port=8765, speed=1.0, repeat=False, prefix="ticks"):
+    """
+    Serves a capture as a local stand-in for the GoQuant endpoint.
+
+    A client connecting to ws://host:port/ws/l2-orderbook/{exchange}/{symbol}
+    receives the recorded messages of that instrument at the given speed.
+    """
+    # Imported here so reading a capture does not load the websocket stack
+    import websockets
+
+    async def handler(ws):
+        exchange, symbol = ws.request.path.rstrip("/").split("/")[-2:]
+        while True:
+            async for message in areplay(source, speed, exchange, symbol, prefix):
+                await ws.send(json.dumps(message))
+            if not repeat:
+                break
+
+    async with websockets.serve(handler, host, port):
+        print(f"Replaying {source} on ws://{host}:{port}/ws/l2-orderbook/<exchange>/<symbol>")
+        await asyncio.Future()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a tick capture as a local order book feed")
+    parser.add_argument("source", help="Capture directory or file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed, 0 for max")
+    parser.add_argument("--repeat", action="store_true", help="Start over when the capture ends")
+    args = parser.parse_args()
+    asyncio.run(serve_replay(args.source, args.host, args.port, args.speed, args.repeat))
+
+if __name__ == "__main__":
+    main()
@@ -67,101 +67,46 @@
 #         "maker_taker_ratio": maker_taker_ratio,
 #         "latency": latency,
 #     }
-import asyncio
-import threading
-import json
-import websockets
-import time
-
-latest_orderbook = None
-_orderbook_lock = threading.Lock()
-
-async def listen_orderbook():
-    global latest_orderbook
-    url = "wss://ws.gomarket-cpp.goquant.io/ws/l2-orderbook/okx/BTC-USDT-SWAP"
-
-    while True:
-        try:
-            async with websockets.connect(
-                url,
-                ping_interval=20,
-                ping_timeout=10
-            ) as ws:
-                print("Connected to WebSocket.")
-                async for message in ws:
-                    try:
-                        data = json.loads(message)
-                        # Basic validation of message
-                        if all(k in data for k in ("timestamp", "exchange", "symbol", "asks", "bids")):
-                            with _orderbook_lock:
-                                latest_orderbook = data
-                        else:
-                            print("Unexpected message format:", data)
-                    except Exception as e:
-                        print("Parsing error:", e)
-        except websockets.exceptions.ConnectionClosedError as e:
-            print(f"ConnectionClosedError: {e}. Reconnecting in 5 seconds...")
-            await asyncio.sleep(5)
-        except Exception as e:
-            print(f"Unexpected error: {e}. Reconnecting in 5 seconds...")
-            await asyncio.sleep(5)
-
-def start_websocket_listener():
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(listen_orderbook())
+from config.settings import (FEEDS, FEED_QUEUE_SIZE, WS_URL_TEMPLATE, CAPTURE_DIR, CAPTURE_RECORDS_PER_FILE,
+                             REPLAY_DIR, REPLAY_SPEED, COST_SURFACE_SIZES, COST_SURFACE_MAX_RATE, SHARED_BOOKS)
+from data.feed_manager import FeedManager, SnapshotStore
+from data.shared_book import publish_books
+from data.tick_capture import TickRecorder, areplay
+# Re-exported: the pricing itself needs no feed and lives with the models
+from models.trade_metrics import get_trade_metrics
+
+# Every configured instrument runs on one event loop in one background thread,
+# shared by all Streamlit sessions of this process.
+recorder = TickRecorder(CAPTURE_DIR, records_per_file=CAPTURE_RECORDS_PER_FILE) if CAPTURE_DIR else None
+feed_manager = FeedManager(url_template=WS_URL_TEMPLATE, queue_size=FEED_QUEUE_SIZE, recorder=recorder,
+                           surface_sizes=COST_SURFACE_SIZES, surface_rate=COST_SURFACE_MAX_RATE)
+
+def _replay_source(exchange, symbol):
+    return lambda: areplay(REPLAY_DIR, REPLAY_SPEED, exchange, symbol)
+
+for feed in FEEDS:
+    # Offline runs read the instruments from a capture instead of the exchange
+    source = _replay_source(feed["exchange"], feed["symbol"]) if REPLAY_DIR else None
+    feed_manager.add_feed(feed["exchange"], feed["symbol"], source=source)
+
+# Reader processes attach with data.shared_book.SharedBookReader
+shared_book_writers = publish_books(feed_manager) if SHARED_BOOKS else {}
+
+# The default instrument, kept under its old names
+_default_stream = feed_manager.stream(**FEEDS[0])
+order_book = _default_stream.book
+snapshot_store = _default_stream.store
 
 def run_in_thread():
-    thread = threading.Thread(target=start_websocket_listener, daemon=True)
-    thread.start()
+    """Starts the feed thread; safe to call from every session, only the first call starts it."""
+    return feed_manager.start()
 
 def get_latest_orderbook():
-    """Thread-safe access to latest orderbook."""
-    with _orderbook_lock:
-        return latest_orderbook
-
-def get_trade_metrics(orderbook, quantity, volatility, fee_tier):
-    """
-    Calculate trade metrics like slippage, fees, market impact, net cost,
-    maker/taker ratio, and internal latency based on orderbook and inputs.
-    Replace with your actual models.
-    """
-    start_time = time.time()
-
-    # Simple dummy calculations to replace with real logic:
-
-    # Slippage modeled as a fraction of quantity scaled by volatility
-    slippage = 0.01 * quantity * (1 + volatility / 10)
-
-    # Fees tiered by fee_tier input (example dummy values)
-    fee_tiers = {
-        "Regular": 0.001,
-        "VIP 1": 0.0007,
-        "VIP 2": 0.0005
-    }
-    fee_rate = fee_tiers.get(fee_tier, 0.001)
-    fees = fee_rate * quantity
-
-    # Market impact dummy: proportional to sqrt(quantity)
-    market_impact = 0.005 * (quantity ** 0.5)
-
-    net_cost = slippage + fees + market_impact
-
-    # Maker/taker ratio dummy values based on fee tier
-    maker_taker_ratios = {
-        "Regular": 0.6,
-        "VIP 1": 0.7,
-        "VIP 2": 0.8
-    }
-    maker_taker_ratio = maker_taker_ratios.get(fee_tier, 0.6)
-
-    latency = (time.time() - start_time) * 1000  # in ms
-
-    return {
-        "slippage": slippage,
-        "fees": fees,
-        "market_impact": market_impact,
-        "net_cost": net_cost,
-        "maker_taker_ratio": maker_taker_ratio,
-        "latency": latency,
-    }
+    """Thread-safe access to latest raw message of the default instrument."""
+    return _default_stream.latest_message
+
+def get_latest_snapshot(exchange=None, symbol=None):
+    """Thread-safe access to the latest parsed, read-only BookSnapshot of an instrument."""
+    if exchange is None:
+        return snapshot_store.latest()
+    return feed_manager.store(exchange, symbol).latest()
@@ -0,0 +1,150 @@
+import numpy as np
+
+from models.depth_walk import DepthLadder
+from models.maker_taker_model import MakerTakerClassifier
+from models.slippage_model import SlippageRegression
+
+# Book features the online models are trained on
+FEATURES = ("spread_bps", "imbalance", "log_top_notional", "volatility_bps")
+
+# Levels per side summed into the depth imbalance
+IMBALANCE_LEVELS = 5
+
+# Order sizes in USD whose slippage labels every book update
+SLIPPAGE_REFERENCE_SIZES = (100.0, 1000.0, 10000.0, 100000.0)
+
+# Smoothing of the squared mid returns behind the short-horizon volatility (~50 updates)
+VOLATILITY_SMOOTHING = 0.04
+
+# Book updates after which a resting order at the touch is labeled filled or not
+MAKER_HORIZON = 10
+
+# Labeled updates before predictions replace the fallback estimates
+MIN_TRAINING_UPDATES = 50
+
+SIDES = ("buy", "sell")
+
+def book_features(bid_prices, bid_sizes, ask_prices, ask_sizes, volatility_bps):
+    """
+    Feature vector(s) of a book, see FEATURES.
+
+    Works on the level arrays of one book or on (books x levels) arrays of
+    many, such as books_from_capture() output.
+
+    Parameters:
+    - volatility_bps: Short-horizon volatility of the mid in bps (scalar or one per book)
+
+    Returns:
+    - features: (..., len(FEATURES)) array
+    """
+    best_bid, best_ask = bid_prices[..., 0], ask_prices[..., 0]
+    mid = (best_bid + best_ask) / 2
+    bid_depth = bid_sizes[..., :IMBALANCE_LEVELS].sum(axis=-1)
+    ask_depth = ask_sizes[..., :IMBALANCE_LEVELS].sum(axis=-1)
+    depth = bid_depth + ask_depth
+    top_notional = (best_bid * bid_sizes[..., 0] + best_ask * ask_sizes[..., 0]) / 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        imbalance = np.where(depth > 0, (bid_depth - ask_depth) / depth, 0.0)
+        features = np.stack([
+            (best_ask - best_bid) / mid * 1e4,
+            imbalance,
+            np.log10(np.maximum(top_notional, 1.0)),
+            np.broadcast_to(volatility_bps, np.shape(mid)),
+        ], axis=-1)
+    return features
+
+def _slippage_bps(ladder, sizes, arrival_mid, side):
+    _, average_price, _, _ = ladder.walk(sizes)
+    sign = 1.0 if side == "buy" else -1.0
+    return sign * (average_price - arrival_mid) / arrival_mid * 1e4
+
+class BookModels:
+    """
+    Online slippage and maker/taker models of one instrument, trained on its book updates.
+
+    Each update computes the book's features once and costs the same
+    however long the stream has run: one block least-squares update and
+    one logistic gradient step per side, labels from a fixed-size window
+    of pending books.
+    """
+
+    def __init__(self, reference_sizes=SLIPPAGE_REFERENCE_SIZES, maker_horizon=MAKER_HORIZON):
+        n_features = len(FEATURES)
+        self.slippage = {side: SlippageRegression(n_features, reference_sizes) for side in SIDES}
+        self.maker_taker = {side: MakerTakerClassifier(n_features) for side in SIDES}
+        self.variance = 0.0
+        self.features = None
+        self._last_mid = None
+        self._arrival_mid = None
+        # Books waiting for their maker label: features, touch prices and the extremes since
+        self._horizon = maker_horizon
+        self._pending_features = np.zeros((maker_horizon, n_features))
+        self._pending_bid = np.zeros(maker_horizon)
+        self._pending_ask = np.zeros(maker_horizon)
+        self._low_bid = np.full(maker_horizon, np.inf)
+        self._high_ask = np.full(maker_horizon, -np.inf)
+        self._pending = 0
+
+    @property
+    def volatility_bps(self):
+        return np.sqrt(self.variance) * 1e4
+
+    def features_of(self, snapshot):
+        """Feature vector of a BookSnapshot under the current volatility estimate."""
+        return book_features(snapshot.bid_prices, snapshot.bid_sizes, snapshot.ask_prices, snapshot.ask_sizes,
+                             self.volatility_bps)
+
+    def update(self, snapshot):
+        """Labels the pending books with this one, trains on them and queues this book."""
+        if not (len(snapshot.bid_prices) and len(snapshot.ask_prices)) or not np.isfinite(snapshot.mid_price):
+            return
+        mid = snapshot.mid_price
+        if self._last_mid is not None:
+            log_return = np.log(mid / self._last_mid)
+            self.variance += VOLATILITY_SMOOTHING * (log_return * log_return - self.variance)
+        self._last_mid = mid
+
+        if self.features is not None:
+            # What orders decided on the previous book paid walking this one
+            ladders = {"buy": DepthLadder(snapshot.ask_prices, snapshot.ask_sizes),
+                       "sell": DepthLadder(snapshot.bid_prices, snapshot.bid_sizes)}
+            for side, model in self.slippage.items():
+                model.update(self.features, _slippage_bps(ladders[side], model.reference_sizes,
+                                                          self._arrival_mid, side))
+        self._label_makers(snapshot.best_bid, snapshot.best_ask)
+
+        self.features = self.features_of(snapshot)
+        self._arrival_mid = mid
+        slot = self._pending % self._horizon
+        self._pending_features[slot] = self.features
+        self._pending_bid[slot], self._pending_ask[slot] = snapshot.best_bid, snapshot.best_ask
+        self._low_bid[slot], self._high_ask[slot] = np.inf, -np.inf
+        self._pending += 1
+
+    def _label_makers(self, best_bid, best_ask):
+        np.minimum(self._low_bid, best_bid, out=self._low_bid)
+        np.maximum(self._high_ask, best_ask, out=self._high_ask)
+        if self._pending < self._horizon:
+            return
+        # The oldest pending book has now seen `horizon` updates
+        slot = self._pending % self._horizon
+        features = self._pending_features[slot]
+        # A resting bid fills once the bid trades below it, a resting ask once the ask trades above it
+        self.maker_taker["buy"].update(features, float(self._low_bid[slot] < self._pending_bid[slot]))
+        self.maker_taker["sell"].update(features, float(self._high_ask[slot] > self._pending_ask[slot]))
+
+    def ready(self, side):
+        return (self.slippage[side].updates >= MIN_TRAINING_UPDATES
+                and self.maker_taker[side].updates >= MIN_TRAINING_UPDATES)
+
+    def predict(self, snapshot, quantity, side="buy"):
+        """
+        Predicted costs of market orders of `quantity` USD (scalar or array) on a book.
+
+        Returns:
+        - slippage: Expected slippage in USD, like estimate_slippage
+        - maker_ratio: Probability that a passive order at the touch on this side fills
+        """
+        features = self.features_of(snapshot)
+        return (self.slippage[side].predict(features, quantity),
+                float(self.maker_taker[side].predict_proba(features)))
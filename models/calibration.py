@@ -0,0 +1,183 @@
+import numpy as np
+
+from utils.almgren_chriss import TIME_STEP_SIZE
+
+# Horizon the calibrated volatility is quoted over, in seconds (one day, like the UI's % slider)
+VOLATILITY_HORIZON = 86400.0
+
+# Mid returns in the realized-volatility window
+VOLATILITY_WINDOW = 2048
+
+# Smoothing of the EWMA volatility per book update (~200 updates)
+VOLATILITY_SMOOTHING = 0.005
+
+# Books whose depth-curve fits are averaged into the impact coefficients
+IMPACT_WINDOW = 512
+
+# Levels per side of the depth curve the impact functions are fitted to
+IMPACT_LEVELS = 50
+
+class RingStatistic:
+    """
+    Windowed sum of the last `capacity` values of one or more columns.
+
+    Adding a value subtracts the one it overwrites, so the sum costs O(1)
+    per update. It is recomputed from the buffer once per pass around the
+    ring to keep rounding from accumulating.
+    """
+
+    def __init__(self, capacity, columns=1):
+        self.capacity = capacity
+        self.values = np.zeros((capacity, columns))
+        self.total = np.zeros(columns)
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def add(self, *values):
+        slot = self.count % self.capacity
+        # Swapped, not updated in place, so readers on other threads see a whole sum
+        self.total = self.total + np.subtract(values, self.values[slot])
+        self.values[slot] = values
+        self.count += 1
+        if slot == self.capacity - 1:
+            self.total = self.values.sum(axis=0)
+
+    def mean(self):
+        return self.total / len(self) if len(self) else np.full(len(self.total), np.nan)
+
+class RollingVolatility:
+    """
+    EWMA and windowed realized volatility of a price sampled at irregular times.
+
+    Squared log returns are divided by the elapsed time, so the estimates
+    are variance rates that do not depend on how often the book updates.
+    """
+
+    def __init__(self, window=VOLATILITY_WINDOW, smoothing=VOLATILITY_SMOOTHING, horizon=VOLATILITY_HORIZON):
+        self.smoothing = smoothing
+        self.horizon = horizon
+        self.window = RingStatistic(window, columns=2)  # (squared return, elapsed seconds)
+        self._ewma_squared = None
+        self._ewma_elapsed = None
+        self._last = None
+
+    def update(self, price, timestamp):
+        if not np.isfinite(price) or price <= 0:
+            return
+        if self._last is not None:
+            last_price, last_time = self._last
+            elapsed = timestamp - last_time
+            if elapsed <= 0:
+                return  # Same batch timestamp: keep the older price as the return's start
+            squared = np.log(price / last_price) ** 2
+            self.window.add(squared, elapsed)
+            if self._ewma_squared is None:
+                self._ewma_squared, self._ewma_elapsed = squared, elapsed
+            else:
+                self._ewma_squared += self.smoothing * (squared - self._ewma_squared)
+                self._ewma_elapsed += self.smoothing * (elapsed - self._ewma_elapsed)
+        self._last = (price, timestamp)
+
+    def _scaled(self, squared, elapsed):
+        return float(np.sqrt(squared / elapsed * self.horizon)) if elapsed else np.nan
+
+    @property
+    def ewma(self):
+        """EWMA volatility over `horizon` seconds, as a decimal; nan before two prices."""
+        if self._ewma_squared is None:
+            return np.nan
+        return self._scaled(self._ewma_squared, self._ewma_elapsed)
+
+    @property
+    def realized(self):
+        """Realized volatility of the last `window` returns over `horizon` seconds, as a decimal."""
+        squared, elapsed = self.window.total
+        return self._scaled(squared, elapsed)
+
+def _power_fit(rates, impacts, exponent):
+    """Least-squares coefficient c of impacts = c * rates**exponent, through the origin."""
+    basis = rates ** exponent
+    denominator = np.dot(basis, basis)
+    return np.dot(basis, impacts) / denominator if denominator > 0 else np.nan
+
+def depth_impact_coefficients(bid_prices, bid_sizes, ask_prices, ask_sizes, alpha=1.0, beta=1.0,
+                              levels=IMPACT_LEVELS, time_step=TIME_STEP_SIZE):
+    """
+    Almgren-Chriss impact coefficients implied by the depth curve of one book.
+
+    Walking the book level by level gives, for every cumulative notional,
+    the average fill price (temporary impact) and the touch the book is
+    left at (permanent impact, half of which moves the mid). Both, as
+    fractions of the mid, are fitted to eta * rate**alpha and
+    gamma * rate**beta with rate = notional / time_step, in the units
+    optimal_execution uses when total_shares is the order size in USD.
+
+    Returns:
+    - (gamma, eta): Permanent and temporary impact coefficients; nan for an empty book
+    """
+    if not (len(bid_prices) and len(ask_prices)):
+        return np.nan, np.nan
+    mid = (bid_prices[0] + ask_prices[0]) / 2
+    rates, temporary, permanent = [], [], []
+    for prices, sizes in ((ask_prices[:levels], ask_sizes[:levels]), (bid_prices[:levels], bid_sizes[:levels])):
+        cum_size = np.cumsum(sizes)
+        cum_notional = np.cumsum(prices * sizes)
+        rates.append(cum_notional / time_step)
+        temporary.append(np.abs(cum_notional / cum_size - mid) / mid)
+        permanent.append(np.abs(prices - prices[0]) / 2 / mid)
+    rates, temporary, permanent = (np.concatenate(values) for values in (rates, temporary, permanent))
+    return _power_fit(rates, permanent, beta), _power_fit(rates, temporary, alpha)
+
+class MarketCalibration:
+    """
+    Live estimates of the execution model's volatility, gamma and eta for one instrument.
+
+    Fed with every published book: the mid updates the rolling volatility
+    and the depth curve adds one impact fit to a fixed-size window whose
+    mean is the calibrated coefficient. Every update is O(levels) and
+    nothing is recomputed over history.
+    """
+
+    def __init__(self, alpha=1.0, beta=1.0, impact_window=IMPACT_WINDOW):
+        self.alpha = alpha
+        self.beta = beta
+        self.volatility = RollingVolatility()
+        self.impact = RingStatistic(impact_window, columns=2)  # (gamma, eta)
+
+    def update(self, snapshot, timestamp):
+        self.volatility.update(snapshot.mid_price, timestamp)
+        gamma, eta = depth_impact_coefficients(snapshot.bid_prices, snapshot.bid_sizes, snapshot.ask_prices,
+                                               snapshot.ask_sizes, self.alpha, self.beta)
+        if np.isfinite(gamma) and np.isfinite(eta):
+            self.impact.add(gamma, eta)
+
+    def execution_params(self):
+        """
+        Calibrated inputs of optimal_execution, usable as keyword arguments.
+
+        Returns:
+        - params: dict of "volatility" (windowed realized, falling back to
+          the EWMA), "gamma" and "eta" with the "alpha" and "beta" they were
+          fitted for; empty before the first estimates
+        """
+        params = {}
+        volatility = self.volatility.realized
+        if not np.isfinite(volatility):
+            volatility = self.volatility.ewma
+        if np.isfinite(volatility):
+            params["volatility"] = volatility
+        if len(self.impact):
+            params["gamma"], params["eta"] = (float(value) for value in self.impact.mean())
+            params["alpha"], params["beta"] = self.alpha, self.beta
+        return params
+
+    def stats(self):
+        """execution_params() with both volatility estimates; None where there is no estimate yet."""
+        stats = {
+            "ewma_volatility": self.volatility.ewma,
+            "realized_volatility": self.volatility.realized,
+            **self.execution_params(),
+        }
+        return {key: value if np.isfinite(value) else None for key, value in stats.items()}
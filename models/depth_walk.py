@@ -0,0 +1,130 @@
+import numpy as np
+
+from data.orderbook import parse_levels
+
+class DepthLadder:
+    """
+    One side of the book, best level first, with cumulative depth and notional.
+
+    Walking the ladder for any order size is a binary search over the
+    cumulative notional, so pricing a whole vector of sizes costs
+    O(sizes * log levels).
+    """
+
+    def __init__(self, prices, sizes):
+        self.prices = np.asarray(prices, dtype="float64")
+        self.sizes = np.asarray(sizes, dtype="float64")
+        self.cum_size = np.cumsum(self.sizes)
+        self.cum_notional = np.cumsum(self.prices * self.sizes)
+
+    def __len__(self):
+        return len(self.prices)
+
+    @classmethod
+    def from_cumulative(cls, prices, sizes, cum_size, cum_notional):
+        """Ladder over cumulative arrays computed elsewhere, such as a shared-memory book; nothing is copied."""
+        ladder = cls.__new__(cls)
+        ladder.prices, ladder.sizes = prices, sizes
+        ladder.cum_size, ladder.cum_notional = cum_size, cum_notional
+        return ladder
+
+    def updated(self, prices, sizes):
+        """
+        Ladder of a changed book side, reusing this ladder's cumulative sums above the first changed level.
+
+        Returns:
+        - ladder: The new DepthLadder
+        - first_changed: Index of the first level that differs (len(prices) when none does)
+        """
+        prices = np.asarray(prices, dtype="float64")
+        sizes = np.asarray(sizes, dtype="float64")
+        common = min(len(prices), len(self.prices))
+        differs = np.flatnonzero((prices[:common] != self.prices[:common]) | (sizes[:common] != self.sizes[:common]))
+        first = int(differs[0]) if len(differs) else common
+        if first == len(prices) == len(self.prices):
+            return self, first
+
+        size_before = self.cum_size[first - 1] if first else 0.0
+        notional_before = self.cum_notional[first - 1] if first else 0.0
+        cum_size = np.concatenate((self.cum_size[:first], size_before + np.cumsum(sizes[first:])))
+        cum_notional = np.concatenate((self.cum_notional[:first],
+                                       notional_before + np.cumsum(prices[first:] * sizes[first:])))
+        return DepthLadder.from_cumulative(prices, sizes, cum_size, cum_notional), first
+
+    def deepest_level(self, notional):
+        """Index of the deepest level a market order of `notional` USD (scalar or array) reaches."""
+        filled = np.minimum(notional, self.total_notional)
+        return np.minimum(np.searchsorted(self.cum_notional, filled, side="left"), max(len(self.prices) - 1, 0))
+
+    @property
+    def best_price(self):
+        return self.prices[0] if len(self.prices) else np.nan
+
+    @property
+    def total_notional(self):
+        return self.cum_notional[-1] if len(self.prices) else 0.0
+
+    def walk(self, notional):
+        """
+        Fills market orders of the given USD notional(s) against the ladder.
+
+        Notional beyond the visible depth is assumed to fill at the worst level.
+
+        Returns:
+        - base_filled: Base quantity bought or sold
+        - average_price: Volume-weighted fill price
+        - last_price: Deepest level touched
+        - unfilled: Notional that exceeded the visible depth
+        """
+        notional = np.asarray(notional, dtype="float64")
+        if not len(self.prices):
+            nan = np.full(notional.shape, np.nan)
+            return nan, nan, nan, notional.copy()
+
+        filled = np.minimum(notional, self.cum_notional[-1])
+        level = np.minimum(np.searchsorted(self.cum_notional, filled, side="left"), len(self.prices) - 1)
+        notional_before = np.where(level > 0, self.cum_notional[level - 1], 0.0)
+        size_before = np.where(level > 0, self.cum_size[level - 1], 0.0)
+        unfilled = notional - filled
+
+        base_filled = size_before + (filled - notional_before) / self.prices[level] + unfilled / self.prices[-1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            average_price = np.where(base_filled > 0, notional / base_filled, self.prices[0])
+        last_price = np.where(unfilled > 0, self.prices[-1], self.prices[level])
+        return base_filled, average_price, last_price, unfilled
+
+def _ladders_from_book(orderbook):
+    if hasattr(orderbook, "bid_cum_notional"):
+        # Shared-memory books carry their cumulative depth
+        return (DepthLadder.from_cumulative(orderbook.bid_prices, orderbook.bid_sizes, orderbook.bid_cum_size,
+                                            orderbook.bid_cum_notional),
+                DepthLadder.from_cumulative(orderbook.ask_prices, orderbook.ask_sizes, orderbook.ask_cum_size,
+                                            orderbook.ask_cum_notional))
+    if hasattr(orderbook, "bid_prices"):
+        return (DepthLadder(orderbook.bid_prices, orderbook.bid_sizes),
+                DepthLadder(orderbook.ask_prices, orderbook.ask_sizes))
+    # Raw {"bids": [[price, size], ...], "asks": ...} message
+    bid_prices, bid_sizes = parse_levels(orderbook.get("bids", []))
+    ask_prices, ask_sizes = parse_levels(orderbook.get("asks", []))
+    bids, asks = np.argsort(-bid_prices, kind="stable"), np.argsort(ask_prices, kind="stable")
+    return DepthLadder(bid_prices[bids], bid_sizes[bids]), DepthLadder(ask_prices[asks], ask_sizes[asks])
+
+# (book, ladders) of the most recent book of every instrument, keyed by
+# symbol so feeds priced in turn do not evict each other. Each entry is
+# swapped as one tuple so readers on other threads never pair a book with
+# another book's ladders.
+_last = {}
+
+def book_ladders(orderbook):
+    """
+    (bid_ladder, ask_ladder) of a BookSnapshot or raw book message.
+
+    The ladders of the most recent book of each symbol are kept, so every
+    request against the same snapshot reuses the cumulative arrays.
+    """
+    key = orderbook.symbol if hasattr(orderbook, "symbol") else orderbook.get("symbol")
+    book, ladders = _last.get(key, (None, None))
+    if orderbook is not book:
+        ladders = _ladders_from_book(orderbook)
+        _last[key] = (orderbook, ladders)
+    return ladders
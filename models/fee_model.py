@@ -1,2 +1,9 @@
-def estimate_fees(quantity):
-    return 0.001 * quantity  # Dummy 0.1% fee
+# Taker fee rate per OKX fee tier
+FEE_TIERS = {
+    "Regular": 0.001,
+    "VIP 1": 0.0007,
+    "VIP 2": 0.0005
+}
+
+def estimate_fees(quantity, fee_tier="Regular"):
+    return FEE_TIERS.get(fee_tier, 0.001) * quantity
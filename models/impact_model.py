@@ -1,2 +1,13 @@
-def estimate_market_impact(quantity):
-    return 0.003 * quantity  # Dummy 0.3% market impact
+def estimate_market_impact(quantity, ladder=None, mid_price=None, opposite_best=None):
+    """
+    Market impact in USD of a market order of `quantity` USD (scalar or array).
+
+    With a DepthLadder the impact is the mid-price move caused by removing
+    the levels the order consumes, applied to the base quantity filled.
+    Without one a flat 0.3% is assumed.
+    """
+    if ladder is None:
+        return 0.003 * quantity  # Dummy 0.3% market impact
+    base_filled, _, last_price, _ = ladder.walk(quantity)
+    new_mid = (last_price + opposite_best) / 2
+    return base_filled * abs(new_mid - mid_price)
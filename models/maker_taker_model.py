@@ -1,2 +1,37 @@
-def estimate_maker_taker_ratio(quantity):
-    return {"maker": 0.3, "taker": 0.7}  # Dummy logistic regression result
+import numpy as np
+
+def _sigmoid(values):
+    return 0.5 * (1.0 + np.tanh(0.5 * values))  # Overflow-free logistic function
+
+class MakerTakerClassifier:
+    """
+    Online logistic regression of whether a passive order at the touch gets filled.
+
+    One stochastic gradient step per labeled book, so time and memory per
+    update stay constant. Labels come from the book itself: a resting
+    order at the best price counts as filled (maker) when the market
+    trades through that price within the labeling horizon.
+    """
+
+    def __init__(self, n_features, learning_rate=0.05, l2=1e-4):
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.weights = np.zeros(n_features + 1)
+        self.updates = 0
+
+    def _design(self, features):
+        features = np.atleast_2d(features)
+        return np.column_stack((np.ones(len(features)), features))
+
+    def update(self, features, filled):
+        """One gradient step on (observations x n_features) features and their 0/1 labels."""
+        design = self._design(features)
+        error = _sigmoid(design @ self.weights) - np.atleast_1d(filled)
+        gradient = design.T @ error / len(design) + self.l2 * self.weights
+        self.weights = self.weights - self.learning_rate * gradient
+        self.updates += 1
+
+    def predict_proba(self, features):
+        """Fill probability of a passive order on a book with these features (vector or batch)."""
+        probability = _sigmoid(self._design(features) @ self.weights)
+        return probability if np.ndim(features) > 1 else probability[0]
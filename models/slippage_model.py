@@ -1,2 +1,94 @@
-def estimate_slippage(quantity):
-    return 0.002 * quantity  # Dummy 0.2% slippage
+import numpy as np
+
+def estimate_slippage(quantity, ladder=None, mid_price=None, side="buy"):
+    """
+    Slippage in USD of a market order of `quantity` USD (scalar or array).
+
+    With a DepthLadder (asks for buys, bids for sells) the order walks the
+    book and slippage is the cost against executing the same base quantity
+    at mid_price. Without one a flat 0.2% is assumed.
+    """
+    if ladder is None:
+        return 0.002 * quantity  # Dummy 0.2% slippage
+    base_filled, _, _, _ = ladder.walk(quantity)
+    sign = 1.0 if side == "buy" else -1.0
+    return sign * (quantity - base_filled * mid_price)
+
+class RecursiveLeastSquares:
+    """
+    Linear regression updated one batch of observations at a time.
+
+    Keeps only the weights and the inverse covariance of the features, so
+    an update costs the same however many observations came before. Old
+    observations are discounted by `forgetting` per update, letting the
+    fit follow a drifting market.
+    """
+
+    def __init__(self, n_features, forgetting=0.999, initial_variance=100.0):
+        self.forgetting = forgetting
+        self.weights = np.zeros(n_features)
+        self.covariance = np.eye(n_features) * initial_variance
+        self.updates = 0
+
+    def update(self, features, targets):
+        """Fits (observations x n_features) features to their targets in one block update."""
+        features = np.atleast_2d(features)
+        targets = np.atleast_1d(targets)
+        projected = self.covariance @ features.T
+        innovation = self.forgetting * np.eye(len(targets)) + features @ projected
+        gain = np.linalg.solve(innovation, projected.T).T
+        self.weights = self.weights + gain @ (targets - features @ self.weights)
+        covariance = (self.covariance - gain @ projected.T) / self.forgetting
+        self.covariance = (covariance + covariance.T) / 2  # Keep it symmetric despite rounding
+        self.updates += 1
+
+    def predict(self, features):
+        return features @ self.weights
+
+def slippage_design(features, quantity):
+    """
+    Regression inputs of orders of `quantity` USD (scalar or array) placed on a book.
+
+    Parameters:
+    - features: Book feature vector, see models.book_models.book_features
+
+    Returns:
+    - design: (orders x (features + 2)) array of an intercept, the book features and log10(quantity)
+    """
+    quantity = np.atleast_1d(np.asarray(quantity, dtype="float64"))
+    design = np.empty((len(quantity), len(features) + 2))
+    design[:, 0] = 1.0
+    design[:, 1:-1] = features
+    design[:, -1] = np.log10(np.maximum(quantity, 1.0))
+    return design
+
+class SlippageRegression:
+    """
+    Online regression of the slippage of market orders, in basis points of the arrival mid.
+
+    Every book update is labeled with the slippage that orders of
+    `reference_sizes` USD decided on the previous book would have paid
+    walking this one, so predictions include how the book moves while an
+    order is on its way.
+    """
+
+    def __init__(self, n_features, reference_sizes, forgetting=0.999):
+        self.reference_sizes = np.asarray(reference_sizes, dtype="float64")
+        self.regression = RecursiveLeastSquares(n_features + 2, forgetting)
+
+    @property
+    def updates(self):
+        return self.regression.updates
+
+    def update(self, features, slippage_bps):
+        """Learns the slippage (bps, one per reference size) of orders placed on a book with these features."""
+        self.regression.update(slippage_design(features, self.reference_sizes), slippage_bps)
+
+    def predict_bps(self, features, quantity):
+        """Expected slippage in bps of orders of `quantity` USD (scalar or array) placed on this book."""
+        prediction = self.regression.predict(slippage_design(features, quantity))
+        return prediction if np.ndim(quantity) else prediction[0]
+
+    def predict(self, features, quantity):
+        """Expected slippage in USD, like estimate_slippage."""
+        return self.predict_bps(features, quantity) * np.asarray(quantity, dtype="float64") / 1e4
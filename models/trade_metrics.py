@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+
+from models.depth_walk import book_ladders
+from models.fee_model import estimate_fees
+from models.impact_model import estimate_market_impact
+from models.slippage_model import estimate_slippage
+from utils.latency_tracker import latency_tracker
+
+def get_trade_metrics(orderbook, quantity, fee_tier, side="buy", models=None):
+    """
+    Slippage, fees, market impact, net cost and maker/taker ratio of an order.
+
+    Slippage and impact walk the ask ladder (buys) or bid ladder (sells)
+    of the book; without book levels the flat model estimates are used.
+    With the instrument's trained BookModels, slippage and the maker/taker
+    ratio are the online models' predictions for this book.
+
+    Parameters:
+    - orderbook: BookSnapshot or raw book message to price against (may be None)
+    - quantity: Order size in USD, a scalar or an array priced in one vectorized call
+    - fee_tier: OKX fee tier, see models.fee_model.FEE_TIERS
+    - side: "buy" or "sell"
+    - models: The instrument's BookModels (optional)
+
+    Returns:
+    - metrics: dict of "slippage", "fees", "market_impact", "net_cost" (floats, or arrays for an
+      array quantity), "maker_taker_ratio" and "latency" in ms
+    """
+    if not isinstance(fee_tier, str):
+        raise TypeError("get_trade_metrics() no longer takes volatility; pass fee_tier as the third argument")
+    start_ns = time.perf_counter_ns()
+
+    quantity = np.asarray(quantity, dtype="float64")
+    bid_ladder, ask_ladder = book_ladders(orderbook) if orderbook else (None, None)
+    ladder, opposite = (ask_ladder, bid_ladder) if side == "buy" else (bid_ladder, ask_ladder)
+
+    if ladder is not None and len(ladder) and len(opposite):
+        mid_price = (ladder.best_price + opposite.best_price) / 2
+        slippage = estimate_slippage(quantity, ladder, mid_price, side)
+        market_impact = estimate_market_impact(quantity, ladder, mid_price, opposite.best_price)
+    else:
+        slippage = estimate_slippage(quantity)
+        market_impact = estimate_market_impact(quantity)
+
+    maker_taker_ratio = None
+    if models is not None and hasattr(orderbook, "bid_prices") and models.ready(side):
+        slippage, maker_taker_ratio = models.predict(orderbook, quantity, side)
+
+    fees = estimate_fees(quantity, fee_tier)
+
+    net_cost = slippage + fees + market_impact
+
+    if maker_taker_ratio is None:
+        # Maker/taker ratio dummy values based on fee tier
+        maker_taker_ratios = {
+            "Regular": 0.6,
+            "VIP 1": 0.7,
+            "VIP 2": 0.8
+        }
+        maker_taker_ratio = maker_taker_ratios.get(fee_tier, 0.6)
+
+    elapsed_ns = time.perf_counter_ns() - start_ns
+    latency_tracker.record("metrics", elapsed_ns)
+    latency = elapsed_ns / 1e6  # in ms
+
+    metrics = {
+        "slippage": slippage,
+        "fees": fees,
+        "market_impact": market_impact,
+        "net_cost": net_cost,
+    }
+    if quantity.ndim == 0:
+        metrics = {key: float(value) for key, value in metrics.items()}
+    metrics["maker_taker_ratio"] = maker_taker_ratio
+    metrics["latency"] = latency
+    return metrics
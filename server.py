@@ -0,0 +1,188 @@
+# Headless service mode: one feed, one set of books and one solver cache shared by every client.
+#
+# Run with:
+#     uvicorn server:app --host 0.0.0.0 --port 8000
+#
+# Set API_URL in config/settings.py to make the Streamlit UI a thin client of it.
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from pydantic import BaseModel
+
+from data.book_broadcast import DEFAULT_PUSH_DEPTH, BookBroadcaster, snapshot_to_dict
+from data.candles import downsample
+from data.cost_surface import surface_to_dict
+from data.websocket_client import feed_manager, get_trade_metrics, run_in_thread
+from utils.almgren_chriss import trajectory_cost, trajectory_objective
+from utils.execution_cache import cached_optimal_execution
+from utils.execution_monte_carlo import execution_cost_distribution
+from utils.latency_tracker import latency_tracker
+from ui.charts import adaptive_refresh_interval
+
+DEFAULT_EXCHANGE, DEFAULT_SYMBOL = feed_manager.feeds()[0]
+
+with open(os.path.join(os.path.dirname(__file__), "ui", "live_chart.html")) as chart_file:
+    LIVE_CHART_HTML = chart_file.read()
+
+@asynccontextmanager
+async def lifespan(app):
+    run_in_thread()
+    app.state.broadcasters = {}
+    yield
+    for broadcaster in app.state.broadcasters.values():
+        broadcaster.close()
+
+app = FastAPI(title="GoQuant Trade Simulator", lifespan=lifespan)
+
+class SimulationRequest(BaseModel):
+    time_steps: int = 50
+    total_shares: int
+    risk_aversion: float = 0.001
+    alpha: float = 1.0
+    beta: float = 1.0
+    gamma: float = 0.05
+    eta: float = 0.05
+    volatility: float = 0.025  # As a decimal, not in percent
+    distribution: bool = False
+    # Replace volatility, exponents and impact coefficients with this instrument's live calibration
+    calibrated: bool = False
+    exchange: str = DEFAULT_EXCHANGE
+    symbol: str = DEFAULT_SYMBOL
+
+def _stream(exchange, symbol):
+    try:
+        return feed_manager.stream(exchange, symbol)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No feed for {exchange}/{symbol}")
+
+def _broadcaster(exchange, symbol):
+    broadcasters = app.state.broadcasters
+    if (exchange, symbol) not in broadcasters:
+        broadcasters[(exchange, symbol)] = BookBroadcaster(_stream(exchange, symbol).store,
+                                                           asyncio.get_running_loop())
+    return broadcasters[(exchange, symbol)]
+
+@app.get("/feeds")
+def feeds():
+    """Subscribed instruments with their feed statistics."""
+    return feed_manager.stats()
+
+@app.get("/book")
+def book(exchange: str = DEFAULT_EXCHANGE, symbol: str = DEFAULT_SYMBOL, depth: int = DEFAULT_PUSH_DEPTH):
+    """Latest book of an instrument; version 0 means no book was received yet."""
+    return snapshot_to_dict(*_stream(exchange, symbol).store.get(), depth=depth)
+
+@app.get("/metrics")
+def metrics(quantity: float, fee_tier: str = "Regular", side: str = "buy",
+            exchange: str = DEFAULT_EXCHANGE, symbol: str = DEFAULT_SYMBOL):
+    """get_trade_metrics against the latest book of an instrument."""
+    stream = _stream(exchange, symbol)
+    version, snapshot = stream.store.get()
+    result = get_trade_metrics(snapshot, quantity, fee_tier, side, models=stream.models)
+    result["version"] = version
+    return result
+
+@app.post("/simulate")
+def simulate(request: SimulationRequest):
+    """
+    Optimal execution schedule through the shared solver cache.
+
+    Plain (non-async) handlers run in the server's thread pool, so a long
+    solve never blocks the push channel.
+    """
+    params = request.model_dump(exclude={"distribution", "calibrated", "exchange", "symbol"})
+    if request.calibrated:
+        params.update(_stream(request.exchange, request.symbol).calibration.execution_params())
+    _, _, inventory_path, optimal_trajectory = cached_optimal_execution(**params)
+    model = [params[key] for key in ("risk_aversion", "alpha", "beta", "gamma", "eta", "volatility")]
+    expected_cost, variance = trajectory_cost(inventory_path, *model)
+    result = {
+        "inventory_path": inventory_path[:, 0].tolist(),
+        "optimal_trajectory": optimal_trajectory.tolist(),
+        "expected_cost": expected_cost,
+        "variance": variance,
+        "objective": trajectory_objective(inventory_path, *model),
+        "params": params,
+    }
+    if request.distribution:
+        result["cost_distribution"] = execution_cost_distribution(
+            optimal_trajectory, params["alpha"], params["beta"], params["gamma"], params["eta"], params["volatility"],
+            seed=0)
+    return result
+
+@app.get("/costs")
+def costs(exchange: str = DEFAULT_EXCHANGE, symbol: str = DEFAULT_SYMBOL):
+    """
+    Latest cost surface of an instrument: slippage, fees, impact and net cost
+    of the configured order sizes on both sides, as computed by the feed.
+    """
+    return surface_to_dict(*_stream(exchange, symbol).costs_store.get())
+
+@app.get("/calibration")
+def calibration(exchange: str = DEFAULT_EXCHANGE, symbol: str = DEFAULT_SYMBOL):
+    """
+    Live volatility and impact estimates of an instrument; "volatility",
+    "alpha", "beta", "gamma" and "eta" are POST /simulate parameters as is.
+    """
+    return _stream(exchange, symbol).calibration.stats()
+
+@app.get("/candles")
+def candles(exchange: str = DEFAULT_EXCHANGE, symbol: str = DEFAULT_SYMBOL, resolution: int = 1, since: float = 0,
+            max_points: int = 0):
+    """
+    Candles whose bucket starts at or after `since` (the live one included).
+
+    max_points > 0 downsamples the result for a chart of that many points.
+    "last_time" is the bucket of the newest candle, the `since` of the next
+    poll, and "refresh_ms" how soon polling again is worthwhile.
+    """
+    stream = _stream(exchange, symbol)
+    if resolution not in stream.candles.series:
+        raise HTTPException(status_code=404, detail=f"No {resolution}s candles")
+    result = stream.candles.candles_since(resolution, since)
+    last_time = float(result["time"][-1]) if len(result["time"]) else None
+    if max_points > 0:
+        result = downsample(result, max_points)
+    result = {field: values.tolist() for field, values in result.items()}
+    result["last_time"] = last_time
+    result["refresh_ms"] = adaptive_refresh_interval(stream.publish_rate)
+    return result
+
+@app.get("/chart", response_class=HTMLResponse)
+def chart():
+    """
+    Live depth and candle charts that update in the browser from /ws/book
+    diffs and incremental /candles polls; see ui/live_chart.html.
+    """
+    return LIVE_CHART_HTML
+
+@app.get("/latency", response_class=PlainTextResponse)
+def latency():
+    """Stage latency histograms in the Prometheus text format."""
+    return latency_tracker.prometheus_text()
+
+@app.websocket("/ws/book/{exchange}/{symbol}")
+async def push_book(websocket: WebSocket, exchange: str, symbol: str):
+    """
+    Pushes the full book on connect, then only the fields and levels that changed.
+
+    A slow client skips intermediate versions; its next message is the
+    difference to the latest book.
+    """
+    if (exchange, symbol) not in feed_manager.feeds():
+        await websocket.close(code=1008)
+        return
+    broadcaster = _broadcaster(exchange, symbol)
+    await websocket.accept()
+    sent = broadcaster.state()
+    try:
+        await websocket.send_json(sent)
+        while True:
+            await broadcaster.wait_for_change(sent["version"])
+            sent, diff = broadcaster.diff_since(sent)
+            await websocket.send_json(diff)
+    except WebSocketDisconnect:
+        pass
@@ -0,0 +1,111 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from utils.almgren_chriss import (
+    TIME_STEP_SIZE,
+    closed_form_execution,
+    hamiltonian,
+    optimal_execution,
+    temporary_impact,
+    trajectory_cost,
+    trajectory_objective,
+    validate_closed_form,
+)
+from utils.execution_monte_carlo import execution_cost_distribution
+
+def brute_force_values(time_steps, total_shares, risk_aversion, alpha, beta, gamma, eta, volatility):
+    """Cost of the best of every non-increasing inventory sequence, per starting inventory."""
+    values = np.full(total_shares + 1, np.inf)
+    for start in range(total_shares + 1):
+        for holdings in itertools.combinations_with_replacement(range(start, -1, -1), time_steps - 1):
+            path = (start,) + holdings
+            cost = sum(hamiltonian(path[t], path[t] - path[t + 1], risk_aversion, alpha, beta, gamma, eta,
+                                   volatility, TIME_STEP_SIZE) for t in range(time_steps - 1))
+            cost += path[-1] * temporary_impact(path[-1] / TIME_STEP_SIZE, alpha, eta)
+            values[start] = min(values[start], cost)
+    return values
+
+@pytest.mark.parametrize("alpha, beta", [(1.0, 1.0), (0.5, 0.5), (2.0, 1.0), (1.5, 0.7)])
+def test_dp_matches_brute_force(alpha, beta):
+    model = (0.01, alpha, beta, 0.05, 0.05, 0.3)
+    value_function, best_moves, path, trajectory = optimal_execution(4, 12, *model, method="dp", lot_size=1)
+    np.testing.assert_allclose(value_function[0], brute_force_values(4, 12, *model), rtol=1e-12)
+    assert path[0, 0] == 12 and path[-1, 0] == 0
+    assert trajectory.sum() == 12 and np.all(trajectory >= 0)
+
+@pytest.mark.parametrize("alpha, beta", [(1.0, 1.0), (0.5, 0.5), (2.0, 1.0), (0.5, 2.0)])
+def test_monotone_matches_exhaustive(alpha, beta):
+    model = (0.001, alpha, beta, 0.05, 0.05, 0.3)
+    exhaustive = optimal_execution(20, 300, *model, method="dp", lot_size=1)
+    stats = {}
+    monotone = optimal_execution(20, 300, *model, method="dp", lot_size=1, solver="monotone", stats=stats)
+    np.testing.assert_allclose(monotone[0], exhaustive[0], rtol=1e-12)
+    np.testing.assert_array_equal(monotone[2], exhaustive[2])
+    assert stats["candidates"] < 20 * 301 * 302 // 4
+
+def test_monotone_debug_falls_back_to_exhaustive():
+    # The optimal target is not monotone in the holding here, which the debug check catches
+    model = (0.001, 1.5, 0.7, 0.05, 0.05, 0.3)
+    exhaustive = optimal_execution(20, 300, *model, method="dp", lot_size=1)
+    stats = {}
+    checked = optimal_execution(20, 300, *model, method="dp", lot_size=1, solver="monotone", debug=True,
+                                stats=stats)
+    assert stats["fallback"]
+    np.testing.assert_allclose(checked[0], exhaustive[0], rtol=1e-12)
+    np.testing.assert_array_equal(checked[2], exhaustive[2])
+
+@pytest.mark.parametrize("model", [
+    (1e-4, 1.5, 1.0, 0.05, 0.05, 0.025),
+    (0.001, 0.5, 2.0, 0.05, 0.05, 0.3),
+    (0.01, 2.0, 0.5, 0.01, 0.2, 0.3),
+])
+def test_lot_size_grid_matches_exact_dp(model):
+    # 1200 shares on 101 states trade in lots of 12; selling a few shares per step must still be reachable
+    exact = optimal_execution(20, 1200, *model, method="dp", lot_size=1)[2]
+    refined = optimal_execution(20, 1200, *model, method="dp", max_states=101)[2]
+    assert refined[0, 0] == 1200 and refined[-1, 0] == 0
+    assert trajectory_objective(refined, *model) == pytest.approx(trajectory_objective(exact, *model), rel=1e-3)
+
+@pytest.mark.parametrize("time_steps, total_shares", [(10, 50), (25, 200), (40, 120)])
+def test_closed_form_matches_dp_objective(time_steps, total_shares):
+    report = validate_closed_form(time_steps, total_shares, 0.001, 0.05, 0.05, 0.3)
+    assert report["ok"]
+    assert report["relative_gap"] < 0.01
+
+def test_auto_uses_closed_form_for_linear_impact():
+    closed = closed_form_execution(20, 300, 0.001, 0.05, 0.05, 0.3)
+    result = optimal_execution(20, 300, 0.001, 1.0, 1.0, 0.05, 0.05, 0.3)
+    np.testing.assert_array_equal(result[2], closed[2])
+    assert result[2][0, 0] == 300 and result[2][-1, 0] == 0
+
+@pytest.mark.parametrize("alpha, beta", [(1.0, 1.0), (0.5, 0.5), (1.5, 1.0)])
+def test_expected_cost_does_not_depend_on_risk_aversion(alpha, beta):
+    _, _, path, _ = optimal_execution(20, 200, 0.001, alpha, beta, 0.05, 0.05, 0.3, method="dp")
+    costs = [trajectory_cost(path, risk_aversion, alpha, beta, 0.05, 0.05, 0.3) for risk_aversion in (1e-4, 1e-2)]
+    assert costs[0] == costs[1]
+    objectives = [trajectory_objective(path, risk_aversion, alpha, beta, 0.05, 0.05, 0.3)
+                  for risk_aversion in (1e-4, 1e-2)]
+    assert objectives[0] < objectives[1]
+
+def test_objective_is_the_dp_value():
+    # The path starts with the policy of t = 1, so it realises value_function[1]
+    value_function, _, path, _ = optimal_execution(15, 80, 0.001, 0.5, 0.5, 0.05, 0.05, 0.3, method="dp",
+                                                   lot_size=1)
+    assert trajectory_objective(path, 0.001, 0.5, 0.5, 0.05, 0.05, 0.3) == pytest.approx(value_function[1, 80])
+
+@pytest.mark.parametrize("alpha, beta, gamma, eta", [
+    (1.0, 1.0, 0.05, 0.05),
+    (1.5, 1.0, 0.05, 0.05),
+    (0.5, 2.0, 0.05, 0.05),
+    (1.0, 1.0, 0.2, 0.01),
+    (1.5, 0.7, 0.2, 0.01),
+])
+def test_expected_cost_matches_simulated_mean(alpha, beta, gamma, eta):
+    model = (0.001, alpha, beta, gamma, eta, 0.3)
+    _, _, path, trajectory = optimal_execution(20, 200, *model)
+    expected_cost, variance = trajectory_cost(path, *model)
+    stats = execution_cost_distribution(trajectory, alpha, beta, gamma, eta, 0.3, paths=50000, seed=0)
+    assert stats["mean"] == pytest.approx(expected_cost, abs=4 * np.sqrt(variance / 50000))
+    assert stats["std"] ** 2 == pytest.approx(variance, rel=0.05)
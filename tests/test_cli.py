@@ -0,0 +1,48 @@
+import json
+import sys
+
+import pytest
+
+import cli
+from data.synthetic_feed import SyntheticFeed
+from data.tick_capture import TickRecorder
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+def test_parquet_batches_share_a_schema_of_every_passthrough_column(tmp_path):
+    # The first batch has no order id and integer tags; later ones have both, with a string tag
+    rows = [{"quantity": 100, "tag": 1}, {"quantity": 200, "tag": 2},
+            {"quantity": 300, "tag": "hedge", "order_id": "a"}, {"quantity": 400, "order_id": "b", "side": "sell"},
+            {"quantity": 500, "tag": 3.5}]
+    orders = [cli.parse_order(row) for row in rows]
+    path = str(tmp_path / "results.parquet")
+    results = list(cli.write_parquet(cli.price_orders(orders, None, processes=1), path,
+                                     cli.result_schema(orders), batch_rows=2))
+
+    table = pq.read_table(path)
+    assert table.num_rows == len(rows) and pq.ParquetFile(path).num_row_groups == 3
+    assert table.column("order_id").to_pylist() == [None, None, "a", "b", None]
+    assert table.column("tag").to_pylist() == ["1", "2", "hedge", None, "3.5"]
+    assert table.column("side").to_pylist() == ["buy", "buy", "buy", "sell", "buy"]
+    assert table.column("optimal_trajectory").to_pylist() == [result["optimal_trajectory"] for result in results]
+    # The yielded results are left as priced
+    assert results[0]["tag"] == 1
+
+def test_main_prices_orders_against_a_capture(tmp_path, monkeypatch):
+    recorder = TickRecorder(str(tmp_path / "capture"), depth=20)
+    for index, message in enumerate(SyntheticFeed(seed=2, depth=20).messages(20)):
+        recorder.record(message, recv_time=float(index))
+    recorder.close()
+    orders = tmp_path / "orders.jsonl"
+    orders.write_text("\n".join(json.dumps({"id": index, "quantity": 1000 * (index + 1), "time_steps": 10})
+                                for index in range(3)))
+    output = tmp_path / "results.parquet"
+    monkeypatch.setattr(sys, "argv", ["cli.py", str(orders), "--capture", str(tmp_path / "capture"),
+                                      "--exchange", "okx", "--symbol", "BTC-USDT-SWAP",
+                                      "--output", str(output), "--processes", "1"])
+    cli.main()
+
+    table = pq.read_table(str(output))
+    assert table.column("id").to_pylist() == [0, 1, 2]
+    assert all(value > 0 for value in table.column("net_cost").to_pylist())
+    assert [sum(path) for path in table.column("optimal_trajectory").to_pylist()] == [1000, 2000, 3000]
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from data.cost_surface import SIDES, CostSurface
+from data.feed_manager import SnapshotStore
+from data.orderbook import OrderBook
+from data.synthetic_feed import SyntheticFeed
+from models.trade_metrics import get_trade_metrics
+
+SIZES = (100.0, 1000.0, 10000.0, 100000.0, 1000000.0)
+
+def full_surface(version, snapshot):
+    """The surface of a book priced from scratch."""
+    store = SnapshotStore()
+    CostSurface(store, SIZES, max_rate=0).update(version, snapshot)
+    return store.latest()
+
+def assert_same_costs(surface, expected):
+    for side in SIDES:
+        np.testing.assert_allclose(surface.slippage[side], expected.slippage[side], rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(surface.market_impact[side], expected.market_impact[side], rtol=1e-9,
+                                   atol=1e-9)
+
+def test_levels_appended_behind_the_touch_reprice_partial_fills():
+    store = SnapshotStore()
+    surface = CostSurface(store, SIZES, max_rate=0)
+    book = OrderBook("BTC-USDT-SWAP")
+    book.apply_snapshot([["99", "1"]], [["101", "0.5"], ["102", "0.5"]], seq=1)
+    surface.update(1, book.snapshot())
+
+    book.apply_delta([], [["103", "5"]], seq=2, prev_seq=1)
+    snapshot = book.snapshot()
+    surface.update(2, snapshot)
+    latest = store.latest()
+    # Only the buy sizes that did not fit into the old 101.5 USD of asks are repriced
+    assert latest.recomputed == len(SIZES) - 1
+    assert_same_costs(latest, full_surface(2, snapshot))
+    assert latest.slippage["buy"][2] == pytest.approx(get_trade_metrics(snapshot, SIZES[2], "Regular")["slippage"])
+
+def test_incremental_surface_matches_full_recompute():
+    store = SnapshotStore()
+    surface = CostSurface(store, SIZES, max_rate=0)
+    book = OrderBook("BTC-USDT-SWAP")
+    skipped = 0
+    for version, message in enumerate(SyntheticFeed(seed=5, depth=30, move_probability=0.3).messages(400), 1):
+        book.apply_message(message)
+        snapshot = book.snapshot()
+        surface.update(version, snapshot)
+        latest = store.latest()
+        assert latest.book_version == version
+        assert_same_costs(latest, full_surface(version, snapshot))
+        skipped += 2 * len(SIZES) - latest.recomputed
+    # Unchanged sizes were reused rather than repriced
+    assert skipped > 0
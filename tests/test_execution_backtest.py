@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from data.synthetic_feed import SyntheticFeed
+from data.tick_capture import TickRecorder, load_capture
+from utils.execution_backtest import backtest_execution, books_from_capture
+
+def capture(tmp_path, skip=()):
+    recorder = TickRecorder(str(tmp_path), depth=50)
+    for index, message in enumerate(SyntheticFeed(seed=0, depth=50).messages(40)):
+        if index not in skip:
+            recorder.record(message, recv_time=1000.0 + index)
+    recorder.close()
+    return load_capture(str(tmp_path))
+
+def test_rejected_records_are_counted(tmp_path):
+    assert books_from_capture(capture(tmp_path / "clean"))["rejected"] == 0
+    # After the gap every later delta is rejected, since no new snapshot follows
+    books = books_from_capture(capture(tmp_path / "gap", skip=(10,)))
+    assert books["rejected"] == 29
+    np.testing.assert_array_equal(books["bid_prices"][-1], books["bid_prices"][9])
+
+    result = backtest_execution(books, [1.0, 1.0], 1.0, start_indices=[0, 5], processes=1)
+    assert result["rejected"] == 29
+
+def test_quote_trajectories_match_base_at_arrival_mid(tmp_path):
+    books = books_from_capture(capture(tmp_path))
+    starts = np.array([0, 7, 20])
+    usd = np.array([[30000.0, 20000.0, 10000.0]])
+    quote = backtest_execution(books, usd, 1.0, start_indices=starts, side="buy", unit="quote", processes=1)
+
+    arrival_mid = (books["bid_prices"][starts, 0] + books["ask_prices"][starts, 0]) / 2
+    for column, start in enumerate(starts):
+        base = backtest_execution(books, usd / arrival_mid[column], 1.0, start_indices=[start], side="buy",
+                                  processes=1)
+        for key in ("shortfall", "average_price", "unfilled", "shortfall_bps"):
+            assert quote[key][0, column] == pytest.approx(base[key][0, 0], rel=1e-12)
+
+    with pytest.raises(ValueError):
+        backtest_execution(books, usd, 1.0, unit="shares", processes=1)
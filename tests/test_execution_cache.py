@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from utils.almgren_chriss import optimal_execution
+from utils.execution_cache import ExecutionCache
+
+@pytest.mark.parametrize("total_shares, options", [
+    (200, {"lot_size": 1}),
+    (2000, {"max_states": 101}),
+    (2000, {"max_states": 101, "solver": "monotone"}),
+])
+def test_tail_reuse_matches_direct_solve(total_shares, options):
+    model = (0.001, 1.5, 1.0, 0.05, 0.05, 0.3)
+    cache = ExecutionCache()
+    cache.get_or_solve(40, total_shares, *model, method="dp", **options)
+    cached = cache.get_or_solve(15, total_shares, *model, method="dp", **options)
+    assert cache.stats()["tail_hits"] == 1 and cache.stats()["misses"] == 1
+
+    direct = optimal_execution(15, total_shares, *model, method="dp", **options)
+    np.testing.assert_allclose(cached[0], direct[0], rtol=1e-12)
+    np.testing.assert_array_equal(cached[1], direct[1])
+    np.testing.assert_array_equal(cached[2], direct[2])
+    np.testing.assert_array_equal(cached[3], direct[3])
+
+def test_cached_results_are_read_only():
+    cache = ExecutionCache()
+    result = cache.get_or_solve(10, 100, 0.001, 0.5, 0.5, 0.05, 0.05, 0.3, method="dp")
+    assert cache.get_or_solve(10, 100, 0.001, 0.5, 0.5, 0.05, 0.05, 0.3, method="dp") is result
+    assert cache.stats()["hits"] == 1
+    with pytest.raises(ValueError):
+        result[2][0, 0] = 0
+
+def test_tail_results_do_not_share_memory_with_the_longer_entry():
+    model = (0.001, 1.5, 1.0, 0.05, 0.05, 0.3)
+    cache = ExecutionCache()
+    base = cache.get_or_solve(40, 200, *model, method="dp", lot_size=1)
+    tail = cache.get_or_solve(15, 200, *model, method="dp", lot_size=1)
+    assert cache.stats()["tail_hits"] == 1
+    arrays = [part for part in base if isinstance(part, np.ndarray)]
+    for part in tail:
+        if isinstance(part, np.ndarray):
+            assert not any(np.shares_memory(part, array) for array in arrays)
@@ -0,0 +1,41 @@
+import threading
+
+import numpy as np
+
+from utils.almgren_chriss import trajectory_cost, trajectory_objective
+from utils.execution_sweep import _pool_context, efficient_frontier, sweep_execution
+
+RISK_AVERSIONS = (1e-4, 1e-3, 1e-2, 1e-1)
+
+def test_frontier_cost_does_not_depend_on_risk_aversion():
+    table = efficient_frontier(20, 500, RISK_AVERSIONS, processes=1, alpha=0.5, beta=0.5, method="dp")
+    for row, risk_aversion in enumerate(table["risk_aversion"]):
+        inventory_path = 500 - np.concatenate(([0], np.cumsum(table["trajectory"][row])))
+        # The same schedule costs the same whatever risk aversion is used to price it
+        for other in RISK_AVERSIONS:
+            expected_cost, variance = trajectory_cost(inventory_path, other, 0.5, 0.5, 0.05, 0.05, 0.3)
+            assert expected_cost == table["expected_cost"][row]
+            assert variance == table["variance"][row]
+        assert table["objective"][row] == trajectory_objective(inventory_path, risk_aversion, 0.5, 0.5, 0.05,
+                                                               0.05, 0.3)
+    # More risk aversion trades faster: more impact cost for less variance
+    assert np.all(np.diff(table["expected_cost"]) >= 0)
+    assert np.all(np.diff(table["variance"]) <= 0)
+    assert table["efficient"].all()
+
+def test_pool_matches_in_process_sweep():
+    grid = [{"risk_aversion": risk_aversion} for risk_aversion in RISK_AVERSIONS]
+    serial = sweep_execution(grid, 15, 300, processes=1, alpha=1.5, beta=1.5, method="dp")
+    pooled = sweep_execution(grid, 15, 300, processes=2, alpha=1.5, beta=1.5, method="dp")
+    for key in ("expected_cost", "variance", "objective", "trajectory"):
+        np.testing.assert_array_equal(pooled[key], serial[key])
+
+def test_pool_does_not_fork_with_threads_running():
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        assert _pool_context().get_start_method() != "fork"
+    finally:
+        stop.set()
+        thread.join()
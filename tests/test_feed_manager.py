@@ -0,0 +1,99 @@
+import asyncio
+
+import numpy as np
+
+from data import feed_manager as feed_module
+from data.feed_manager import FeedManager
+from data.synthetic_feed import SyntheticFeed
+
+def run_stream(manager, stream, done, timeout=5.0):
+    """Runs one stream's tasks on a fresh loop until done() holds."""
+    async def main():
+        manager._loop = asyncio.get_running_loop()
+        manager._start_stream(stream)
+        try:
+            while not done():
+                await asyncio.sleep(0.01)
+        finally:
+            manager._stop_stream(stream)
+
+    asyncio.run(asyncio.wait_for(main(), timeout))
+
+def test_failing_stage_and_source_do_not_stop_the_feed(monkeypatch):
+    monkeypatch.setattr(feed_module, "RECONNECT_DELAY", 0.01)
+    attempts = []
+
+    def source():
+        attempts.append(len(attempts))
+        failing = len(attempts) == 1
+
+        async def frames():
+            for index, frame in enumerate(SyntheticFeed(seed=0, depth=20).frames(30)):
+                if failing and index == 5:
+                    raise ConnectionResetError("replay interrupted")
+                yield frame
+                await asyncio.sleep(0)
+        return frames()
+
+    def broken_update(snapshot):
+        raise RuntimeError("model update failed")
+
+    manager = FeedManager(url_template="ws://localhost/{exchange}/{symbol}")
+    stream = manager.add_feed("okx", "BTC-USDT-SWAP", source=source)
+    monkeypatch.setattr(stream.models, "update", broken_update)
+    run_stream(manager, stream, lambda: stream.book.valid and stream.book.seq == 30 and not stream.frames)
+
+    assert attempts == [0, 1] and stream.reconnects == 1
+    # Publishing went on past the failing model update, and the later stages still ran
+    assert stream.store.version > 5
+    assert any(len(series) for series in stream.candles.series.values())
+    assert len(stream.calibration.impact) > 0
+    assert stream.costs_store.version > 0
+
+def test_failing_subscriber_does_not_stop_publishing():
+    store = feed_module.SnapshotStore()
+    received = []
+
+    def broken(version, snapshot):
+        raise RuntimeError("subscriber failed")
+
+    store.subscribe(broken)
+    store.subscribe(lambda version, snapshot: received.append(version))
+    assert store.publish("first") == 1 and store.publish("second") == 2
+    assert received == [1, 2]
+
+def drain(stream):
+    book = feed_module.OrderBook()
+    while stream.frames:
+        book.apply_message(feed_module._decode_frame(stream.frames.popleft()[2]))
+    return book
+
+def test_full_queue_merges_deltas_instead_of_dropping_them():
+    feed = SyntheticFeed(seed=5, depth=30, checksum=True)
+    stream = feed_module.FeedStream("okx", "BTC-USDT-SWAP", "ws://localhost", queue_size=8)
+    live = feed_module.OrderBook()
+    for frame in feed.frames(200):
+        stream.push(frame)
+        live.apply_message(feed_module._loads(frame))
+    assert len(stream.frames) <= 8 and stream.dropped == 0
+
+    book = drain(stream)
+    assert book.valid and book.seq == live.seq == 200
+    np.testing.assert_array_equal(book.top_bids(30), live.top_bids(30))
+    np.testing.assert_array_equal(book.top_asks(30), live.top_asks(30))
+
+def test_full_queue_drops_frames_before_a_snapshot():
+    feed = SyntheticFeed(seed=6, depth=10, checksum=True)
+    stream = feed_module.FeedStream("okx", "BTC-USDT-SWAP", "ws://localhost", queue_size=4)
+    # Queued: the first snapshot, deltas 2-4 merged into one and delta 5
+    for frame in feed.frames(5):
+        stream.push(frame)
+    stream.push(feed.snapshot())
+    for _ in range(4):
+        stream.push(feed.update())
+
+    # The snapshot at seq 6 superseded the three entries before it; deltas 7-9 were merged
+    assert stream.dropped == 3
+    assert [feed_module._decode_frame(frame)["seqId"] for _, _, frame in stream.frames] == [6, 9, 10]
+    book = drain(stream)
+    assert book.valid and book.seq == 10
@@ -0,0 +1,29 @@
+import threading
+
+from utils.latency_tracker import LatencyHistogram
+
+def record_in_thread(histogram, values):
+    thread = threading.Thread(target=lambda: [histogram.record(ns) for ns in values])
+    thread.start()
+    thread.join()
+
+def test_exited_threads_are_folded_into_one_shard():
+    histogram = LatencyHistogram()
+    for index in range(50):
+        record_in_thread(histogram, [1000 * (index + 1)] * 2)
+    # Only the last thread's shard is kept; the others were retired when the next one started
+    assert len(histogram._shards) == 1
+
+    histogram.record(10 ** 9)
+    counts, count, total, maximum = histogram.merged()
+    assert count == sum(counts) == 101
+    assert total == 2 * 1000 * sum(range(1, 51)) + 10 ** 9
+    assert maximum == 10 ** 9
+    assert histogram.summary()["p50_ms"] > 0
+
+def test_reset_clears_retired_counts():
+    histogram = LatencyHistogram()
+    record_in_thread(histogram, [1000])
+    record_in_thread(histogram, [1000])
+    histogram.reset()
+    assert histogram.merged()[1] == 0
@@ -0,0 +1,26 @@
+import io
+import logging
+
+from utils.logger import RateLimitFilter, log_event, setup_logger
+
+def test_each_feed_has_its_own_window():
+    rate_limit = RateLimitFilter(burst=2, interval=10.0)
+    message = "Order book out of sync, waiting for next snapshot"
+    assert [rate_limit.allow("feeds", logging.WARNING, message, 0.0, "okx/BTC-USDT-SWAP")[0]
+            for _ in range(3)] == [True, True, False]
+    # Another instrument's first errors still pass
+    assert rate_limit.allow("feeds", logging.WARNING, message, 1.0, "okx/ETH-USDT-SWAP") == (True, 0)
+    # The next window reports what was suppressed for that feed only
+    assert rate_limit.allow("feeds", logging.WARNING, message, 10.0, "okx/BTC-USDT-SWAP") == (True, 1)
+    assert rate_limit.allow("feeds", logging.WARNING, message, 11.0, "okx/ETH-USDT-SWAP") == (True, 0)
+
+def test_log_event_limits_per_feed():
+    stream = io.StringIO()
+    logger = setup_logger("test_log_event_limits_per_feed", stream=stream)
+    for feed in ("okx/BTC-USDT-SWAP", "okx/ETH-USDT-SWAP"):
+        for _ in range(8):
+            log_event(logger, logging.WARNING, "Parsing error", feed=feed, error="bad frame")
+    logger.handlers[0].queue.join()  # Wait for the writer thread
+    lines = stream.getvalue().splitlines()
+    assert sum("feed=okx/BTC-USDT-SWAP" in line for line in lines) == 5
+    assert sum("feed=okx/ETH-USDT-SWAP" in line for line in lines) == 5
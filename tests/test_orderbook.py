@@ -0,0 +1,82 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from data.feed_manager import FeedManager
+from data.orderbook import ChecksumError, OrderBook, SequenceGapError
+from data.synthetic_feed import SyntheticFeed
+
+def okx_checksum(bids, asks):
+    parts = []
+    for i in range(max(len(bids), len(asks))):
+        if i < len(bids):
+            parts += bids[i][:2]
+        if i < len(asks):
+            parts += asks[i][:2]
+    value = zlib.crc32(":".join(parts).encode())
+    return value - (1 << 32) if value >= (1 << 31) else value
+
+def message(action, bids, asks, seq, prev_seq=-1, checksum=None):
+    return {"timestamp": "2025-01-01T00:00:00.000Z", "exchange": "okx", "symbol": "BTC-USDT-SWAP",
+            "action": action, "bids": bids, "asks": asks, "seqId": seq, "prevSeqId": prev_seq,
+            "checksum": checksum}
+
+def test_checksum_uses_the_strings_as_sent():
+    bids = [["100.10", "0.10", "0", "1"], ["100.0", "2"]]
+    asks = [["100.2", "1.500", "0", "1"]]
+    book = OrderBook()
+    book.apply_message(message("snapshot", bids, asks, 1, checksum=okx_checksum(bids, asks)))
+    assert book.valid
+
+    delta_bids = [["100.0", "2.50"]]
+    book.apply_message(message("update", delta_bids, [], 2, 1,
+                               checksum=okx_checksum([bids[0], delta_bids[0]], asks)))
+    assert book.valid and book.best_bid() == 100.1
+
+def test_checksum_mismatch_invalidates_until_snapshot():
+    book = OrderBook()
+    book.apply_message(message("snapshot", [["100", "1"]], [["101", "1"]], 1))
+    with pytest.raises(ChecksumError):
+        book.apply_message(message("update", [["100", "2"]], [], 2, 1, checksum=12345))
+    assert not book.valid
+    with pytest.raises(SequenceGapError):
+        book.apply_message(message("update", [["100", "3"]], [], 3, 2))
+    book.apply_message(message("snapshot", [["99", "1"]], [["101", "1"]], 4))
+    assert book.valid and book.best_bid() == 99.0
+
+def test_sequence_gap_invalidates_until_snapshot():
+    book = OrderBook()
+    book.apply_message(message("snapshot", [["100", "1"]], [["101", "1"]], 1))
+    with pytest.raises(SequenceGapError):
+        book.apply_message(message("update", [["100", "2"]], [], 3, 2))
+    assert not book.valid and book.seq == 1
+    book.apply_message(message("snapshot", [["100", "2"]], [["101", "1"]], 3))
+    book.apply_message(message("update", [["100", "0"]], [], 4, 3))
+    assert book.valid and np.isnan(book.best_bid())
+
+def test_synthetic_checksums_verify():
+    feed = SyntheticFeed(seed=3, depth=40, checksum=True)
+    book = OrderBook()
+    for data in feed.messages(300):
+        book.apply_message(data)
+    assert book.valid and book.seq == 300
+
+def test_gap_requests_one_resubscribe():
+    manager = FeedManager(url_template="ws://localhost/{exchange}/{symbol}")
+    stream = manager.add_feed("okx", "BTC-USDT-SWAP")
+    frames = [message("snapshot", [["100", "1"]], [["101", "1"]], 1),
+              message("update", [["100", "2"]], [], 3, 2),
+              message("update", [["100", "3"]], [], 4, 3)]
+    assert [manager._apply_frame(stream, 0.0, 0, frame) for frame in frames[:2]] == [True, False]
+    assert stream.resync and not stream.book.valid
+    # Updates queued before the new snapshot arrives do not ask again
+    stream.resync = False
+    assert not manager._apply_frame(stream, 0.0, 0, frames[2])
+    assert not stream.resync
+
+    # A gap in a replay cannot be fixed by subscribing again
+    replay = manager.add_feed("okx", "ETH-USDT-SWAP", source=lambda: iter(()))
+    for frame in frames:
+        manager._apply_frame(replay, 0.0, 0, frame)
+    assert not replay.resync
@@ -0,0 +1,90 @@
+import pytest
+
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+import server
+from data.book_broadcast import snapshot_to_dict
+from data.synthetic_feed import SyntheticFeed
+
+@pytest.fixture
+def client(monkeypatch):
+    # Books are published by the tests, not by a connection to the exchange
+    monkeypatch.setattr(server, "run_in_thread", lambda: None)
+    with TestClient(server.app) as client:
+        yield client
+
+@pytest.fixture
+def publish():
+    """Publishes the next synthetic book of the default instrument, like the feed thread does."""
+    stream = server.feed_manager.stream(server.DEFAULT_EXCHANGE, server.DEFAULT_SYMBOL)
+    messages = SyntheticFeed(symbol=server.DEFAULT_SYMBOL, seed=0, depth=60).messages(1000)
+
+    def publish(count=1):
+        for _ in range(count):
+            stream.book.apply_message(next(messages))
+        return stream.store.publish(stream.book.snapshot())
+    return publish
+
+def apply_diff(book, diff):
+    """The client side of the push channel: patches a pushed book with a diff."""
+    book = dict(book, **{key: value for key, value in diff.items() if key not in ("bids", "asks")})
+    for side, descending in (("bids", True), ("asks", False)):
+        levels = dict(map(tuple, book[side]))
+        for price, size in diff.get(side, []):
+            if size:
+                levels[price] = size
+            else:
+                levels.pop(price, None)
+        book[side] = [list(level) for level in sorted(levels.items(), reverse=descending)]
+    return book
+
+def test_book(client, publish):
+    version = publish()
+    response = client.get("/book", params={"depth": 5})
+    assert response.status_code == 200
+    book = response.json()
+    assert book["version"] == version and book["valid"]
+    assert len(book["bids"]) == len(book["asks"]) == 5
+    assert book["bids"][0][0] < book["asks"][0][0]
+    assert client.get("/book", params={"symbol": "NOPE"}).status_code == 404
+
+def test_metrics(client, publish):
+    version = publish()
+    response = client.get("/metrics", params={"quantity": 5000, "side": "sell"})
+    assert response.status_code == 200
+    metrics = response.json()
+    assert metrics["version"] == version
+    assert metrics["net_cost"] == pytest.approx(metrics["slippage"] + metrics["fees"] + metrics["market_impact"])
+
+def test_simulate(client):
+    response = client.post("/simulate", json={"time_steps": 10, "total_shares": 200, "alpha": 0.5, "beta": 0.5,
+                                              "distribution": True})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inventory_path"][0] == 200 and result["inventory_path"][-1] == 0
+    assert sum(result["optimal_trajectory"]) == 200
+    assert result["objective"] > 0 and result["variance"] > 0
+    assert "mean" in result["cost_distribution"]
+    assert client.post("/simulate", json={"time_steps": 10}).status_code == 422
+
+def test_chart(client):
+    response = client.get("/chart")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert "/ws/book/" in response.text
+
+def test_push_channel_diff_round_trip(client, publish):
+    publish()
+    path = f"/ws/book/{server.DEFAULT_EXCHANGE}/{server.DEFAULT_SYMBOL}"
+    with client.websocket_connect(path) as websocket:
+        book = websocket.receive_json()
+        stream = server.feed_manager.stream(server.DEFAULT_EXCHANGE, server.DEFAULT_SYMBOL)
+        assert book == snapshot_to_dict(*stream.store.get())
+
+        version = publish(count=2)
+        diff = websocket.receive_json()
+        assert diff["version"] == version
+        # Only changes are sent, and they rebuild the full book
+        assert len(diff.get("bids", [])) + len(diff.get("asks", [])) < 2 * len(book["bids"])
+        assert apply_diff(book, diff) == snapshot_to_dict(*stream.store.get())
@@ -0,0 +1,92 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from data.orderbook import OrderBook
+from data.shared_book import SharedBookReader, SharedBookWriter, TornReadError
+from data.synthetic_feed import SyntheticFeed
+
+@pytest.fixture
+def segment(request):
+    writer = SharedBookWriter(f"test_book_{os.getpid()}_{request.node.name}"[:60], depth=50)
+    reader = SharedBookReader(writer.name)
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+def uniform_book(value, levels=40):
+    """A book whose sizes all equal value, so a torn read shows up as mixed sizes."""
+    book = OrderBook("BTC-USDT-SWAP")
+    book.apply_snapshot([[str(100 - i), str(value)] for i in range(levels)],
+                        [[str(101 + i), str(value)] for i in range(levels)], seq=int(value))
+    return book.snapshot()
+
+def test_round_trip(segment):
+    writer, reader = segment
+    assert reader.read() == (0, None)
+
+    book = OrderBook("BTC-USDT-SWAP")
+    for message in SyntheticFeed(seed=1, depth=80).messages(10):
+        book.apply_message(message)
+    snapshot = book.snapshot()
+    writer.write(7, snapshot)
+
+    version, copy = reader.get()
+    assert version == 7 and reader.version == 7
+    assert copy.symbol == snapshot.symbol and copy.seq == snapshot.seq and copy.valid
+    # Cut to the segment's depth of 50 levels per side
+    np.testing.assert_array_equal(copy.bid_prices, snapshot.bid_prices[:50])
+    np.testing.assert_array_equal(copy.ask_sizes, snapshot.ask_sizes[:50])
+    assert copy.mid_price == snapshot.mid_price
+    assert not copy.bid_prices.flags.writeable
+
+    _, view = reader.read(lambda view: view)
+    np.testing.assert_allclose(view.ask_cum_notional, np.cumsum(copy.ask_prices * copy.ask_sizes))
+
+def test_read_retries_when_the_writer_overtakes_it(segment):
+    writer, reader = segment
+    writer.write(1, uniform_book(1))
+    calls = []
+
+    def read_sizes(view):
+        calls.append(view.version)
+        if len(calls) == 1:
+            writer.write(2, uniform_book(2))
+        return view.bid_sizes.copy()
+
+    version, sizes = reader.read(read_sizes)
+    assert calls == [1, 2]
+    assert version == 2 and np.all(sizes == 2)
+
+def test_read_gives_up_on_a_write_in_progress(segment):
+    writer, reader = segment
+    writer.write(1, uniform_book(1))
+    writer.record["sequence"] += 1
+    with pytest.raises(TornReadError):
+        reader.read(max_attempts=5)
+    writer.record["sequence"] += 1
+    assert reader.read()[0] == 1
+
+def test_concurrent_reads_are_never_torn(segment):
+    writer, reader = segment
+    books = [uniform_book(value) for value in range(1, 6)]
+    stop = threading.Event()
+
+    def write():
+        version = 0
+        while not stop.is_set():
+            version += 1
+            writer.write(version, books[version % len(books)])
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    try:
+        for _ in range(2000):
+            version, sizes = reader.read(lambda view: np.concatenate((view.bid_sizes, view.ask_sizes)))
+            if version:
+                assert np.all(sizes == sizes[0]) and len(sizes) == 80
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,30 @@
+import pytest
+
+from data.synthetic_feed import SyntheticFeed
+from data.orderbook import OrderBook
+from models import depth_walk
+from models.trade_metrics import get_trade_metrics
+
+def snapshot_of(symbol, seed):
+    book = OrderBook(symbol)
+    for message in SyntheticFeed(symbol=symbol, seed=seed, depth=50).messages(5):
+        book.apply_message(message)
+    return book.snapshot()
+
+def test_old_volatility_argument_is_rejected():
+    snapshot = snapshot_of("BTC-USDT-SWAP", 0)
+    with pytest.raises(TypeError):
+        get_trade_metrics(snapshot, 1000.0, 2.5, "Regular")
+    assert get_trade_metrics(snapshot, 1000.0, "Regular")["slippage"] > 0
+
+def test_ladders_are_kept_per_symbol():
+    btc, eth = snapshot_of("BTC-USDT-SWAP", 0), snapshot_of("ETH-USDT-SWAP", 1)
+    btc_ladders = depth_walk.book_ladders(btc)
+    eth_ladders = depth_walk.book_ladders(eth)
+    # Pricing another feed in between does not evict this one's ladders
+    assert depth_walk.book_ladders(btc) is btc_ladders
+    assert depth_walk.book_ladders(eth) is eth_ladders
+    assert btc_ladders[1].best_price == btc.best_ask
+
+    newer = snapshot_of("BTC-USDT-SWAP", 2)
+    assert depth_walk.book_ladders(newer)[1].best_price == newer.best_ask
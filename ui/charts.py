@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+from data.candles import downsample
+
+# Bounds of the adaptive autorefresh interval in milliseconds
+MIN_REFRESH_MS = 250
+MAX_REFRESH_MS = 5000
+
+# Candles drawn at most, by every candle chart: about one per two pixels of a full-width chart;
+# older ones stay in the aggregator's ring buffers
+MAX_CANDLE_POINTS = 400
+
+# Depth levels drawn per side
+DEPTH_LEVELS = 20
+
+def adaptive_refresh_interval(publish_rate):
+    """
+    Autorefresh interval matching how often the book actually changes.
+
+    A busy book is redrawn at most every MIN_REFRESH_MS; a quiet one is
+    polled less often, down to every MAX_REFRESH_MS, instead of rerunning
+    the whole script every second for nothing.
+    """
+    if publish_rate <= 0:
+        return MAX_REFRESH_MS
+    return int(min(max(1000 / publish_rate, MIN_REFRESH_MS), MAX_REFRESH_MS))
+
+def depth_figure():
+    """Order book depth chart with empty bid and ask traces, filled by update_depth_figure."""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=[], y=[], name='Bids', marker_color='green', opacity=0.7))
+    fig.add_trace(go.Bar(x=[], y=[], name='Asks', marker_color='red', opacity=0.7))
+    fig.update_layout(
+        title="Orderbook Depth",
+        xaxis_title="Price",
+        yaxis_title="Size",
+        barmode='group',  # or 'overlay' for stacked bars
+        xaxis=dict(side="left"),
+        yaxis=dict(side="right"),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        uirevision="depth",  # keep the user's zoom and pan across updates
+    )
+    return fig
+
+def update_depth_figure(fig, snapshot, depth=DEPTH_LEVELS):
+    """
+    Replaces only the data of the two bar traces, keeping traces and layout.
+
+    Returns:
+    - changed: Whether any drawn level differs from the figure's current data
+    """
+    changed = False
+    for trace, prices, sizes in ((fig.data[0], snapshot.bid_prices, snapshot.bid_sizes),
+                                 (fig.data[1], snapshot.ask_prices, snapshot.ask_sizes)):
+        # Levels arrive parsed and sorted best first; just take the top `depth`
+        prices, sizes = prices[:depth], sizes[:depth]
+        if (trace.x is None or len(trace.x) != len(prices) or not np.array_equal(trace.x, prices)
+                or not np.array_equal(trace.y, sizes)):
+            trace.x, trace.y = prices, sizes
+            changed = True
+    return changed
+
+def candle_figure():
+    """Candlestick chart with an empty trace, filled by update_candle_figure."""
+    fig = go.Figure(data=[go.Candlestick(
+        x=[], open=[], high=[], low=[], close=[],
+        name='Price',
+        increasing=dict(line=dict(color='#069039', width=1), fillcolor='#069039'),
+        decreasing=dict(line=dict(color='#CE2121', width=1), fillcolor='#CE2121'),
+    )])
+    fig.update_layout(
+        title="Candlestick Chart",
+        yaxis_title="Price (USD)",
+        xaxis_title="Time",
+        xaxis_showgrid=False,
+        yaxis_showgrid=True,
+        plot_bgcolor='white',
+        margin=dict(l=10, r=10, t=30, b=10),
+        showlegend=False,
+        font=dict(family="Arial, sans-serif", size=10, color="#333"),
+        xaxis_rangeslider_visible=False,
+        uirevision="candles",
+    )
+    fig.update_yaxes(gridcolor="#e0e0e0", zerolinecolor="#999", tickformat='.2f')
+    fig.update_xaxes(tickangle=-45, gridcolor="#e0e0e0", zerolinecolor="#999")
+    return fig
+
+def update_candle_figure(fig, candles, max_points=MAX_CANDLE_POINTS):
+    """Sets the candle trace to the given candles, downsampled to at most max_points."""
+    candles = downsample(candles, max_points)
+    fig.data[0].update(
+        x=pd.to_datetime(candles['time'], unit='s'),
+        open=candles['open'],
+        high=candles['high'],
+        low=candles['low'],
+        close=candles['close'],
+    )
+
+COST_FIELDS = (("slippage", "Slippage"), ("fees", "Fees"), ("market_impact", "Impact"), ("net_cost", "Net Cost"))
+
+def cost_surface_frame(surface):
+    """
+    Table of a surface_to_dict() cost surface: one row per order size,
+    (side, cost) columns in USD.
+    """
+    columns = {(side.capitalize(), label): surface[side][field]
+               for side in ("buy", "sell") for field, label in COST_FIELDS}
+    frame = pd.DataFrame(columns, index=pd.Index(surface["sizes"], name="Size (USD)"))
+    frame.columns = pd.MultiIndex.from_tuples(frame.columns)
+    return frame
+
+def cost_surface_figure(surface):
+    """Heatmap of every cost of a surface_to_dict() cost surface in bps of the order size, per side."""
+    sizes = np.asarray(surface["sizes"])
+    rows = [f"{side.capitalize()} {label}" for side in ("buy", "sell") for _, label in COST_FIELDS]
+    bps = np.array([np.asarray(surface[side][field]) / sizes * 1e4
+                    for side in ("buy", "sell") for field, _ in COST_FIELDS])
+    fig = go.Figure(go.Heatmap(
+        z=bps, x=[f"{size:,.0f}" for size in sizes], y=rows, colorscale="YlOrRd",
+        text=np.round(bps, 2), texttemplate="%{text}", colorbar=dict(title="bps"),
+    ))
+    fig.update_layout(title="Live Cost Surface (bps of order size)", xaxis_title="Order Size (USD)",
+                      yaxis=dict(autorange="reversed"), margin=dict(l=10, r=10, t=30, b=10), uirevision="costs")
+    return fig
@@ -1,22 +1,25 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objs as go
-from data.websocket_client import latest_orderbook, run_in_thread, get_trade_metrics
+from data.websocket_client import feed_manager, run_in_thread, get_trade_metrics
 from streamlit_autorefresh import st_autorefresh
-from utils.almgren_chriss import optimal_execution
+from utils.execution_cache import cached_optimal_execution, start_prewarm
+from config.settings import PREWARM_EXECUTION_CACHE
+from data.candles import RESOLUTIONS, RESOLUTION_LABELS
+from ui.charts import MAX_CANDLE_POINTS, adaptive_refresh_interval, candle_figure, update_candle_figure
 import datetime
+import numpy as np
 
-# Start websocket listener once
-if 'ws_thread_started' not in st.session_state:
-    run_in_thread()
-    st.session_state.ws_thread_started = True
+# Start the shared feed thread (only the first session of the process starts it)
+run_in_thread()
+
+# Precompute common slider positions in the shared solver cache
+if PREWARM_EXECUTION_CACHE:
+    start_prewarm()
 
 st.set_page_config(layout="wide")
 st.title("GoQuant Real-time Trade Simulator")
 
-# Auto-refresh every 1 second to update orderbook and metrics
-st_autorefresh(interval=1000, limit=None, key="refresh")
-
 # Layout: 3 columns
 col1, spacer1, col2, spacer2, col3 = st.columns([1.2, 0.2, 2.4, 0.2, 1.2])
 
@@ -29,8 +32,12 @@ with header_col2:
 
 with col1:
     st.header("Input Parameters")
-    exchange = st.selectbox("Exchange", ["OKX"], disabled=True)
-    asset = st.selectbox("Spot Asset", ["BTC-USDT-SWAP"], disabled=True)
+    exchange = st.selectbox("Exchange", feed_manager.exchanges(), format_func=str.upper)
+    asset = st.selectbox("Spot Asset", feed_manager.symbols(exchange))
+
+    # Rerun about as often as the selected book changes instead of every second
+    st_autorefresh(interval=adaptive_refresh_interval(feed_manager.stream(exchange, asset).publish_rate),
+                   limit=None, key="refresh")
     order_type = st.selectbox("Order Type", ["market"], disabled=True)
 
     quantity = st.number_input("Quantity (USD)", min_value=10.0, max_value=10000.0, value=100.0, step=10.0)
@@ -50,87 +57,33 @@ with col1:
 with col2:
     st.header("Processed Output")
 
-    orderbook = latest_orderbook
+    stream = feed_manager.stream(exchange, asset)
+    book_version, orderbook = stream.store.get()
 
-    if 'candlestick_data' not in st.session_state:
-        st.session_state.candlestick_data = pd.DataFrame(columns=['time', 'open', 'high', 'low', 'close'])
-        st.session_state.current_candle = {
-            'time': None,
-            'open': None,
-            'high': None,
-            'low': None,
-            'close': None,
-        }
+    # Candles are aggregated by the feed thread for every published book
+    resolution = st.radio("Candle Interval", RESOLUTIONS, format_func=RESOLUTION_LABELS.get, horizontal=True)
+    candles = stream.candles.candles(resolution)
 
     if orderbook:
-        bids = orderbook.get("bids", [])
-        asks = orderbook.get("asks", [])
-
-        bids_df = pd.DataFrame(bids, columns=["price", "size"]).astype(float)
-        asks_df = pd.DataFrame(asks, columns=["price", "size"]).astype(float)
-
-        best_bid = bids_df["price"].max() if not bids_df.empty else 0
-        best_ask = asks_df["price"].min() if not asks_df.empty else 0
-        mid_price = (best_bid + best_ask) / 2 if best_bid and best_ask else 0
+        # Mid price is precomputed by the feed thread
+        mid_price = orderbook.mid_price if np.isfinite(orderbook.mid_price) else 0
         st.metric("Mid Price", f"{mid_price:.2f} USD")
-        now = datetime.datetime.now()
-        current_time = now.strftime("%Y-%m-%d %H:%M:%S")
-
-        if st.session_state.current_candle['time'] is None:
-            st.session_state.current_candle = {
-                'time': current_time,
-                'open': mid_price,
-                'high': mid_price,
-                'low': mid_price,
-                'close': mid_price,
-            }
-        else:
-            st.session_state.current_candle['high'] = max(st.session_state.current_candle['high'], mid_price)
-            st.session_state.current_candle['low'] = min(st.session_state.current_candle['low'], mid_price)
-            st.session_state.current_candle['close'] = mid_price
-
-        if current_time[-2:] != st.session_state.current_candle['time'][-2:]:
-            new_candle_data = pd.DataFrame([st.session_state.current_candle])
-            st.session_state.candlestick_data = pd.concat([st.session_state.candlestick_data, new_candle_data],
-                                                          ignore_index=True)
-            st.session_state.current_candle = {
-                'time': current_time,
-                'open': mid_price,
-                'high': mid_price,
-                'low': mid_price,
-                'close': mid_price,
-            }
-
-        fig = go.Figure(data=[go.Candlestick(
-            x=st.session_state.candlestick_data['time'],
-            open=st.session_state.candlestick_data['open'],
-            high=st.session_state.candlestick_data['high'],
-            low=st.session_state.candlestick_data['low'],
-            close=st.session_state.candlestick_data['close'],
-            name='Price',
-            increasing=dict(line=dict(color='#069039', width=1), fillcolor='#069039'),
-            decreasing=dict(line=dict(color='#CE2121', width=1), fillcolor='#CE2121'),
-        )])
 
-        fig.update_layout(
-            title="Candlestick Chart",
-            yaxis_title="Price (USD)",
-            xaxis_title="Time",
-            xaxis_showgrid=False,
-            yaxis_showgrid=True,
-            plot_bgcolor='white',
-            margin=dict(l=10, r=10, t=30, b=10),
-            showlegend=False,
-            font=dict(family="Arial, sans-serif", size=10, color="#333"),
-        )
-        fig.update_yaxes(gridcolor="#e0e0e0", zerolinecolor="#999", tickformat='.2f')
-        fig.update_xaxes(tickangle=-45, gridcolor="#e0e0e0", zerolinecolor="#999")
-
-        st.plotly_chart(fig, use_container_width=True, clear_figure=False)
+        # Build the chart once; refresh its candle data only when the book or the history changed
+        if 'candle_fig' not in st.session_state:
+            st.session_state.candle_fig = candle_figure()
+        chart_key = (exchange, asset, resolution, book_version, len(candles['time']))
+        if st.session_state.get('candle_chart_key') != chart_key:
+            st.session_state.candle_chart_key = chart_key
+            # Whole history at the chosen interval, merged down to what the chart can show
+            update_candle_figure(st.session_state.candle_fig, candles, MAX_CANDLE_POINTS)
+
+        st.plotly_chart(st.session_state.candle_fig, use_container_width=True, clear_figure=False)
 
         if simulate_btn:
-            st.session_state.latest_metrics = get_trade_metrics(orderbook, quantity, volatility, fee_tier)
-            st.session_state.execution_result = optimal_execution(
+            st.session_state.latest_metrics = get_trade_metrics(orderbook, quantity, fee_tier,
+                                                                models=stream.models)
+            st.session_state.execution_result = cached_optimal_execution(
                 time_steps=time_steps,
                 total_shares=int(quantity),
                 risk_aversion=risk_aversion,
@@ -22,65 +22,574 @@ def hamiltonian(inventory, sell_amount, risk_aversion, alpha, beta, gamma, eta,
     exec_risk = 0.5 * (risk_aversion ** 2) * (volatility ** 2) * time_step * ((inventory - sell_amount) ** 2)
     return temp_impact + perm_impact + exec_risk
 
-def optimal_execution(time_steps, total_shares, risk_aversion, alpha, beta, gamma, eta, volatility=0.3):
+# Length of one trading interval used by the execution model
+TIME_STEP_SIZE = 0.5
+
+# Inputs up to this many shares are cross-checked against the DP in validation mode
+VALIDATION_MAX_SHARES = 500
+
+# Upper bound on the number of (inventory, sell amount) cells evaluated at once,
+# so large orders are processed in row blocks instead of one N x N grid.
+MAX_GRID_CELLS = 1 << 22
+
+# Default cap on inventory levels per time step; larger orders are solved on a
+# lot-size grid so time and memory stay bounded regardless of notional.
+DEFAULT_MAX_STATES = 501
+
+# Sell amounts below one lot tried from every level of a lot-size grid, their
+# remaining inventory valued by interpolating between grid levels; log-spaced
+# when a lot holds more shares
+MAX_FINE_SELLS = 64
+
+# Half-width, in lots, of the fine band first searched around the coarse path
+REFINE_WIDTH_LOTS = 2
+
+# Most band re-solves; the band is re-centred on every refined path and
+# widened while that path still runs into its edge
+MAX_REFINE_PASSES = 64
+
+def inventory_grid(total_shares, lot_size):
+    """
+    Inventory levels 0, lot_size, 2 * lot_size, ... up to and including total_shares.
+    """
+    levels = np.arange(0, total_shares + 1, lot_size)
+    if levels[-1] != total_shares:
+        levels = np.append(levels, total_shares)
+    return levels
+
+def _stage_costs(holdings, targets, risk_aversion, alpha, beta, gamma, eta, volatility, time_step):
     """
-    Computes the optimal trading trajectory using dynamic programming based on the Almgren-Chriss model.
+    Additive stage cost of moving from every holding to every remaining level.
+
+    Parameters:
+    - holdings: Column vector of inventory levels (shares held)
+    - targets: Row vector of inventory levels left after selling
+
+    Returns:
+    - costs: Hamiltonian grid, inf where a target exceeds the holding
+    """
+    sells = holdings - targets
+    feasible = sells >= 0
+    costs = hamiltonian(holdings, np.where(feasible, sells, 0), risk_aversion, alpha, beta, gamma, eta,
+                        volatility, time_step)
+    return np.where(feasible, costs, np.inf)
+
+def _best_targets(costs):
+    """
+    Row-wise minimum of a stage cost grid whose first column is inventory 0.
+
+    Ties are resolved like the original scalar scan: selling the whole
+    inventory wins a tie, otherwise the smallest sell amount does.
+    """
+    rows = np.arange(costs.shape[0])
+    best = costs.shape[1] - 1 - np.argmin(costs[:, ::-1], axis=1)
+    best = np.where(costs[:, 0] <= costs[rows, best], 0, best)
+    return costs[rows, best], best
+
+def _exhaustive_targets(holdings, targets, next_values, model, cache=None):
+    """
+    Scans every admissible target of every holding, one block of holdings at a time.
+
+    When a cache dict is given the stage-cost blocks are stored in it, since
+    they do not depend on the time step.
+
+    Returns:
+    - values, best: As _best_targets
+    - evaluated: Number of (holding, target) candidates costed
+    """
+    size = len(holdings)
+    block = max(1, MAX_GRID_CELLS // len(targets))
+    values = np.empty(size, dtype="float64")
+    best = np.empty(size, dtype="int")
+    for lo in range(0, size, block):
+        hi = min(lo + block, size)
+        width = np.searchsorted(targets, holdings[hi - 1], side="right")
+        costs = cache.get(lo) if cache is not None else None
+        if costs is None:
+            costs = _stage_costs(holdings[lo:hi, None], targets[None, :width], *model, TIME_STEP_SIZE)
+            if cache is not None and block >= size:
+                cache[lo] = costs
+        values[lo:hi], best[lo:hi] = _best_targets(costs + next_values[:width])
+    evaluated = int(np.sum(np.searchsorted(targets, holdings, side="right")))
+    return values, best, evaluated
+
+def _monotone_targets(holdings, targets, next_values, model):
+    """
+    Row-wise minimum assuming the optimal target never decreases as the holding grows.
+
+    Divide and conquer, one recursion level at a time: the middle holding of
+    every open interval is scanned over its admissible targets, and its
+    choice bounds the targets searched by the holdings on either side. Each
+    level is one ragged NumPy evaluation, so a time step costs O(S log S)
+    candidates instead of O(S^2).
+
+    Returns:
+    - values, best: As _best_targets
+    - evaluated: Number of (holding, target) candidates costed
+    """
+    size = len(holdings)
+    limit = np.searchsorted(targets, holdings, side="right") - 1
+    values = np.empty(size, dtype="float64")
+    best = np.empty(size, dtype="int")
+    row_lo, row_hi = np.array([0]), np.array([size - 1])
+    opt_lo, opt_hi = np.array([0]), np.array([len(targets) - 1])
+    evaluated = 0
+
+    while row_lo.size:
+        mid = (row_lo + row_hi) // 2
+        hi = np.minimum(opt_hi, limit[mid])
+        counts = hi - opt_lo + 1
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        rows = np.repeat(mid, counts)
+        candidates = np.repeat(opt_lo - starts, counts) + np.arange(counts.sum())
+
+        costs = hamiltonian(holdings[rows], holdings[rows] - targets[candidates], *model, TIME_STEP_SIZE)
+        costs = costs + next_values[candidates]
+        minima = np.minimum.reduceat(costs, starts)
+        # Largest target among ties, i.e. the smallest sell amount
+        choice = np.maximum.reduceat(np.where(costs == np.repeat(minima, counts), candidates, -1), starts)
+        values[mid], best[mid] = minima, choice
+        evaluated += costs.size
+
+        left, right = row_lo < mid, mid < row_hi
+        row_lo = np.concatenate((row_lo[left], mid[right] + 1))
+        row_hi = np.concatenate((mid[left] - 1, row_hi[right]))
+        opt_lo = np.concatenate((opt_lo[left], choice[right]))
+        opt_hi = np.concatenate((choice[left], opt_hi[right]))
+
+    # Selling the whole inventory wins a tie, as in the exhaustive scan
+    sell_all = hamiltonian(holdings, holdings - targets[0], *model, TIME_STEP_SIZE) + next_values[0]
+    evaluated += size
+    best = np.where(sell_all <= values, 0, best)
+    return np.minimum(sell_all, values), best, evaluated
+
+def _fine_sells(lot_size):
+    """Sell amounts smaller than one lot tried from every grid level."""
+    if lot_size <= 1:
+        return np.zeros(0, dtype="int")
+    return np.unique(np.rint(np.geomspace(1, lot_size - 1, min(lot_size - 1, MAX_FINE_SELLS))).astype("int"))
+
+def _fine_targets(holdings, levels, next_values, sells, model):
+    """
+    Best sell of less than one lot from every holding.
+
+    The remaining inventory falls between grid levels, where the next
+    step's value is linearly interpolated, so a lot-size grid can still
+    follow a schedule that sells only a few shares per step.
+
+    Returns:
+    - values: Best cost per holding, inf where no sell fits
+    - moves: Shares sold at the best cost
+    - evaluated: Number of (holding, sell) candidates costed
+    """
+    targets = holdings[:, None] - sells[None, :]
+    feasible = targets >= 0
+    costs = hamiltonian(holdings[:, None], np.where(feasible, sells[None, :], 0), *model, TIME_STEP_SIZE)
+    costs = np.where(feasible, costs + np.interp(targets, levels, next_values), np.inf)
+    best = np.argmin(costs, axis=1)
+    return costs[np.arange(len(holdings)), best], sells[best], costs.size
+
+def _best_move(held, levels, next_values, sells, model):
+    """
+    Best sell from a holding between grid levels, over the grid levels below it
+    and the fine sells, on the interpolated next-step value function.
+    """
+    targets = np.concatenate([levels[levels <= held], held - sells[sells <= held]])
+    costs = hamiltonian(held, held - targets, *model, TIME_STEP_SIZE) + np.interp(targets, levels, next_values)
+    # Selling the whole inventory wins a tie, otherwise the smallest sell amount does
+    tied = targets[costs == costs.min()]
+    return held - (0 if 0 in tied else int(tied.max()))
+
+def _policy_move(t, held, levels, value_function, best_moves, sells, model):
+    """Shares sold at time t from any holding: the policy on grid levels, _best_move between them."""
+    idx = np.searchsorted(levels, held)
+    if idx < len(levels) and levels[idx] == held:
+        return best_moves[t, idx]
+    if t == len(value_function) - 1:
+        return held  # Terminal step: everything left is sold
+    return _best_move(held, levels, value_function[t + 1], sells, model)
+
+def _search_targets(holdings, targets, next_values, model, solver, stats, cache=None):
+    """
+    Best target of every holding with the requested solver.
+
+    The monotone solver is checked against the exhaustive scan when
+    stats["debug"] is set; once the check fails, stats["fallback"] is set
+    and every later step uses the exhaustive scan.
+    """
+    if solver == "monotone" and not stats["fallback"]:
+        values, best, evaluated = _monotone_targets(holdings, targets, next_values, model)
+        stats["candidates"] += evaluated
+        if not stats["debug"]:
+            return values, best
+        exact_values, exact_best, _ = _exhaustive_targets(holdings, targets, next_values, model, cache)
+        if np.all(np.diff(targets[exact_best]) >= 0) and np.allclose(values, exact_values, rtol=1e-12, atol=0.0):
+            return values, best
+        stats["fallback"] = True
+        return exact_values, exact_best
+
+    values, best, evaluated = _exhaustive_targets(holdings, targets, next_values, model, cache)
+    stats["candidates"] += evaluated
+    return values, best
+
+def _solver_stats(solver, debug):
+    """Counters filled in by the DP solvers."""
+    if solver not in ("exhaustive", "monotone"):
+        raise ValueError(f"Unknown DP solver: {solver}")
+    return {"solver": solver, "debug": debug, "fallback": False, "candidates": 0}
+
+def _solve_levels(time_steps, levels, model, solver, stats, sells=None):
+    """
+    Backward induction on a fixed inventory grid shared by every time step.
+
+    Costs are accumulated additively, i.e. the value function holds log
+    costs rather than products of exponentials, so large costs no longer
+    saturate and tie. With fine sells (see _fine_sells) every level also
+    tries selling less than one lot, valued on the interpolated value
+    function of the next step.
+
+    Returns:
+    - value_function: Cost matrix, one column per grid level
+    - best_moves: Shares sold at each state
+    """
+    _, alpha, _, _, eta, _ = model
+    size = len(levels)
+    value_function = np.zeros((time_steps, size), dtype="float64")
+    best_moves = np.zeros((time_steps, size), dtype="int")
+
+    # Terminal condition: everything left is sold in the last interval
+    value_function[time_steps - 1] = levels * temporary_impact(levels / TIME_STEP_SIZE, alpha, eta)
+    best_moves[time_steps - 1] = levels
+
+    cache = {}
+    for t in range(time_steps - 2, -1, -1):
+        value_function[t], best = _search_targets(levels, levels, value_function[t + 1], model, solver, stats, cache)
+        best_moves[t] = levels - levels[best]
+        if sells is not None and len(sells):
+            values, moves, evaluated = _fine_targets(levels, levels, value_function[t + 1], sells, model)
+            stats["candidates"] += evaluated
+            finer = values < value_function[t]
+            value_function[t, finer] = values[finer]
+            best_moves[t, finer] = moves[finer]
+
+    return value_function, best_moves
+
+def _fine_band(center, half_width, step, total_shares):
+    """Inventory levels spaced by step within half_width of center."""
+    band = center + np.arange(-half_width, half_width + 1, step)
+    return band[(band >= 0) & (band <= total_shares)]
+
+def _refine_path(time_steps, total_shares, levels, value_function, best_moves, sells, center_path, half_width,
+                 max_states, model, solver, stats):
+    """
+    Re-solves the DP on fine inventory bands around a path.
+
+    States outside a band are only reachable on coarse levels, where the
+    coarse value function and policy stand in for the refined ones. A path
+    that ends on the edge of a band, or leaves it for a coarse level, was
+    cut off by the band and the solve has to be repeated around it.
+
+    Returns:
+    - inventory_path: Remaining shares over time on the refined grid
+    - touched: Whether the path reached the edge of any band
+    """
+    _, alpha, _, _, eta, _ = model
+    step = max(1, -(-2 * half_width // max_states))
+    bands = [None] + [_fine_band(center_path[t - 1], half_width, step, total_shares) for t in range(1, time_steps)]
+    band_values = [None] * time_steps
+    band_moves = [None] * time_steps
+
+    last = bands[time_steps - 1]
+    band_values[time_steps - 1] = last * temporary_impact(last / TIME_STEP_SIZE, alpha, eta)
+    band_moves[time_steps - 1] = last
+
+    for t in range(time_steps - 2, 0, -1):
+        targets, first = np.unique(np.concatenate([bands[t + 1], levels]), return_index=True)
+        next_values = np.concatenate([band_values[t + 1], value_function[t + 1]])[first]
+        band_values[t], best = _search_targets(bands[t], targets, next_values, model, solver, stats)
+        band_moves[t] = bands[t] - targets[best]
+
+    inventory_path = np.zeros((time_steps, 1), dtype="int")
+    inventory_path[0] = total_shares
+    touched = False
+    for t in range(1, time_steps):
+        held = inventory_path[t - 1, 0]
+        band = bands[t]
+        idx = np.searchsorted(band, held)
+        if idx < len(band) and band[idx] == held:
+            inventory_path[t] = held - band_moves[t][idx]
+            # The first and last level only bound the search when they are not 0 or total_shares
+            touched |= bool((idx == 0 and held > 0) or (idx == len(band) - 1 and held < total_shares))
+        else:
+            inventory_path[t] = held - _policy_move(t, held, levels, value_function, best_moves, sells, model)
+            touched = True
+    return inventory_path, touched
+
+def resolve_lot_size(total_shares, lot_size=None, max_states=DEFAULT_MAX_STATES):
+    """
+    Lot size used by the DP: the given one, or the smallest lot that keeps
+    the inventory grid within max_states levels.
+    """
+    if lot_size is None:
+        lot_size = max(1, -(-total_shares // (max_states - 1)))
+    return lot_size
+
+def execution_from_policy(value_function, best_moves, total_shares, risk_aversion, alpha, beta, gamma, eta,
+                          volatility=0.3, lot_size=1, max_states=DEFAULT_MAX_STATES, refine=True,
+                          solver="exhaustive", stats=None):
+    """
+    Builds the DP result from a solved value function and policy.
+
+    The step costs do not depend on t, so the last T rows of a longer
+    horizon's value_function and best_moves are the solution for T steps;
+    passing them here skips the backward induction entirely.
+
+    Returns:
+    - value_function, best_moves, inventory_path, optimal_trajectory
+    """
+    time_steps = value_function.shape[0]
+    model = (risk_aversion, alpha, beta, gamma, eta, volatility)
+    if stats is None:
+        stats = _solver_stats(solver, False)
+    levels = inventory_grid(total_shares, lot_size)
+    sells = _fine_sells(lot_size)
+
+    inventory_path = np.zeros((time_steps, 1), dtype="int")
+    inventory_path[0] = total_shares
+    for t in range(1, time_steps):
+        held = inventory_path[t - 1, 0]
+        inventory_path[t] = held - _policy_move(t, held, levels, value_function, best_moves, sells, model)
+
+    if lot_size > 1 and refine:
+        # Widened up to about max_states levels per band, beyond which the band would lose resolution
+        half_width = REFINE_WIDTH_LOTS * lot_size
+        max_half_width = max(half_width, max_states // 2)
+        for _ in range(MAX_REFINE_PASSES):
+            refined, touched = _refine_path(time_steps, total_shares, levels, value_function, best_moves, sells,
+                                            inventory_path[:, 0], half_width, max_states, model, solver, stats)
+            if not touched and np.array_equal(refined, inventory_path):
+                break
+            inventory_path = refined
+            if touched:
+                half_width = min(2 * half_width, max_half_width)
+
+    optimal_trajectory = -np.diff(inventory_path[:, 0])
+
+    return value_function, best_moves, inventory_path, optimal_trajectory
+
+def _solve_dp(time_steps, total_shares, risk_aversion, alpha, beta, gamma, eta, volatility,
+              lot_size=1, max_states=DEFAULT_MAX_STATES, refine=True, solver="exhaustive", stats=None):
+    """
+    Dynamic programming solver.
+
+    With lot_size 1 every integer inventory level is a state. Coarser lots
+    solve on the grid from inventory_grid() and, when refine is set, re-solve
+    on a fine band around the resulting path, so the grid arrays hold at most
+    about total_shares / lot_size columns.
+    """
+    if stats is None:
+        stats = _solver_stats(solver, False)
+    levels = inventory_grid(total_shares, lot_size)
+    value_function, best_moves = _solve_levels(time_steps, levels, (risk_aversion, alpha, beta, gamma, eta,
+                                                                    volatility), solver, stats, _fine_sells(lot_size))
+    return execution_from_policy(value_function, best_moves, total_shares, risk_aversion, alpha, beta, gamma, eta,
+                                 volatility, lot_size, max_states, refine, solver, stats)
+
+def _trajectory_terms(inventory_path, alpha, beta, gamma, eta, volatility):
+    """Per-step impact costs, terminal cost and variance of an inventory path, before risk aversion."""
+    inventory = np.asarray(inventory_path, dtype="float64").ravel()
+    if inventory.size < 2:
+        return np.zeros(0), 0.0, 0.0
+    holding = inventory[:-2]
+    remaining = inventory[1:-1]
+    sells = holding - remaining
+    rate = sells / TIME_STEP_SIZE
+
+    impact = sells * permanent_impact(rate, beta, gamma)
+    impact += remaining * TIME_STEP_SIZE * temporary_impact(rate, alpha, eta)
+    terminal = inventory[-2] * temporary_impact(inventory[-2] / TIME_STEP_SIZE, alpha, eta)
+    variance = float((volatility ** 2) * TIME_STEP_SIZE * np.sum(remaining ** 2))
+    return impact, terminal, variance
+
+def trajectory_cost(inventory_path, risk_aversion, alpha, beta, gamma, eta, volatility=0.3):
+    """
+    Evaluates an inventory path under the cost model used by the solvers.
+
+    The first entry is the starting inventory; every following step is charged
+    the impact terms of the Hamiltonian, except the last holding, which is
+    sold at once with the terminal cost. Neither result depends on
+    risk_aversion, so costs of schedules solved for different risk aversions
+    are comparable; see trajectory_objective for what the solvers minimise.
+
+    Returns:
+    - expected_cost: Permanent plus temporary impact cost, in price units times shares
+    - variance: Execution risk, volatility^2 * time_step * sum of held inventory^2
+    """
+    impact, terminal, variance = _trajectory_terms(inventory_path, alpha, beta, gamma, eta, volatility)
+    return float(impact.sum() + terminal), variance
+
+def trajectory_objective(inventory_path, risk_aversion, alpha, beta, gamma, eta, volatility=0.3):
+    """
+    Objective the solvers minimise for an inventory path.
+
+    It is the sum of the path's Hamiltonians plus the terminal cost, i.e.
+    risk_aversion * step impact + terminal cost + 0.5 * risk_aversion**2 * variance,
+    and only compares schedules solved for the same risk_aversion.
+    """
+    impact, terminal, variance = _trajectory_terms(inventory_path, alpha, beta, gamma, eta, volatility)
+    return float(risk_aversion * impact.sum() + terminal + 0.5 * (risk_aversion ** 2) * variance)
+
+def is_linear_impact(alpha, beta):
+    """Whether both impact functions are linear, so the closed form applies."""
+    return alpha == 1.0 and beta == 1.0
+
+def closed_form_execution(time_steps, total_shares, risk_aversion, gamma, eta, volatility=0.3):
+    """
+    Analytic Almgren-Chriss schedule for linear temporary and permanent impact.
+
+    With alpha = beta = 1 the stationarity condition of the model is the
+    textbook recurrence x[j-1] + x[j+1] = 2 cosh(kappa * tau) x[j], so the
+    holdings follow x[j] = X (cosh(kappa * tau * j) + B sinh(kappa * tau * j)),
+    where B is fixed by the terminal liquidation cost. This costs O(T).
 
     Parameters:
     - time_steps: Number of time intervals
     - total_shares: Total number of shares to be liquidated
     - risk_aversion: Risk aversion parameter
-    - alpha, beta: Exponents for temporary and permanent market impact
     - gamma, eta: Coefficients for permanent and temporary market impact
     - volatility: Market volatility
 
     Returns:
-    - value_function: Cost matrix
-    - best_moves: Best action at each state
+    - expected_cost: Impact cost of the schedule
+    - variance: Execution risk of the schedule
     - inventory_path: Remaining shares over time
     - optimal_trajectory: Optimal share sell sequence
-    """
 
-    value_function = np.zeros((time_steps, total_shares + 1), dtype="float64")
-    best_moves = np.zeros((time_steps, total_shares + 1), dtype="int")
+    Returns None when the parameters make the problem non-convex or the
+    schedule would have to buy back shares; the DP handles those cases.
+    """
+    tau = TIME_STEP_SIZE
     inventory_path = np.zeros((time_steps, 1), dtype="int")
     inventory_path[0] = total_shares
-    optimal_trajectory = []
-    time_step_size = 0.5
+    if time_steps < 3 or total_shares == 0:
+        trajectory = -np.diff(inventory_path[:, 0])
+        return trajectory_cost(inventory_path, risk_aversion, 1.0, 1.0, gamma, eta, volatility) + (
+            inventory_path, trajectory)
 
-    # Helper to safely compute exp with clipping to avoid overflow
-    def safe_exp(x):
-        # Clip values between -700 and 700 to avoid overflow in numpy.exp
-        return np.exp(np.clip(x, -700, 700))
+    # Quadratic form of one step: risk_aversion * (a x^2 + b x y + c y^2), y = x - sold
+    effective_eta = 2.0 * gamma / tau - eta
+    if effective_eta <= 0.0 or risk_aversion <= 0.0:
+        return None
+    c = gamma / tau - eta + 0.5 * risk_aversion * (volatility ** 2) * tau
+    # Last held inventory x[M] satisfies x[M-1] = ratio * x[M]
+    ratio = (2.0 * c + 2.0 * (eta / tau) / risk_aversion) / effective_eta
+    last = time_steps - 2
+    j = np.arange(time_steps - 1, dtype="float64")
 
-    # Terminal condition
-    for shares in range(total_shares + 1):
-        val = shares * temporary_impact(shares / time_step_size, alpha, eta)
-        value_function[time_steps - 1, shares] = safe_exp(val)
-        best_moves[time_steps - 1, shares] = shares
+    kappa_tau = np.arccosh(1.0 + risk_aversion * (volatility ** 2) * tau / (2.0 * effective_eta))
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        if kappa_tau == 0.0:
+            slope = (ratio - 1.0) / ((last - 1) - ratio * last)
+            holdings = 1.0 + slope * j
+        else:
+            slope = (ratio * np.cosh(kappa_tau * last) - np.cosh(kappa_tau * (last - 1))) / (
+                np.sinh(kappa_tau * (last - 1)) - ratio * np.sinh(kappa_tau * last))
+            holdings = np.cosh(kappa_tau * j) + slope * np.sinh(kappa_tau * j)
 
-    # Backward induction
-    for t in range(time_steps - 2, -1, -1):
-        for shares in range(total_shares + 1):
-            best_value = value_function[t + 1, 0] * safe_exp(
-                hamiltonian(shares, shares, risk_aversion, alpha, beta, gamma, eta, volatility, time_step_size)
-            )
-            best_share_amount = shares
-            for n in range(shares):
-                current_value = value_function[t + 1, shares - n] * safe_exp(
-                    hamiltonian(shares, n, risk_aversion, alpha, beta, gamma, eta, volatility, time_step_size)
-                )
-                if current_value < best_value:
-                    best_value = current_value
-                    best_share_amount = n
-            value_function[t, shares] = best_value
-            best_moves[t, shares] = best_share_amount
-
-    # Optimal trajectory
-    for t in range(1, time_steps):
-        inventory_path[t] = inventory_path[t - 1] - best_moves[t, inventory_path[t - 1]]
-        optimal_trajectory.append(best_moves[t, inventory_path[t - 1]])
+    if not np.all(np.isfinite(holdings)) or np.any(np.diff(holdings) > 1e-12) or holdings[-1] < -1e-12:
+        return None
 
-    optimal_trajectory = np.asarray(optimal_trajectory)
+    inventory_path[1:-1, 0] = np.rint(total_shares * np.clip(holdings[1:], 0.0, 1.0))
+    optimal_trajectory = -np.diff(inventory_path[:, 0])
+    expected_cost, variance = trajectory_cost(inventory_path, risk_aversion, 1.0, 1.0, gamma, eta, volatility)
+    return expected_cost, variance, inventory_path, optimal_trajectory
 
-    return value_function, best_moves, inventory_path, optimal_trajectory
+def validate_closed_form(time_steps, total_shares, risk_aversion, gamma, eta, volatility=0.3, tolerance=0.01):
+    """
+    Compares the closed-form schedule against the DP on the same (small) input.
+
+    Returns:
+    - report: dict with both objectives, their relative gap, the largest
+      inventory difference in shares and whether the gap is within tolerance
+    """
+    closed = closed_form_execution(time_steps, total_shares, risk_aversion, gamma, eta, volatility)
+    _, _, dp_path, _ = _solve_dp(time_steps, total_shares, risk_aversion, 1.0, 1.0, gamma, eta, volatility)
+
+    def objective(path):
+        return trajectory_objective(path, risk_aversion, 1.0, 1.0, gamma, eta, volatility)
+
+    dp_objective = objective(dp_path)
+    if closed is None:
+        return {"ok": False, "dp_objective": dp_objective, "closed_form_objective": None,
+                "relative_gap": None, "max_inventory_gap": None}
+
+    closed_objective = objective(closed[2])
+    relative_gap = (closed_objective - dp_objective) / max(abs(dp_objective), 1e-12)
+    return {
+        "ok": bool(relative_gap <= tolerance),
+        "dp_objective": dp_objective,
+        "closed_form_objective": closed_objective,
+        "relative_gap": relative_gap,
+        "max_inventory_gap": int(np.abs(closed[2] - dp_path).max()),
+    }
+
+def optimal_execution(time_steps, total_shares, risk_aversion, alpha, beta, gamma, eta, volatility=0.3,
+                      method="auto", validate=False, lot_size=None, max_states=DEFAULT_MAX_STATES, refine=True,
+                      solver="exhaustive", debug=False, stats=None):
+    """
+    Computes the optimal trading trajectory based on the Almgren-Chriss model.
+
+    With linear impact (alpha = beta = 1) the analytic sinh/cosh schedule is
+    returned; any other exponents are solved by dynamic programming.
+
+    Parameters:
+    - time_steps: Number of time intervals
+    - total_shares: Total number of shares to be liquidated
+    - risk_aversion: Risk aversion parameter
+    - alpha, beta: Exponents for temporary and permanent market impact
+    - gamma, eta: Coefficients for permanent and temporary market impact
+    - volatility: Market volatility
+    - method: "auto" (closed form when linear), "closed_form" or "dp"
+    - validate: Cross-check the closed form against the DP on inputs of up to
+      VALIDATION_MAX_SHARES shares and use the DP result if they disagree
+    - lot_size: Inventory resolution of the DP; by default the smallest lot
+      that keeps the grid within max_states levels
+    - max_states: Cap on inventory levels per time step when lot_size is not given
+    - refine: Re-solve on a fine band around the coarse path when lot_size > 1
+    - solver: "exhaustive" scans every sell amount; "monotone" relies on the
+      optimal remaining inventory growing with the holding and searches
+      O(S log S) candidates per time step
+    - debug: Check the monotone solver against the exhaustive scan and fall
+      back to the scan from the first step where it disagrees
+    - stats: Optional dict that receives the solver counters ("candidates"
+      evaluated, whether the monotone solver fell back)
+
+    Returns (dynamic programming):
+    - value_function: Cost matrix (additive log costs), one column per grid level
+    - best_moves: Best action at each grid state
+    - inventory_path: Remaining shares over time
+    - optimal_trajectory: Optimal share sell sequence
+
+    Returns (closed form):
+    - expected_cost, variance, inventory_path, optimal_trajectory
+    """
+    if method not in ("auto", "closed_form", "dp"):
+        raise ValueError(f"Unknown execution method: {method}")
+
+    if method == "closed_form" or (method == "auto" and is_linear_impact(alpha, beta)):
+        if not is_linear_impact(alpha, beta):
+            raise ValueError("Closed-form execution requires alpha = beta = 1")
+        result = closed_form_execution(time_steps, total_shares, risk_aversion, gamma, eta, volatility)
+        trusted = result is not None
+        if trusted and validate and total_shares <= VALIDATION_MAX_SHARES:
+            trusted = validate_closed_form(time_steps, total_shares, risk_aversion, gamma, eta, volatility)["ok"]
+        if trusted:
+            return result
+
+    counters = _solver_stats(solver, debug)
+    lot_size = resolve_lot_size(total_shares, lot_size, max_states)
+    result = _solve_dp(time_steps, total_shares, risk_aversion, alpha, beta, gamma, eta, volatility,
+                       lot_size=lot_size, max_states=max_states, refine=refine, solver=solver, stats=counters)
+    if stats is not None:
+        stats.update(counters)
+    return result
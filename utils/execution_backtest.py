@@ -0,0 +1,229 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data.orderbook import OrderBook
+from data.tick_capture import FLAG_PREV_SEQ, FLAG_SEQ, FLAG_UPDATE
+from utils.execution_sweep import _pool_context
+from utils.logger import log_event, logger
+
+# Upper bound on (trajectory, start, step, level) cells walked at once
+MAX_BACKTEST_CELLS = 1 << 23
+
+# Read-only backtest inputs, set once per worker process by _init_worker
+_shared = {}
+
+def _dense_side(prices, sizes, counts, descending):
+    """Sorts padded level rows best first; empty slots become price nan, size 0."""
+    depth = prices.shape[1]
+    empty = np.arange(depth) >= counts[:, None]
+    keys = np.where(empty, np.inf, -prices if descending else prices)
+    order = np.argsort(keys, axis=1, kind="stable")
+    prices = np.take_along_axis(np.where(empty, np.nan, prices), order, axis=1)
+    sizes = np.take_along_axis(np.where(empty, 0.0, sizes), order, axis=1)
+    return prices, sizes
+
+def books_from_capture(records, depth=None):
+    """
+    Dense book history of one instrument from tick capture records.
+
+    Captures of full snapshots (the GoQuant feed) are sorted in one
+    vectorized pass. Captures containing deltas are replayed through an
+    OrderBook record by record; records the book rejects (sequence gaps,
+    checksum mismatches, malformed levels) repeat the last valid state and
+    are counted.
+
+    Parameters:
+    - records: Structured array from data.tick_capture.load_capture
+    - depth: Levels kept per side (default: the capture's depth)
+
+    Returns:
+    - books: dict of "times" (n,) and best-first "bid_prices", "bid_sizes",
+      "ask_prices", "ask_sizes" (n x depth); missing levels are price nan, size 0.
+      "rejected" is the number of records the book rejected
+    """
+    capture_depth = records.dtype["bid_prices"].shape[0]
+    depth = depth or capture_depth
+    books = {"times": np.asarray(records["recv_time"], dtype="float64"), "rejected": 0}
+
+    if not np.any(records["flags"] & FLAG_UPDATE):
+        for side, descending in (("bid", True), ("ask", False)):
+            prices, sizes = _dense_side(records[side + "_prices"], records[side + "_sizes"],
+                                        records[side + "_count"].astype("int64"), descending)
+            books[side + "_prices"] = prices[:, :depth]
+            books[side + "_sizes"] = sizes[:, :depth]
+        return books
+
+    size = len(records)
+    for side in ("bid", "ask"):
+        books[side + "_prices"] = np.full((size, depth), np.nan)
+        books[side + "_sizes"] = np.zeros((size, depth))
+    book = OrderBook(capacity=max(depth, capture_depth) * 4)
+    for index, record in enumerate(records):
+        flags = int(record["flags"])
+        message = {
+            "bids": np.column_stack((record["bid_prices"], record["bid_sizes"]))[:record["bid_count"]],
+            "asks": np.column_stack((record["ask_prices"], record["ask_sizes"]))[:record["ask_count"]],
+            "seqId": int(record["seq"]) if flags & FLAG_SEQ else None,
+            "prevSeqId": int(record["prev_seq"]) if flags & FLAG_PREV_SEQ else None,
+        }
+        if flags & FLAG_UPDATE:
+            message["action"] = "update"
+        try:
+            book.apply_message(message)
+        except ValueError as e:
+            books["rejected"] += 1
+            error = e
+        if index and not book.valid:
+            for key in ("bid_prices", "bid_sizes", "ask_prices", "ask_sizes"):
+                books[key][index] = books[key][index - 1]
+            continue
+        for side, top in (("bid", book.top_bids(depth)), ("ask", book.top_asks(depth))):
+            count = len(top[0])
+            books[side + "_prices"][index, :count] = top[0]
+            books[side + "_sizes"][index, :count] = top[1]
+    if books["rejected"]:
+        log_event(logger, logging.WARNING, "Capture records rejected by the book", rejected=books["rejected"],
+                  records=size, last_error=error)
+    return books
+
+def walk_book(quantities, prices, sizes):
+    """
+    Fills market orders of base quantity against best-first levels.
+
+    Quantity beyond the visible depth is assumed to fill at the worst level.
+
+    Parameters:
+    - quantities: Order sizes, broadcastable against prices[..., 0]
+    - prices, sizes: (..., depth) levels, best first, empty levels with size 0
+
+    Returns:
+    - notional: Cash paid or received
+    - unfilled: Quantity that exceeded the visible depth
+    """
+    cum_size = np.cumsum(sizes, axis=-1)
+    cum_notional = np.cumsum(np.nan_to_num(prices) * sizes, axis=-1)
+    quantities = np.asarray(quantities, dtype="float64")
+
+    # Levels fully consumed before the order is done
+    full = np.sum(cum_size < quantities[..., None], axis=-1)
+    depth = sizes.shape[-1]
+    level = np.minimum(full, depth - 1)[..., None]
+    size_before = np.where(level > 0, np.take_along_axis(cum_size, np.maximum(level - 1, 0), axis=-1), 0.0)[..., 0]
+    notional_before = np.where(level > 0, np.take_along_axis(cum_notional, np.maximum(level - 1, 0), axis=-1),
+                               0.0)[..., 0]
+
+    # Worst visible price, used for the level being filled and any overflow
+    visible = np.sum(sizes > 0, axis=-1)
+    worst_price = np.take_along_axis(prices, np.maximum(visible - 1, 0)[..., None], axis=-1)[..., 0]
+    level_price = np.take_along_axis(prices, level, axis=-1)[..., 0]
+    level_price = np.where(full < visible, level_price, worst_price)
+
+    unfilled = np.maximum(quantities - cum_size[..., -1], 0.0)
+    notional = notional_before + (quantities - size_before) * level_price
+    return np.where(quantities > 0, notional, 0.0), unfilled
+
+def _backtest_chunk(starts):
+    """Shortfall of every trajectory for a block of start indices, from the worker's shared inputs."""
+    books, trajectories, step_seconds, side, unit = (_shared["books"], _shared["trajectories"],
+                                                     _shared["step_seconds"], _shared["side"], _shared["unit"])
+    times = books["times"]
+    steps = trajectories.shape[1]
+
+    # Book in force at the scheduled time of every child order
+    scheduled = times[starts][:, None] + step_seconds * np.arange(steps)
+    rows = np.clip(np.searchsorted(times, scheduled, side="right") - 1, 0, len(times) - 1)
+    late = scheduled > times[-1]
+
+    prefix = "ask" if side == "buy" else "bid"
+    prices = books[prefix + "_prices"][rows]
+    sizes = books[prefix + "_sizes"][rows]
+    arrival_mid = (books["bid_prices"][starts, 0] + books["ask_prices"][starts, 0]) / 2
+    quantities = trajectories[:, None, :]
+    if unit == "quote":
+        # USD child orders, traded in base at the arrival mid as when the schedule was sized
+        quantities = quantities / arrival_mid[None, :, None]
+    notional, unfilled = walk_book(quantities, prices[None], sizes[None])
+
+    executed = quantities.sum(axis=-1)
+    cash = notional.sum(axis=-1)
+    if side == "buy":
+        shortfall = cash - executed * arrival_mid
+    else:
+        shortfall = executed * arrival_mid - cash
+    return {
+        "shortfall": shortfall,
+        "average_price": cash / np.where(executed > 0, executed, np.nan),
+        "unfilled": unfilled.sum(axis=-1),
+        "arrival_mid": np.broadcast_to(arrival_mid, shortfall.shape),
+        "incomplete": np.broadcast_to(late.any(axis=1), shortfall.shape),
+    }
+
+def _init_worker(books, trajectories, step_seconds, side, unit):
+    _shared["books"] = books
+    _shared["trajectories"] = trajectories
+    _shared["step_seconds"] = step_seconds
+    _shared["side"] = side
+    _shared["unit"] = unit
+
+def backtest_execution(books, trajectories, step_seconds, start_indices=None, side="sell", unit="base",
+                       processes=None):
+    """
+    Replays execution schedules against a recorded book history.
+
+    Every child order is filled by walking the book in force at its
+    scheduled time. The recorded books are not depleted by earlier child
+    orders, so fills are as good as the market allowed at each moment.
+
+    Parameters:
+    - books: Book history as returned by books_from_capture
+    - trajectories: Quantity per time step, one schedule (steps,) or
+      a (schedules x steps) array such as sweep_execution()["trajectory"]
+    - step_seconds: Wall-clock time between child orders
+    - start_indices: Book indices at which schedules start (default: every book)
+    - side: "sell" walks the bids, "buy" the asks
+    - unit: "base" when trajectories hold base quantity; "quote" when they
+      hold USD, as schedules solved for the UI's USD quantity do, which are
+      converted to base at the arrival mid of every start
+    - processes: Worker processes (default: CPU count); 1 runs in this process
+
+    Returns:
+    - result: dict of (schedules x starts) arrays: "shortfall" (implementation
+      shortfall against the arrival mid, in quote currency), "shortfall_bps",
+      "average_price", "unfilled", "arrival_mid" and "incomplete" (schedule
+      ran past the end of the history), plus the "start_times" and the
+      number of capture records the book history "rejected"; "unfilled" is
+      always in base quantity
+    """
+    if unit not in ("base", "quote"):
+        raise ValueError(f"Unknown trajectory unit: {unit}")
+    trajectories = np.atleast_2d(np.asarray(trajectories, dtype="float64"))
+    if start_indices is None:
+        start_indices = np.arange(len(books["times"]))
+    start_indices = np.asarray(start_indices, dtype="int64")
+
+    cells = trajectories.size * books["bid_prices"].shape[1]
+    per_chunk = max(1, MAX_BACKTEST_CELLS // max(cells, 1))
+    chunks = [start_indices[i:i + per_chunk] for i in range(0, len(start_indices), per_chunk)]
+
+    processes = min(processes or os.cpu_count() or 1, len(chunks))
+    if processes <= 1:
+        _init_worker(books, trajectories, step_seconds, side, unit)
+        parts = [_backtest_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=_pool_context(), initializer=_init_worker,
+                                 initargs=(books, trajectories, step_seconds, side, unit)) as pool:
+            parts = list(pool.map(_backtest_chunk, chunks))
+
+    result = {key: np.concatenate([part[key] for part in parts], axis=1) if parts else
+              np.empty((len(trajectories), 0)) for key in ("shortfall", "average_price", "unfilled", "arrival_mid",
+                                                           "incomplete")}
+    traded = trajectories.sum(axis=1)[:, None]
+    arrival_notional = traded if unit == "quote" else traded * result["arrival_mid"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["shortfall_bps"] = 1e4 * result["shortfall"] / arrival_notional
+    result["start_times"] = books["times"][start_indices]
+    result["rejected"] = books.get("rejected", 0)
+    return result
@@ -0,0 +1,188 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.almgren_chriss import DEFAULT_MAX_STATES, execution_from_policy, optimal_execution, resolve_lot_size
+
+# Memory budget and entry cap of the process-wide result cache
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 512
+
+# Slider positions precomputed by the background warmer. Only the longest
+# horizon is solved; shorter ones are cut from its value function on demand.
+PREWARM_TIME_STEPS = 100
+PREWARM_QUANTITIES = (100, 500, 1000, 5000, 10000)
+PREWARM_EXPONENTS = ((1.0, 1.0), (0.5, 0.5), (1.5, 1.5), (2.0, 2.0))
+PREWARM_DEFAULTS = {"risk_aversion": 0.001, "gamma": 0.05, "eta": 0.05, "volatility": 0.025}
+
+def _result_nbytes(result):
+    return sum(part.nbytes for part in result if isinstance(part, np.ndarray))
+
+def _freeze(result):
+    """Marks the arrays of a cached result read-only, since every session shares them."""
+    for part in result:
+        if isinstance(part, np.ndarray):
+            part.setflags(write=False)
+    return result
+
+class ExecutionCache:
+    """
+    Thread-safe LRU cache of optimal_execution results, bounded by entries and bytes.
+
+    Results are keyed by every solver input except time_steps, which selects
+    an entry within the key. A DP result for a longer horizon answers shorter
+    ones from the tail of its value function.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.hits = 0
+        self.tail_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "hits": self.hits,
+                "tail_hits": self.tail_hits,
+                "misses": self.misses,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _lookup(self, key, time_steps):
+        """Exact entry, or the shortest longer DP horizon for the same inputs. Caller holds the lock."""
+        exact = self._entries.get((key, time_steps))
+        if exact is not None:
+            self._entries.move_to_end((key, time_steps))
+            return exact, True
+        longer = None
+        for (other_key, steps), result in self._entries.items():
+            if other_key == key and steps > time_steps and isinstance(result[0], np.ndarray):
+                if longer is None or steps < longer[0]:
+                    longer = (steps, result)
+        if longer is not None:
+            self._entries.move_to_end((key, longer[0]))
+            return longer[1], False
+        return None, False
+
+    def _store(self, entry_key, result):
+        """Inserts a result and evicts least recently used entries. Caller holds the lock."""
+        if entry_key in self._entries:
+            return
+        self._entries[entry_key] = result
+        self._nbytes += _result_nbytes(result)
+        while self._entries and (len(self._entries) > self.max_entries or self._nbytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._nbytes -= _result_nbytes(evicted)
+
+    def get_or_solve(self, time_steps, total_shares, risk_aversion, alpha, beta, gamma, eta, volatility=0.3,
+                     **options):
+        """
+        Returns the cached result for these inputs, solving them at most once.
+
+        Concurrent callers asking for the same entry wait for the first one
+        instead of solving it again. Keyword options are passed through to
+        optimal_execution; "stats" is not supported since results are shared.
+        """
+        max_states = options.get("max_states", DEFAULT_MAX_STATES)
+        lot_size = resolve_lot_size(total_shares, options.get("lot_size"), max_states)
+        options = dict(options, lot_size=lot_size)
+        key = (total_shares, risk_aversion, alpha, beta, gamma, eta, volatility, tuple(sorted(options.items())))
+        entry_key = (key, time_steps)
+
+        while True:
+            with self._lock:
+                result, exact = self._lookup(key, time_steps)
+                if result is not None and exact:
+                    self.hits += 1
+                    return result
+                pending = self._pending.get(entry_key)
+                if pending is None:
+                    pending = self._pending[entry_key] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            if result is not None:
+                # Copies, so the new entry owns its bytes and does not keep the longer one alive after eviction
+                result = execution_from_policy(
+                    result[0][-time_steps:].copy(), result[1][-time_steps:].copy(), total_shares, risk_aversion,
+                    alpha, beta, gamma, eta, volatility, lot_size=lot_size, max_states=max_states,
+                    refine=options.get("refine", True), solver=options.get("solver", "exhaustive"))
+                tail = True
+            else:
+                result = optimal_execution(time_steps, total_shares, risk_aversion, alpha, beta, gamma, eta,
+                                           volatility, **options)
+                tail = False
+            result = _freeze(result)
+            with self._lock:
+                if tail:
+                    self.tail_hits += 1
+                else:
+                    self.misses += 1
+                self._store(entry_key, result)
+            return result
+        finally:
+            with self._lock:
+                self._pending.pop(entry_key).set()
+
+execution_cache = ExecutionCache()
+
+def cached_optimal_execution(time_steps, total_shares, risk_aversion, alpha, beta, gamma, eta, volatility=0.3,
+                             **options):
+    """optimal_execution through the process-wide cache shared by all sessions."""
+    return execution_cache.get_or_solve(time_steps, total_shares, risk_aversion, alpha, beta, gamma, eta,
+                                        volatility, **options)
+
+def _prewarm(stop_event, grid):
+    for params in grid:
+        if stop_event.is_set():
+            return
+        cached_optimal_execution(**params)
+
+def prewarm_grid(time_steps=PREWARM_TIME_STEPS, quantities=PREWARM_QUANTITIES, exponents=PREWARM_EXPONENTS,
+                 **defaults):
+    """Parameter sets of the common slider positions, most likely first."""
+    params = dict(PREWARM_DEFAULTS, **defaults)
+    return [
+        dict(params, time_steps=time_steps, total_shares=quantity, alpha=alpha, beta=beta)
+        for alpha, beta in exponents
+        for quantity in quantities
+    ]
+
+_prewarm_lock = threading.Lock()
+_prewarm_stop = None
+
+def start_prewarm(grid=None):
+    """
+    Solves the given parameter sets (default: prewarm_grid()) in a daemon thread.
+
+    Only one warmer runs per process; later calls return its stop event.
+
+    Returns:
+    - stop_event: Set it to stop the warmer after the current solve
+    """
+    global _prewarm_stop
+    with _prewarm_lock:
+        if _prewarm_stop is None or _prewarm_stop.is_set():
+            _prewarm_stop = threading.Event()
+            thread = threading.Thread(target=_prewarm, args=(_prewarm_stop, grid or prewarm_grid()), daemon=True)
+            thread.start()
+        return _prewarm_stop
@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.almgren_chriss import TIME_STEP_SIZE, _trajectory_terms
+from utils.execution_sweep import _pool_context
+
+# Upper bound on (path x time step) cells simulated at once
+MAX_SIMULATION_CELLS = 1 << 22
+
+DEFAULT_PATHS = 20000
+DEFAULT_CONFIDENCE = (0.95, 0.99)
+
+def _innovations(rng, shape, tail_df):
+    """Unit-variance shocks: standard normal, or Student-t with tail_df degrees of freedom."""
+    if tail_df is None:
+        return rng.standard_normal(shape)
+    return rng.standard_t(tail_df, shape) * np.sqrt((tail_df - 2) / tail_df)
+
+def _simulate_chunk(trajectory, paths, seed, alpha, beta, gamma, eta, volatility, tail_df):
+    """
+    Implementation shortfall of `paths` simulated executions of one trajectory.
+
+    Impact is charged with the cost terms of the solver (see
+    utils.almgren_chriss.trajectory_cost), so it is the same on every path;
+    only the price is random. It moves by volatility * sqrt(tau) per step,
+    and every move changes the value of the shares still held.
+    """
+    rng = np.random.default_rng(seed)
+    inventory_path = trajectory.sum() - np.concatenate(([0.0], np.cumsum(trajectory)))
+    impact, terminal, _ = _trajectory_terms(inventory_path, alpha, beta, gamma, eta, volatility)
+    remaining = inventory_path[1:-1]
+
+    moves = volatility * np.sqrt(TIME_STEP_SIZE) * _innovations(rng, (paths, len(remaining)), tail_df)
+    # A rising price lowers the shortfall of the shares still to be sold
+    return impact.sum() + terminal - moves @ remaining
+
+def _run_chunk(args):
+    return _simulate_chunk(*args)
+
+def simulate_execution_cost(trajectory, alpha, beta, gamma, eta, volatility=0.3, paths=DEFAULT_PATHS, seed=None,
+                            processes=1, tail_df=None):
+    """
+    Samples the implementation shortfall of an execution schedule.
+
+    Paths are simulated in chunks of at most MAX_SIMULATION_CELLS cells.
+    Every chunk draws from its own child of SeedSequence(seed), so a seed
+    gives the same samples regardless of the number of processes.
+
+    Parameters:
+    - trajectory: Shares sold per time step, as returned by optimal_execution
+    - alpha, beta, gamma, eta, volatility: Impact and price model of the solver
+    - paths: Number of simulated price paths
+    - seed: Seed for reproducible samples (default: fresh entropy)
+    - processes: Worker processes; 1 simulates in this process
+    - tail_df: Degrees of freedom (> 2) of Student-t shocks for fat tails; None for normal shocks
+
+    Returns:
+    - costs: (paths,) shortfall of every path, in price units times shares
+    """
+    trajectory = np.asarray(trajectory, dtype="float64").ravel()
+    if tail_df is not None and tail_df <= 2:
+        raise ValueError("tail_df must be greater than 2 for unit-variance shocks")
+
+    per_chunk = max(1, MAX_SIMULATION_CELLS // max(len(trajectory), 1))
+    sizes = [min(per_chunk, paths - start) for start in range(0, paths, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    chunks = [(trajectory, size, chunk_seed, alpha, beta, gamma, eta, volatility, tail_df)
+              for size, chunk_seed in zip(sizes, seeds)]
+
+    processes = min(processes or os.cpu_count() or 1, len(chunks))
+    if processes <= 1:
+        parts = [_run_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=_pool_context()) as pool:
+            parts = list(pool.map(_run_chunk, chunks))
+    return np.concatenate(parts) if parts else np.empty(0)
+
+def cost_statistics(costs, confidence=DEFAULT_CONFIDENCE):
+    """
+    Summary of a cost sample.
+
+    Returns:
+    - stats: dict with "mean", "std" and, per confidence level c,
+      "var_<c>" (the c-quantile of cost) and "cvar_<c>" (mean cost at or beyond it)
+    """
+    stats = {"mean": float(np.mean(costs)), "std": float(np.std(costs, ddof=1)) if len(costs) > 1 else 0.0}
+    quantiles = np.quantile(costs, confidence)
+    for level, quantile in zip(confidence, quantiles):
+        name = f"{level * 100:g}".replace(".", "_")
+        stats[f"var_{name}"] = float(quantile)
+        stats[f"cvar_{name}"] = float(costs[costs >= quantile].mean())
+    return stats
+
+def execution_cost_distribution(trajectory, alpha, beta, gamma, eta, volatility=0.3, paths=DEFAULT_PATHS,
+                                confidence=DEFAULT_CONFIDENCE, seed=None, processes=1, tail_df=None):
+    """
+    Mean, standard deviation, VaR and CVaR of the shortfall of a trajectory.
+
+    Returns:
+    - stats: As cost_statistics, e.g. {"mean", "std", "var_95", "cvar_95", "var_99", "cvar_99"}
+    """
+    costs = simulate_execution_cost(trajectory, alpha, beta, gamma, eta, volatility, paths, seed, processes,
+                                    tail_df)
+    return cost_statistics(costs, confidence)
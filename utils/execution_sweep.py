@@ -0,0 +1,135 @@
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from utils.almgren_chriss import optimal_execution, trajectory_cost, trajectory_objective
+
+# Parameters a sweep point may override; everything else is shared by the batch
+SWEEP_PARAMETERS = ("risk_aversion", "alpha", "beta", "gamma", "eta", "volatility")
+
+# Read-only batch inputs, set once per worker process by _init_worker
+_shared = {}
+
+def _init_worker(base, grid, options):
+    _shared["base"] = base
+    _shared["grid"] = grid
+    _shared["options"] = options
+
+def _solve_point(index):
+    """Solves one grid point from the worker's shared inputs; only the index crosses processes."""
+    params = dict(_shared["base"], **_shared["grid"][index])
+    _, _, inventory_path, optimal_trajectory = optimal_execution(**params, **_shared["options"])
+    model = [params[key] for key in SWEEP_PARAMETERS]
+    expected_cost, variance = trajectory_cost(inventory_path, *model)
+    objective = trajectory_objective(inventory_path, *model)
+    return index, expected_cost, variance, objective, np.asarray(optimal_trajectory, dtype="int32")
+
+def _pool_context():
+    # fork lets workers inherit the shared inputs instead of unpickling a copy each, but forking a
+    # process with other threads running (the Streamlit server, feed and cache warmer threads) can
+    # leave a lock held in the child forever; those callers start workers from a clean forkserver
+    methods = multiprocessing.get_all_start_methods()
+    if threading.active_count() > 1:
+        return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+def iter_sweep(param_grid, time_steps, total_shares, risk_aversion=0.001, alpha=1.0, beta=1.0, gamma=0.05,
+               eta=0.05, volatility=0.3, processes=None, **options):
+    """
+    Solves every parameter set of param_grid and yields results as they finish.
+
+    Parameters:
+    - param_grid: Sequence of dicts overriding any of SWEEP_PARAMETERS
+    - time_steps, total_shares: Shared by every point
+    - risk_aversion, alpha, beta, gamma, eta, volatility: Defaults for keys a point does not set
+    - processes: Worker processes (default: CPU count); 1 solves in this process
+    - options: Passed through to optimal_execution (method, lot_size, solver, ...)
+
+    Yields:
+    - (index, expected_cost, variance, objective, optimal_trajectory) in completion order
+    """
+    grid = [dict(point) for point in param_grid]
+    for point in grid:
+        unknown = set(point) - set(SWEEP_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Cannot sweep over {sorted(unknown)}")
+    base = {"time_steps": time_steps, "total_shares": total_shares, "risk_aversion": risk_aversion,
+            "alpha": alpha, "beta": beta, "gamma": gamma, "eta": eta, "volatility": volatility}
+
+    processes = min(processes or os.cpu_count() or 1, len(grid))
+    if processes <= 1:
+        _init_worker(base, grid, options)
+        for index in range(len(grid)):
+            yield _solve_point(index)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=_pool_context(), initializer=_init_worker,
+                             initargs=(base, grid, options)) as pool:
+        pending = {pool.submit(_solve_point, index) for index in range(len(grid))}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+def sweep_execution(param_grid, time_steps, total_shares, processes=None, **defaults):
+    """
+    Batch counterpart of optimal_execution over a grid of parameter sets.
+
+    Returns:
+    - table: dict of column arrays in grid order, one row per point: the
+      swept parameters, expected_cost, variance, objective and a
+      (points x time_steps - 1) "trajectory" array
+    """
+    grid = [dict(point) for point in param_grid]
+    size = len(grid)
+    shared = {key: defaults.get(key, value) for key, value in
+              (("risk_aversion", 0.001), ("alpha", 1.0), ("beta", 1.0), ("gamma", 0.05), ("eta", 0.05),
+               ("volatility", 0.3))}
+
+    table = {key: np.array([point.get(key, shared[key]) for point in grid], dtype="float64")
+             for key in SWEEP_PARAMETERS}
+    table["expected_cost"] = np.empty(size, dtype="float64")
+    table["variance"] = np.empty(size, dtype="float64")
+    table["objective"] = np.empty(size, dtype="float64")
+    table["trajectory"] = np.zeros((size, max(time_steps - 1, 0)), dtype="int32")
+
+    for index, expected_cost, variance, objective, trajectory in iter_sweep(grid, time_steps, total_shares,
+                                                                            processes=processes, **defaults):
+        table["expected_cost"][index] = expected_cost
+        table["variance"][index] = variance
+        table["objective"][index] = objective
+        table["trajectory"][index] = trajectory
+    return table
+
+def pareto_mask(expected_cost, variance):
+    """Points not dominated by another point with lower-or-equal cost and variance."""
+    order = np.lexsort((expected_cost, variance))
+    best_cost = np.minimum.accumulate(expected_cost[order])
+    efficient = np.empty(len(order), dtype=bool)
+    efficient[order] = expected_cost[order] < np.concatenate(([np.inf], best_cost[:-1]))
+    return efficient
+
+def efficient_frontier(time_steps, total_shares, risk_aversions, gammas=(0.05,), etas=(0.05,), processes=None,
+                       **defaults):
+    """
+    Cost/risk frontier over risk aversion and the impact coefficients.
+
+    Every combination of risk_aversions x gammas x etas is solved; the
+    "efficient" column marks the non-dominated points of each (gamma, eta) pair.
+
+    Returns:
+    - table: As sweep_execution, plus the boolean "efficient" column
+    """
+    grid = [{"risk_aversion": risk_aversion, "gamma": gamma, "eta": eta}
+            for gamma, eta, risk_aversion in itertools.product(gammas, etas, risk_aversions)]
+    table = sweep_execution(grid, time_steps, total_shares, processes=processes, **defaults)
+
+    table["efficient"] = np.zeros(len(grid), dtype=bool)
+    for gamma, eta in itertools.product(gammas, etas):
+        rows = np.flatnonzero((table["gamma"] == gamma) & (table["eta"] == eta))
+        table["efficient"][rows] = pareto_mask(table["expected_cost"][rows], table["variance"][rows])
+    return table
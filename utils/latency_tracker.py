@@ -1,4 +1,176 @@
+import math
+import threading
 import time
+from contextlib import contextmanager
 
-def track_latency(start_time):
-    return time.time() - start_time
+# Pipeline stages in tick-to-display order
+STAGES = ("receive", "decode", "apply", "publish", "metrics", "render", "tick_to_display")
+
+# Log buckets: SUB_BUCKETS per power of two (about 3% resolution) up to 2**MAX_EXPONENT ns (~18 minutes)
+SUB_BUCKETS = 32
+MAX_EXPONENT = 40
+BUCKETS = (MAX_EXPONENT + 1) * SUB_BUCKETS
+
+# Reported quantiles and their summary / Prometheus labels
+QUANTILES = ((0.5, "p50", "0.5"), (0.99, "p99", "0.99"), (0.999, "p999", "0.999"))
+
+def _bucket_index(ns):
+    if ns < 1:
+        return 0
+    mantissa, exponent = math.frexp(ns)  # ns = mantissa * 2**exponent, 0.5 <= mantissa < 1
+    if exponent > MAX_EXPONENT:
+        return BUCKETS - 1
+    return exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+def _bucket_upper_bound(index):
+    exponent, sub_bucket = divmod(index, SUB_BUCKETS)
+    return (0.5 + (sub_bucket + 1) / (2 * SUB_BUCKETS)) * 2 ** exponent
+
+class _Shard:
+    """Counts recorded by one thread; only that thread writes to it."""
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, other):
+        for index, value in enumerate(other.counts):
+            if value:
+                self.counts[index] += value
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+class LatencyHistogram:
+    """
+    Fixed-memory, log-bucketed histogram of durations in nanoseconds.
+
+    Every recording thread writes to its own shard, so record() takes no
+    lock; readers merge the shards. When a new thread starts recording,
+    the shards of threads that have exited are folded into one retired
+    shard, so memory follows the number of live threads. Quantiles are
+    reported as the upper bound of their bucket.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard()
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._retire_dead_shards()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_dead_shards(self):
+        # A thread that has exited no longer writes to its shard. The retired
+        # shard is replaced rather than updated so readers never see a partial fold.
+        dead = [shard for thread, shard in self._shards if not thread.is_alive()]
+        if dead:
+            retired = _Shard()
+            for shard in [self._retired] + dead:
+                retired.add(shard)
+            self._retired = retired
+            self._shards = [(thread, shard) for thread, shard in self._shards if thread.is_alive()]
+
+    def record(self, ns):
+        shard = self._shard()
+        shard.counts[_bucket_index(ns)] += 1
+        shard.count += 1
+        shard.total += ns
+        if ns > shard.max:
+            shard.max = ns
+
+    def merged(self):
+        """(counts, count, total_ns, max_ns) over all threads."""
+        with self._lock:
+            shards = [self._retired] + [shard for _, shard in self._shards]
+        merged = _Shard()
+        for shard in shards:
+            merged.add(shard)
+        return merged.counts, merged.count, merged.total, merged.max
+
+    def reset(self):
+        with self._lock:
+            self._shards = []
+            self._retired = _Shard()
+            self._local = threading.local()
+
+    def summary(self):
+        """
+        Returns:
+        - summary: dict of "count", "mean_ms", "max_ms", "p50_ms", "p99_ms" and "p999_ms"
+        """
+        counts, count, total, maximum = self.merged()
+        summary = {"count": count, "mean_ms": total / count / 1e6 if count else 0.0, "max_ms": maximum / 1e6}
+        for _, label, _ in QUANTILES:
+            summary[label + "_ms"] = 0.0
+        pending = [(math.ceil(q * count), label) for q, label, _ in QUANTILES] if count else []
+        seen = 0
+        for index, value in enumerate(counts):
+            seen += value
+            while pending and seen >= pending[0][0]:
+                summary[pending.pop(0)[1] + "_ms"] = min(_bucket_upper_bound(index), maximum) / 1e6
+        return summary
+
+class LatencyTracker:
+    """Latency histograms keyed by pipeline stage."""
+
+    def __init__(self, stages=STAGES):
+        self._histograms = {stage: LatencyHistogram() for stage in stages}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def record(self, stage, ns):
+        """Adds one duration in nanoseconds to a stage."""
+        self.histogram(stage).record(ns)
+
+    def record_since(self, stage, start_ns):
+        """Adds the time since a perf_counter_ns() timestamp to a stage."""
+        self.histogram(stage).record(time.perf_counter_ns() - start_ns)
+
+    @contextmanager
+    def measure(self, stage):
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record_since(stage, start_ns)
+
+    def reset(self):
+        for histogram in list(self._histograms.values()):
+            histogram.reset()
+
+    def summaries(self):
+        """Summary of every stage that recorded something, in pipeline order."""
+        return {stage: histogram.summary() for stage, histogram in list(self._histograms.items())
+                if histogram.merged()[1]}
+
+    def prometheus_text(self, name="goquant_stage_latency_seconds"):
+        """All stages in the Prometheus text exposition format, as summaries in seconds."""
+        lines = [f"# HELP {name} Latency of each tick-to-display pipeline stage.", f"# TYPE {name} summary"]
+        for stage, histogram in list(self._histograms.items()):
+            counts, count, total, _ = histogram.merged()
+            if not count:
+                continue
+            summary = histogram.summary()
+            for _, label, quantile in QUANTILES:
+                lines.append(f'{name}{{stage="{stage}",quantile="{quantile}"}} {summary[label + "_ms"] / 1e3:.9g}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total / 1e9:.9g}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+latency_tracker = LatencyTracker()
@@ -1,14 +1,182 @@
+import atexit
+import json
 import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
 
-def setup_logger():
-    logger = logging.getLogger("GoQuantSimulator")
-    logger.setLevel(logging.INFO)
+LOGGER_NAME = "GoQuantSimulator"
 
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter("[%(levelname)s] %(message)s")
-    handler.setFormatter(formatter)
+# Records waiting for the writer thread; beyond this they are dropped and counted
+LOG_QUEUE_SIZE = 10000
+
+# Identical messages (same logger, level, message template and feed) passed per interval;
+# the rest are counted and reported with the next one that passes
+RATE_LIMIT_BURST = 5
+RATE_LIMIT_INTERVAL = 10.0
+
+# (Message template, feed) pairs whose rate-limit windows are remembered, least recently seen evicted first
+RATE_LIMIT_KEYS = 1024
+
+class RateLimitFilter(logging.Filter):
+    """
+    Passes at most `burst` records per message template, feed and `interval` seconds.
+
+    Suppressed records are only counted; the first record of the next
+    window carries the count as `suppressed`. Checking a record is one
+    dictionary lookup under a lock, so a burst of identical errors costs
+    the same per record however long it lasts. The feed field of a
+    log_event record is part of the key, so one instrument's burst never
+    hides another instrument's first errors.
+    """
+
+    def __init__(self, burst=RATE_LIMIT_BURST, interval=RATE_LIMIT_INTERVAL, max_keys=RATE_LIMIT_KEYS):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.max_keys = max_keys
+        self._windows = OrderedDict()  # key -> [window start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def allow(self, name, level, template, now, feed=None):
+        """
+        Returns:
+        - allowed: Whether a record of this template may pass
+        - suppressed: Records of the template suppressed in the window that just ended
+        """
+        key = (name, level, template, feed)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                self._windows[key] = [now, 1, 0]
+                self._windows.move_to_end(key)
+                if len(self._windows) > self.max_keys:
+                    self._windows.popitem(last=False)
+                return True, window[2] if window is not None else 0
+            if window[1] < self.burst:
+                window[1] += 1
+                return True, 0
+            window[2] += 1
+            return False, 0
+
+    def filter(self, record):
+        if getattr(record, "rate_checked", False):
+            return True  # Already let through by log_event
+        template = record.msg if isinstance(record.msg, str) else type(record.msg).__name__
+        feed = getattr(record, "fields", {}).get("feed")
+        allowed, suppressed = self.allow(record.name, record.levelno, template, record.created, feed)
+        if suppressed:
+            record.suppressed = suppressed
+        return allowed
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread without formatting them and without ever blocking.
+
+    When the queue is full the record is dropped; the next record that
+    gets through carries the number dropped as `dropped`.
+    """
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the writer thread
+        return record
+
+    def enqueue(self, record):
+        if self.dropped:
+            record.dropped = self.dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.dropped = 0
+
+def _format_value(value):
+    text = str(value)
+    if not text or any(character in text for character in ' "=\n'):
+        return json.dumps(text)
+    return text
+
+class KeyValueFormatter(logging.Formatter):
+    """
+    One `key=value` line per record: time, level, logger, msg, then the
+    record's structured fields (see log_event) and any suppressed or
+    dropped counts.
+    """
+
+    def format(self, record):
+        items = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        items.update(getattr(record, "fields", {}))
+        for counter in ("suppressed", "dropped"):
+            if hasattr(record, counter):
+                items[counter] = getattr(record, counter)
+        line = " ".join(f"{key}={_format_value(value)}" for key, value in items.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+# RateLimitFilter of every logger set up here, by logger name
+_rate_limits = {}
+
+def setup_logger(name=LOGGER_NAME, level=logging.INFO, stream=None, queue_size=LOG_QUEUE_SIZE):
+    """
+    Logger whose records are rate-limited on the calling thread and written by a background thread.
+
+    Safe to call repeatedly: a logger that is already set up is returned as is.
+
+    Parameters:
+    - stream: Where the writer thread writes (default: stderr)
+    """
+    logger = logging.getLogger(name)
+    if name in _rate_limits:
+        return logger
+    logger.setLevel(level)
+    logger.propagate = False
+
+    record_queue = queue.Queue(queue_size)
+    handler = BoundedQueueHandler(record_queue)
+    _rate_limits[name] = RateLimitFilter()
+    handler.addFilter(_rate_limits[name])
     logger.addHandler(handler)
 
+    writer = logging.StreamHandler(stream)
+    writer.setFormatter(KeyValueFormatter())
+    listener = QueueListener(record_queue, writer)
+    listener.start()
+    atexit.register(listener.stop)  # Writes out what is still queued
     return logger
 
+def log_event(logger, level, message, **fields):
+    """
+    Logs `message` with structured key-value fields.
+
+    The fields are only turned into text on the writer thread, and the
+    message should stay constant (put variable parts in fields) so repeats
+    are rate-limited together. A suppressed repeat is dropped before any
+    LogRecord is created.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    extra = {"fields": fields}
+    rate_limit = _rate_limits.get(logger.name)
+    if rate_limit is not None:
+        allowed, suppressed = rate_limit.allow(logger.name, level, message, time.time(), fields.get("feed"))
+        if not allowed:
+            return
+        extra["rate_checked"] = True
+        if suppressed:
+            extra["suppressed"] = suppressed
+    logger.log(level, message, extra=extra)
+
 logger = setup_logger()